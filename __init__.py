@@ -37,6 +37,7 @@ from bpy.props import *
 from .lib.classes_to_register import *
 from .lib.property_groups import *
 from .lib.keymaps import add_keymaps
+from .functions.app_handlers import handle_mesh_hash_cache, handle_vertex_group_cache
 from .functions.common import *
 
 # store keymaps here to access after registration
@@ -53,6 +54,15 @@ def register():
     Scene.physics = PointerProperty(type=PhysicsProperties)
     Object.limit_location = PointerProperty(type=LimitProperties)
     Object.limit_rotation = PointerProperty(type=LimitProperties)
+    Object.ipe_environment = BoolProperty(
+        name="Environment",
+        description="Merge this object with other environment objects into a single passive collision body during interactive physics sessions",
+        default=False,
+    )
+
+    # register app handlers
+    bpy.app.handlers.depsgraph_update_post.append(handle_vertex_group_cache)
+    bpy.app.handlers.depsgraph_update_post.append(handle_mesh_hash_cache)
 
     # handle the keymaps
     wm = bpy.context.window_manager
@@ -68,10 +78,19 @@ def unregister():
         wm.keyconfigs.addon.keymaps.remove(km)
     addon_keymaps.clear()
 
+    # unregister app handlers
+    if handle_vertex_group_cache in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(handle_vertex_group_cache)
+    clear_vertex_group_cache()
+    if handle_mesh_hash_cache in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(handle_mesh_hash_cache)
+    clear_mesh_hash_cache()
+
     # unregister properties
     del Scene.physics
     del Object.limit_location
     del Object.limit_rotation
+    del Object.ipe_environment
 
     # unregister classes
     for cls in classes:
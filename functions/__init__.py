@@ -16,6 +16,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from .app_handlers import *
+from .collision_proxies import *
 from .common import *
+from .environment import *
 from .general import *
 from .property_callbacks import *
+from .session_recorder import *
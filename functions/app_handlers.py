@@ -15,9 +15,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+# System imports
+import numpy as np
+
 # Blender imports
 import bpy
-from bpy.types import Panel, Operator, Scene
+from bpy.types import Mesh, Object, Panel, Operator, Scene
 from bpy.app.handlers import persistent
 from mathutils import Matrix, Vector
 
@@ -26,6 +29,10 @@ from .common import *
 
 # global vars
 collection_name = "interactive_edit_session"
+# (world matrix, bounds min, bounds max) of each kinematic object after the previous frame, keyed by object name
+ccd_last_states = dict()
+# AABB trees of the environment faces and of the other rigid bodies, built on the first fast drag of a session
+ccd_trees = dict()
 
 @persistent
 def handle_edit_session_pre(scene):
@@ -53,3 +60,144 @@ def handle_edit_session_post(scene):
             obj.matrix_world = Matrix(obj["d3tool_last_matrix"])
         except KeyError:
             pass
+
+
+@persistent
+def handle_continuous_collision(scene):
+    """ hold back fast motion of kinematic objects so drags cannot tunnel through thin neighbors between frames
+
+    Bullet cannot substep single bodies from Python, so the motion is subdivided across frames instead: a
+    moving object advances (translation and rotation) only by the safe fraction of its motion found by
+    'conservative_advancement', and the rest follows in the next frames. Environment objects are swept
+    against face by face, the other bodies through an AABB tree of their bounds
+    """
+    if type(scene) != Scene or scene.name != "Interactive Physics Session":
+        return
+    c = bpy_collections().get(collection_name)
+    if c is None or not scene.physics.use_continuous_collision or scene.frame_current == scene.frame_start:
+        ccd_last_states.clear()
+        return
+    bodies = [obj for obj in c.objects if obj.rigid_body is not None and not obj.get("ipe_collision_proxy") and not obj.get("ipe_environment_body")]
+    kinematic = [obj for obj in bodies if obj.rigid_body.kinematic]
+    if not kinematic:
+        ccd_last_states.clear()
+        return
+    matrices = np.array([obj.matrix_world for obj in kinematic], dtype=np.float64).reshape(-1, 4, 4)
+    kin_mins, kin_maxs = bounds_batch(kinematic)
+    moving = [i for i, obj in enumerate(kinematic) if obj.name in ccd_last_states and not np.allclose(matrices[i], ccd_last_states[obj.name][0])]
+    if moving:
+        env_tree, env_mins, env_maxs = get_ccd_environment_tree(scene)
+        body_tree, body_mins, body_maxs = get_ccd_body_tree([obj for obj in bodies if not obj.rigid_body.kinematic])
+    for i in moving:
+        obj = kinematic[i]
+        last_matrix, last_min, last_max = ccd_last_states[obj.name]
+        # sweep a box enclosing the old and new bounds from the old center to the new one
+        half_size = np.maximum(last_max - last_min, kin_maxs[i] - kin_mins[i]) / 2
+        center = (last_min + last_max) / 2
+        displacement = (kin_mins[i] + kin_maxs[i]) / 2 - center
+        box_min, box_max = center - half_size, center + half_size
+        swept_min = np.minimum(box_min, box_min + displacement)
+        swept_max = np.maximum(box_max, box_max + displacement)
+        env_idxs = [env_tree.data(proxy) for proxy in env_tree.query_overlap(swept_min, swept_max)]
+        body_idxs = [body_tree.data(proxy) for proxy in body_tree.query_overlap(swept_min, swept_max)]
+        other_mins = np.concatenate((env_mins[env_idxs], body_mins[body_idxs])).reshape(-1, 3)
+        other_maxs = np.concatenate((env_maxs[env_idxs], body_maxs[body_idxs])).reshape(-1, 3)
+        t = conservative_advancement(box_min, box_max, displacement, other_mins, other_maxs)
+        if t < 1:
+            obj.matrix_world = Matrix(last_matrix.tolist()).lerp(Matrix(matrices[i].tolist()), t)
+            matrices[i] = np.array(obj.matrix_world, dtype=np.float64)
+            new_mins, new_maxs = bounds_batch([obj])
+            kin_mins[i], kin_maxs[i] = new_mins[0], new_maxs[0]
+    for obj, matrix, box_min, box_max in zip(kinematic, matrices, kin_mins, kin_maxs):
+        ccd_last_states[obj.name] = (matrix, box_min, box_max)
+
+
+def get_ccd_environment_tree(scene:Scene):
+    """ (AABB tree, mins, maxs) of the world-space faces of the environment objects (tree data indexes the bounds) """
+    if "environment" not in ccd_trees:
+        mins, maxs = [np.empty((0, 3))], [np.empty((0, 3))]
+        for obj in scene.objects:
+            if obj.type != "MESH" or not obj.ipe_environment:
+                continue
+            coords = transform_points(read_mesh_coords(obj.data), obj.matrix_world)
+            face_mins, face_maxs = polygon_bounds(coords, *read_mesh_polygons(obj.data))
+            mins.append(face_mins)
+            maxs.append(face_maxs)
+        mins, maxs = np.concatenate(mins), np.concatenate(maxs)
+        tree, _ = AABBTree.from_bounds(mins, maxs, data=list(range(len(mins))))
+        ccd_trees["environment"] = (tree, mins, maxs)
+    return ccd_trees["environment"]
+
+
+def get_ccd_body_tree(objs:list):
+    """ (AABB tree, mins, maxs) of the current bounds of objs (tree data indexes the bounds) """
+    mins, maxs = bounds_batch(objs)
+    names = tuple(obj.name for obj in objs)
+    cached = ccd_trees.get("bodies")
+    if cached is None or cached[0] != names:
+        sizes = (maxs - mins).max(axis=1)
+        margin = 0.1 * float(np.median(sizes)) if len(sizes) else 0.0
+        tree, proxies = AABBTree.from_bounds(mins, maxs, data=list(range(len(objs))), margin=margin)
+        ccd_trees["bodies"] = cached = (names, tree, proxies)
+    else:
+        # bodies pushed around by the solver only touch the tree once they leave their fat boxes
+        cached[1].update_many(cached[2], mins, maxs)
+    return cached[1], mins, maxs
+
+
+def clear_continuous_collision():
+    """ forget kinematic object states and AABB trees of the continuous collision pass (call when a session ends) """
+    ccd_last_states.clear()
+    ccd_trees.clear()
+
+
+@persistent
+def handle_repel_step(scene):
+    """ push overlapping session objects apart (stand-in for the rigid body world in the 'REPEL' solver) """
+    if type(scene) != Scene or scene.name != "Interactive Physics Session":
+        return
+    c = bpy_collections().get(collection_name)
+    if c is None:
+        return
+    objs = [obj for obj in c.objects if not obj.ipe_environment]
+    # environment objects (floors, walls) are fixed boxes rather than bounding spheres
+    env_mins, env_maxs = bounds_batch([obj for obj in c.objects if obj.ipe_environment])
+    mins, maxs = bounds_batch(objs)
+    centers = (mins + maxs) / 2
+    radii = (maxs - mins).max(axis=1) / 2
+    # selected (dragged) objects push without being pushed
+    movable = np.array([not (obj.select_get() if b280() else obj.select) for obj in objs], dtype=bool)
+    locks = np.array([tuple(obj.lock_location) for obj in objs], dtype=bool).reshape(-1, 3)
+    displacements = repulsion_displacements(centers, radii, movable, locks, strength=scene.physics.repel_strength, box_mins=env_mins, box_maxs=env_maxs)
+    for i in np.flatnonzero(np.abs(displacements).max(axis=1) > 1e-7):
+        objs[i].matrix_world.translation = np.array(objs[i].matrix_world.translation) + displacements[i]
+
+
+@persistent
+def handle_vertex_group_cache(scene, depsgraph=None):
+    """ drop cached vertex group weights of meshes whose geometry changed """
+    if depsgraph is None:
+        return
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        data = update.id.original
+        if isinstance(data, Object):
+            data = data.data
+        if isinstance(data, Mesh):
+            clear_vertex_group_cache(data)
+
+
+@persistent
+def handle_mesh_hash_cache(scene, depsgraph=None):
+    """ drop cached geometry hashes of meshes whose geometry changed """
+    if depsgraph is None:
+        return
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        data = update.id.original
+        if isinstance(data, Object):
+            data = data.data
+        if isinstance(data, Mesh):
+            clear_mesh_hash_cache(data)
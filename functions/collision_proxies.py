@@ -0,0 +1,96 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+from collections import OrderedDict
+
+# Blender imports
+import bpy
+from bpy.types import Object, Scene
+from mathutils import Matrix
+
+# Addon imports
+from .common import *
+from .general import add_rigid_bodies
+
+# global vars
+# convex pieces keyed by mesh geometry hash and decomposition settings (least recently used first)
+decomposition_cache = OrderedDict()
+decomposition_cache_size = 32
+
+
+def is_collision_proxy(obj:Object):
+    """ check if object is a convex piece generated for a compound collision shape """
+    return obj.get("ipe_collision_proxy", False)
+
+
+def get_convex_pieces(obj:Object, max_pieces:int=8, concavity_tolerance:float=0.02):
+    """ get convex decomposition of object mesh (cached per mesh hash, see 'cached_mesh_hash') """
+    key = (cached_mesh_hash(obj.data), max_pieces, round(concavity_tolerance, 6))
+    pieces = decomposition_cache.get(key)
+    if pieces is None:
+        loop_starts, loop_totals, loop_verts = read_mesh_polygons(obj.data)
+        pieces = decomposition_cache[key] = convex_decomposition(read_mesh_coords(obj.data), loop_starts, loop_totals, loop_verts, max_pieces=max_pieces, concavity_tolerance=concavity_tolerance)
+        while len(decomposition_cache) > decomposition_cache_size:
+            decomposition_cache.popitem(last=False)
+    decomposition_cache.move_to_end(key)
+    return pieces
+
+
+def add_decomposition_proxies(obj:Object, scene:Scene=None, max_pieces:int=8, concavity_tolerance:float=0.02):
+    """ attach convex pieces of obj as children of a compound collision shape """
+    scene = scene or bpy.context.scene
+    remove_decomposition_proxies(obj)
+    proxies = []
+    for i, coords in enumerate(get_convex_pieces(obj, max_pieces, concavity_tolerance)):
+        name = "{obj_name}_ipe_hull_{i}".format(obj_name=obj.name, i=i)
+        m = bpy.data.meshes.new(name)
+        m.vertices.add(len(coords))
+        m.vertices.foreach_set("co", coords.ravel())
+        proxy = bpy.data.objects.new(name, m)
+        proxy["ipe_collision_proxy"] = True
+        proxy.parent = obj
+        proxy.matrix_parent_inverse = Matrix.Identity(4)
+        proxy.hide_render = True
+        link_object(proxy, scene=scene)
+        proxies.append(proxy)
+    add_rigid_bodies(proxies)
+    for proxy in proxies:
+        proxy.hide_select = True
+        proxy.rigid_body.collision_shape = "CONVEX_HULL"
+        proxy.rigid_body.collision_margin = obj.rigid_body.collision_margin
+    obj.rigid_body.collision_shape = "COMPOUND"
+    return proxies
+
+
+def remove_decomposition_proxies(objs):
+    """ delete convex pieces attached to objs (and their meshes) """
+    objs = confirm_iter(objs)
+    proxies = [child for obj in objs for child in obj.children if is_collision_proxy(child)]
+    delete(proxies, remove_meshes=True)
+    return len(proxies)
+
+
+def set_collision_shape(obj:Object, collision_shape:str, **kwargs):
+    """ set rigid body collision shape, building convex pieces for compound shapes """
+    if obj.rigid_body is None or is_collision_proxy(obj):
+        return
+    if collision_shape == "COMPOUND":
+        add_decomposition_proxies(obj, **kwargs)
+    else:
+        remove_decomposition_proxies(obj)
+        obj.rigid_body.collision_shape = collision_shape
@@ -15,6 +15,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from .aabb_tree import *
 from .blender import *
 from .bmesh_generators import *
 from .bmesh_utils import *
@@ -25,12 +26,20 @@ from .bmesh_utils import *
 # except ModuleNotFoundError:
 #     print("'numba' python module not installed")
 from .colors import *
+from .continuous_collision import *
+from .convex_decomposition import *
 from .images import *
 from .materials import *
 from .maths import *
+from .maths_arrays import *
+from .matrix_history import *
+from .mesh_analysis import *
+from .mesh_arrays import *
+from .mesh_bridge import *
 from .nodes import *
 from .paths import *
 from .python_utils import *
+from .repulsion import *
 from .reporting import *
 from .transform import *
 from .wrappers import *
@@ -0,0 +1,543 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+import heapq
+import math
+import time
+import numpy as np
+
+# Blender imports
+# NONE!
+
+# Module imports
+# NONE!
+
+
+def _surface_area(box_min:np.ndarray, box_max:np.ndarray):
+    d = box_max - box_min
+    return 2 * (d[..., 0] * d[..., 1] + d[..., 1] * d[..., 2] + d[..., 2] * d[..., 0])
+
+
+class AABBTree:
+    """ dynamic bounding volume hierarchy of axis-aligned boxes
+
+    Leaves store 'fat' boxes (tight box grown by 'margin'), so moving a box only
+    touches the tree once it leaves its fat box. Proxy ids returned by 'insert'
+    stay valid until the proxy is removed (also across 'rebuild'). Point and box
+    queries walk the tree depth-first (nearest: best-first) with scalar box tests,
+    which beats vectorizing over the few nodes of each level; ray and pair queries
+    walk it one level at a time with vectorized box tests.
+    """
+    def __init__(self, margin:float=0.0):
+        self.margin = margin
+        self.root = -1
+        self._capacity = 0
+        self._num_leaves = 0
+        self._free = []
+        self._mins = np.empty((0, 3))
+        self._maxs = np.empty((0, 3))
+        self._tight_mins = np.empty((0, 3))
+        self._tight_maxs = np.empty((0, 3))
+        self._parent = np.empty(0, dtype=np.int64)
+        self._child1 = np.empty(0, dtype=np.int64)
+        self._child2 = np.empty(0, dtype=np.int64)
+        self._height = np.empty(0, dtype=np.int64)
+        self._data = []
+
+    @classmethod
+    def from_bounds(cls, mins:np.ndarray, maxs:np.ndarray, data:list=None, margin:float=0.0):
+        """ build balanced tree from (N, 3) min/max arrays; returns (tree, proxy ids) """
+        tree = cls(margin=margin)
+        mins = np.asarray(mins, dtype=np.float64).reshape(-1, 3)
+        maxs = np.asarray(maxs, dtype=np.float64).reshape(-1, 3)
+        tree._reserve(2 * len(mins))
+        proxies = np.array([tree._allocate() for _ in range(len(mins))], dtype=np.int64)
+        tree._set_leaf_bounds(proxies, mins, maxs)
+        for i, proxy in enumerate(proxies):
+            tree._data[proxy] = None if data is None else data[i]
+        tree._num_leaves = len(proxies)
+        tree.rebuild()
+        return tree, proxies
+
+    def __len__(self):
+        return self._num_leaves
+
+    @property
+    def height(self):
+        return 0 if self.root == -1 else int(self._height[self.root])
+
+    def data(self, proxy:int):
+        return self._data[proxy]
+
+    def bounds(self, proxy:int):
+        """ tight (min, max) bounds of proxy """
+        return self._tight_mins[proxy].copy(), self._tight_maxs[proxy].copy()
+
+    def proxies(self):
+        """ ids of all proxies in the tree """
+        return np.flatnonzero(self._is_leaf_node())
+
+    ################################################
+    # editing
+
+    def insert(self, box_min:np.ndarray, box_max:np.ndarray, data=None):
+        """ add box to the tree and return its proxy id """
+        proxy = self._allocate()
+        self._set_leaf_bounds(proxy, box_min, box_max)
+        self._data[proxy] = data
+        self._insert_leaf(proxy)
+        self._num_leaves += 1
+        self._rebalance_if_needed()
+        return proxy
+
+    def remove(self, proxy:int):
+        self._remove_leaf(proxy)
+        self._release(proxy)
+        self._num_leaves -= 1
+
+    def update(self, proxy:int, box_min:np.ndarray, box_max:np.ndarray):
+        """ move proxy to new bounds (returns True if its leaf had to be re-inserted) """
+        return self.update_many([proxy], np.reshape(box_min, (1, 3)), np.reshape(box_max, (1, 3))) > 0
+
+    def update_many(self, proxies:np.ndarray, mins:np.ndarray, maxs:np.ndarray):
+        """ move proxies to new (N, 3) bounds in bulk and return number of leaves re-inserted
+
+        leaves still inside their fat boxes only get their tight bounds updated; leaves that escaped
+        by less than their own size get a new fat box and their ancestors are refit in one pass per
+        tree level; only leaves that moved farther are re-inserted (or the whole tree is rebuilt if
+        many did)
+        """
+        proxies = np.asarray(proxies, dtype=np.int64).reshape(-1)
+        mins = np.asarray(mins, dtype=np.float64).reshape(-1, 3)
+        maxs = np.asarray(maxs, dtype=np.float64).reshape(-1, 3)
+        self._tight_mins[proxies] = mins
+        self._tight_maxs[proxies] = maxs
+        escaped = ~(np.all(self._mins[proxies] <= mins, axis=1) & np.all(maxs <= self._maxs[proxies], axis=1))
+        if not escaped.any():
+            return 0
+        proxies, mins, maxs = proxies[escaped], mins[escaped], maxs[escaped]
+        old_centers = (self._mins[proxies] + self._maxs[proxies]) / 2
+        old_sizes = (self._maxs[proxies] - self._mins[proxies]).max(axis=1)
+        moved_far = np.linalg.norm((mins + maxs) / 2 - old_centers, axis=1) > old_sizes
+        self._mins[proxies] = mins - self.margin
+        self._maxs[proxies] = maxs + self.margin
+        self._refit_from_leaves(proxies[~moved_far])
+        far_proxies = proxies[moved_far]
+        if len(far_proxies) > self._num_leaves // 4:
+            self.rebuild()
+        elif len(far_proxies) > 0:
+            for proxy in far_proxies:
+                self._remove_leaf(proxy)
+                self._insert_leaf(proxy)
+            self._rebalance_if_needed()
+        return len(far_proxies)
+
+    def rebuild(self):
+        """ rebuild internal nodes top-down (median split along the widest axis of leaf centers) """
+        leaves = self.proxies()
+        for node in np.flatnonzero((self._child1 != -1) & (self._height >= 0)):
+            self._release(node)
+        if len(leaves) == 0:
+            self.root = -1
+            return
+        centers = (self._mins[leaves] + self._maxs[leaves]) / 2
+        self.root = self._build(leaves, centers)
+        self._parent[self.root] = -1
+
+    def _build(self, leaves:np.ndarray, centers:np.ndarray):
+        if len(leaves) == 1:
+            return int(leaves[0])
+        axis = np.argmax(centers.max(axis=0) - centers.min(axis=0))
+        half = len(leaves) // 2
+        split = np.argpartition(centers[:, axis], half)
+        child1 = self._build(leaves[split[:half]], centers[split[:half]])
+        child2 = self._build(leaves[split[half:]], centers[split[half:]])
+        node = self._allocate()
+        self._set_children(node, child1, child2)
+        return node
+
+    ################################################
+    # queries
+
+    def query_overlap(self, box_min:np.ndarray, box_max:np.ndarray):
+        """ ids of proxies whose tight bounds overlap the box """
+        if self.root == -1:
+            return np.empty(0, dtype=np.int64)
+        qx0, qy0, qz0 = (float(v) for v in box_min)
+        qx1, qy1, qz1 = (float(v) for v in box_max)
+        child1, child2 = self._child1, self._child2
+        hits = []
+        stack = [int(self.root)]
+        while stack:
+            node = stack.pop()
+            c1 = int(child1[node])
+            lo, hi = (self._mins[node].tolist(), self._maxs[node].tolist()) if c1 != -1 else (self._tight_mins[node].tolist(), self._tight_maxs[node].tolist())
+            if lo[0] > qx1 or lo[1] > qy1 or lo[2] > qz1 or hi[0] < qx0 or hi[1] < qy0 or hi[2] < qz0:
+                continue
+            if c1 == -1:
+                hits.append(node)
+            else:
+                stack += (c1, int(child2[node]))
+        return np.array(hits, dtype=np.int64)
+
+    def query_ray(self, origin:np.ndarray, direction:np.ndarray, max_distance:float=np.inf):
+        """ (proxy ids, hit parameters t) of tight bounds hit by origin + t * direction (0 <= t <= max_distance), sorted by t """
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        with np.errstate(divide="ignore"):
+            inv_dir = 1 / direction
+
+        def slab(box_mins, box_maxs):
+            with np.errstate(invalid="ignore"):
+                t0 = (box_mins - origin) * inv_dir
+                t1 = (box_maxs - origin) * inv_dir
+            # rays parallel to a slab hit it only from inside
+            inside = (origin >= box_mins) & (origin <= box_maxs)
+            t_near = np.where(np.isnan(t0), np.where(inside, -np.inf, np.inf), np.minimum(t0, t1)).max(axis=1)
+            t_far = np.where(np.isnan(t0), np.where(inside, np.inf, -np.inf), np.maximum(t0, t1)).min(axis=1)
+            t_near = np.maximum(t_near, 0)
+            return t_near, (t_near <= t_far) & (t_near <= max_distance)
+
+        hit_proxies, hit_ts = [], []
+        for leaves in self._walk(lambda nodes: slab(self._mins[nodes], self._maxs[nodes])[1]):
+            t, keep = slab(self._tight_mins[leaves], self._tight_maxs[leaves])
+            hit_proxies.append(leaves[keep])
+            hit_ts.append(t[keep])
+        if not hit_proxies:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        hit_proxies = np.concatenate(hit_proxies)
+        hit_ts = np.concatenate(hit_ts)
+        order = np.argsort(hit_ts, kind="stable")
+        return hit_proxies[order], hit_ts[order]
+
+    def query_nearest(self, point:np.ndarray):
+        """ (proxy id, distance) of the tight bounds nearest to point ((-1, inf) if the tree is empty)
+
+        nodes are visited closest first, and the walk stops once the closest pending node is
+        farther than the best leaf found so far
+        """
+        px, py, pz = (float(v) for v in point)
+        child1, child2 = self._child1, self._child2
+
+        def box_distance(lo, hi):
+            dx = max(lo[0] - px, px - hi[0], 0.0)
+            dy = max(lo[1] - py, py - hi[1], 0.0)
+            dz = max(lo[2] - pz, pz - hi[2], 0.0)
+            return math.sqrt(dx * dx + dy * dy + dz * dz)
+
+        best_proxy, best_dist = -1, math.inf
+        heap = [] if self.root == -1 else [(0.0, int(self.root))]
+        while heap:
+            dist, node = heapq.heappop(heap)
+            if dist >= best_dist:
+                break
+            c1 = int(child1[node])
+            if c1 == -1:
+                # fat bounds contain the tight bounds, so their distance was only a lower bound
+                dist = box_distance(self._tight_mins[node].tolist(), self._tight_maxs[node].tolist())
+                if dist < best_dist:
+                    best_proxy, best_dist = node, dist
+                continue
+            for child in (c1, int(child2[node])):
+                dist = box_distance(self._mins[child].tolist(), self._maxs[child].tolist())
+                if dist < best_dist:
+                    heapq.heappush(heap, (dist, child))
+        return best_proxy, best_dist
+
+    def query_pairs(self):
+        """ (K, 2) array of proxy id pairs (smaller id first) whose tight bounds overlap """
+        if self.root == -1:
+            return np.empty((0, 2), dtype=np.int64)
+        child1, child2, height = self._child1, self._child2, self._height
+        a = np.array([self.root])
+        b = np.array([self.root])
+        pairs = []
+        while len(a):
+            same = a == b
+            # a subtree against itself: both children against themselves and each other
+            s = a[same]
+            s = s[child1[s] != -1]
+            next_a = [child1[s], child2[s], child1[s]]
+            next_b = [child1[s], child2[s], child2[s]]
+            # two distinct subtrees: descend into the taller one while their fat bounds overlap
+            da, db = a[~same], b[~same]
+            overlap = np.all(self._mins[da] <= self._maxs[db], axis=1) & np.all(self._maxs[da] >= self._mins[db], axis=1)
+            da, db = da[overlap], db[overlap]
+            leaf_a, leaf_b = child1[da] == -1, child1[db] == -1
+            both = leaf_a & leaf_b
+            la, lb = da[both], db[both]
+            tight = np.all(self._tight_mins[la] <= self._tight_maxs[lb], axis=1) & np.all(self._tight_maxs[la] >= self._tight_mins[lb], axis=1)
+            pairs.append(np.stack((np.minimum(la, lb)[tight], np.maximum(la, lb)[tight]), axis=1))
+            split_b = ~leaf_b & (leaf_a | (height[db] > height[da]))
+            split_a = ~both & ~split_b
+            next_a += [da[split_b], da[split_b], child1[da[split_a]], child2[da[split_a]]]
+            next_b += [child1[db[split_b]], child2[db[split_b]], db[split_a], db[split_a]]
+            a = np.concatenate(next_a)
+            b = np.concatenate(next_b)
+        return np.concatenate(pairs)
+
+    def _walk(self, visit):
+        """ yield arrays of leaves reached through nodes for which visit(nodes) is True, level by level """
+        if self.root == -1:
+            return
+        frontier = np.array([self.root])
+        while len(frontier):
+            frontier = frontier[visit(frontier)]
+            is_leaf = self._child1[frontier] == -1
+            if is_leaf.any():
+                yield frontier[is_leaf]
+            internal = frontier[~is_leaf]
+            frontier = np.concatenate((self._child1[internal], self._child2[internal]))
+
+    ################################################
+    # node management
+
+    def _reserve(self, capacity:int):
+        if capacity <= self._capacity:
+            return
+        old = self._capacity
+        extra = capacity - old
+        self._mins = np.concatenate((self._mins, np.zeros((extra, 3))))
+        self._maxs = np.concatenate((self._maxs, np.zeros((extra, 3))))
+        self._tight_mins = np.concatenate((self._tight_mins, np.zeros((extra, 3))))
+        self._tight_maxs = np.concatenate((self._tight_maxs, np.zeros((extra, 3))))
+        self._parent = np.concatenate((self._parent, np.full(extra, -1, dtype=np.int64)))
+        self._child1 = np.concatenate((self._child1, np.full(extra, -1, dtype=np.int64)))
+        self._child2 = np.concatenate((self._child2, np.full(extra, -1, dtype=np.int64)))
+        # free nodes have height -1
+        self._height = np.concatenate((self._height, np.full(extra, -1, dtype=np.int64)))
+        self._data += [None] * extra
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self._capacity = capacity
+
+    def _allocate(self):
+        if not self._free:
+            self._reserve(max(16, 2 * self._capacity))
+        node = self._free.pop()
+        self._parent[node] = -1
+        self._child1[node] = -1
+        self._child2[node] = -1
+        self._height[node] = 0
+        return node
+
+    def _release(self, node:int):
+        self._height[node] = -1
+        self._child1[node] = -1
+        self._child2[node] = -1
+        self._data[node] = None
+        self._free.append(int(node))
+
+    def _is_leaf_node(self):
+        return (self._child1 == -1) & (self._height == 0)
+
+    def _set_leaf_bounds(self, proxy, box_min, box_max):
+        self._tight_mins[proxy] = box_min
+        self._tight_maxs[proxy] = box_max
+        self._mins[proxy] = np.asarray(box_min) - self.margin
+        self._maxs[proxy] = np.asarray(box_max) + self.margin
+
+    def _set_children(self, node:int, child1:int, child2:int):
+        self._child1[node] = child1
+        self._child2[node] = child2
+        self._parent[child1] = node
+        self._parent[child2] = node
+        self._mins[node] = np.minimum(self._mins[child1], self._mins[child2])
+        self._maxs[node] = np.maximum(self._maxs[child1], self._maxs[child2])
+        self._height[node] = 1 + max(self._height[child1], self._height[child2])
+
+    def _refit_ancestors(self, node:int):
+        while node != -1:
+            self._set_children(node, self._child1[node], self._child2[node])
+            node = self._parent[node]
+
+    def _refit_from_leaves(self, leaves:np.ndarray):
+        """ refit the bounds of all ancestors of leaves, one vectorized pass per tree height """
+        is_ancestor = np.zeros(self._capacity, dtype=bool)
+        nodes = self._parent[leaves]
+        nodes = nodes[nodes != -1]
+        while len(nodes):
+            nodes = nodes[~is_ancestor[nodes]]
+            is_ancestor[nodes] = True
+            nodes = self._parent[nodes]
+            nodes = nodes[nodes != -1]
+        ancestors = np.flatnonzero(is_ancestor)
+        if len(ancestors) == 0:
+            return
+        heights = self._height[ancestors]
+        for height in range(int(heights.min()), int(heights.max()) + 1):
+            nodes = ancestors[heights == height]
+            c1, c2 = self._child1[nodes], self._child2[nodes]
+            self._mins[nodes] = np.minimum(self._mins[c1], self._mins[c2])
+            self._maxs[nodes] = np.maximum(self._maxs[c1], self._maxs[c2])
+
+    def _insert_leaf(self, leaf:int):
+        if self.root == -1:
+            self.root = leaf
+            self._parent[leaf] = -1
+            return
+        leaf_min, leaf_max = self._mins[leaf], self._maxs[leaf]
+        # descend towards the sibling with the lowest surface area increase
+        node = self.root
+        while self._child1[node] != -1:
+            children = np.array((self._child1[node], self._child2[node]))
+            area = _surface_area(self._mins[node], self._maxs[node])
+            combined_area = _surface_area(np.minimum(self._mins[node], leaf_min), np.maximum(self._maxs[node], leaf_max))
+            cost = 2 * combined_area
+            inheritance_cost = 2 * (combined_area - area)
+            child_costs = _surface_area(np.minimum(self._mins[children], leaf_min), np.maximum(self._maxs[children], leaf_max)) + inheritance_cost
+            is_internal = self._child1[children] != -1
+            child_costs -= np.where(is_internal, _surface_area(self._mins[children], self._maxs[children]), 0)
+            if cost < child_costs.min():
+                break
+            node = children[np.argmin(child_costs)]
+        sibling = node
+        old_parent = self._parent[sibling]
+        new_parent = self._allocate()
+        self._parent[new_parent] = old_parent
+        self._set_children(new_parent, sibling, leaf)
+        if old_parent == -1:
+            self.root = new_parent
+        else:
+            if self._child1[old_parent] == sibling:
+                self._child1[old_parent] = new_parent
+            else:
+                self._child2[old_parent] = new_parent
+            self._refit_ancestors(old_parent)
+
+    def _remove_leaf(self, leaf:int):
+        if leaf == self.root:
+            self.root = -1
+            return
+        parent = self._parent[leaf]
+        grand_parent = self._parent[parent]
+        sibling = self._child2[parent] if self._child1[parent] == leaf else self._child1[parent]
+        self._release(parent)
+        self._parent[leaf] = -1
+        if grand_parent == -1:
+            self.root = sibling
+            self._parent[sibling] = -1
+            return
+        if self._child1[grand_parent] == parent:
+            self._child1[grand_parent] = sibling
+        else:
+            self._child2[grand_parent] = sibling
+        self._parent[sibling] = grand_parent
+        self._refit_ancestors(grand_parent)
+
+    def _rebalance_if_needed(self):
+        # incremental insertion does not rotate nodes; rebuild once the tree gets much deeper than balanced
+        if self._num_leaves > 1 and self.height > 2 * np.log2(self._num_leaves) + 4:
+            self.rebuild()
+
+
+def benchmark_aabb_tree(num_boxes:int=5000, num_queries:int=200, seed:int=0):
+    """ micro-benchmarks of AABBTree against brute-force NumPy (returns dict of seconds per operation) """
+    rng = np.random.default_rng(seed)
+    extent = num_boxes ** (1 / 3) * 2
+    mins = rng.random((num_boxes, 3)) * extent
+    maxs = mins + rng.random((num_boxes, 3)) * 0.8 + 0.2
+    results = dict()
+
+    start = time.perf_counter()
+    tree, proxies = AABBTree.from_bounds(mins, maxs, margin=0.1)
+    results["build"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    incremental = AABBTree(margin=0.1)
+    for box_min, box_max in zip(mins[:1000], maxs[:1000]):
+        incremental.insert(box_min, box_max)
+    results["insert"] = (time.perf_counter() - start) / min(1000, num_boxes)
+
+    # small moves of 10% of the boxes stay inside their fat bounds
+    moved = rng.choice(num_boxes, num_boxes // 10, replace=False)
+    offsets = rng.normal(scale=0.05, size=(len(moved), 3))
+    start = time.perf_counter()
+    tree.update_many(proxies[moved], mins[moved] + offsets, maxs[moved] + offsets)
+    results["refit (10% moved)"] = time.perf_counter() - start
+    mins[moved] += offsets
+    maxs[moved] += offsets
+
+    query_mins = rng.random((num_queries, 3)) * extent
+    query_maxs = query_mins + 1
+    start = time.perf_counter()
+    for q_min, q_max in zip(query_mins, query_maxs):
+        tree.query_overlap(q_min, q_max)
+    results["overlap"] = (time.perf_counter() - start) / num_queries
+    start = time.perf_counter()
+    for q_min, q_max in zip(query_mins, query_maxs):
+        np.flatnonzero(np.all(mins <= q_max, axis=1) & np.all(maxs >= q_min, axis=1))
+    results["overlap (brute force)"] = (time.perf_counter() - start) / num_queries
+
+    directions = rng.normal(size=(num_queries, 3))
+    start = time.perf_counter()
+    for origin, direction in zip(query_mins, directions):
+        tree.query_ray(origin, direction, max_distance=extent / 4)
+    results["ray"] = (time.perf_counter() - start) / num_queries
+
+    start = time.perf_counter()
+    for point in query_mins:
+        tree.query_nearest(point)
+    results["nearest"] = (time.perf_counter() - start) / num_queries
+    start = time.perf_counter()
+    for point in query_mins:
+        np.argmin(np.linalg.norm(np.maximum(np.maximum(mins - point, point - maxs), 0), axis=1))
+    results["nearest (brute force)"] = (time.perf_counter() - start) / num_queries
+
+    start = time.perf_counter()
+    tree.query_pairs()
+    results["all pairs"] = time.perf_counter() - start
+
+    # queries must stay exact after re-inserting far moved boxes and removing boxes
+    jumped = rng.choice(num_boxes, num_boxes // 50, replace=False)
+    offsets = rng.random((len(jumped), 3)) * extent - mins[jumped]
+    mins[jumped] += offsets
+    maxs[jumped] += offsets
+    tree.update_many(proxies[jumped], mins[jumped], maxs[jumped])
+    alive = np.ones(num_boxes, dtype=bool)
+    alive[rng.choice(num_boxes, num_boxes // 50, replace=False)] = False
+    for proxy in proxies[~alive]:
+        tree.remove(proxy)
+    check_aabb_tree(tree, proxies[alive], mins[alive], maxs[alive], query_mins, query_maxs)
+    return results
+
+
+def check_aabb_tree(tree:AABBTree, proxies:np.ndarray, mins:np.ndarray, maxs:np.ndarray, query_mins:np.ndarray, query_maxs:np.ndarray):
+    """ assert that tree queries match brute force over the (N, 3) bounds of 'proxies' (all proxies in the tree) """
+    assert len(tree) == len(proxies)
+    for q_min, q_max in zip(query_mins, query_maxs):
+        expected = proxies[np.all(mins <= q_max, axis=1) & np.all(maxs >= q_min, axis=1)]
+        assert np.array_equal(np.sort(tree.query_overlap(q_min, q_max)), np.sort(expected)), "overlap query differs from brute force"
+        distances = np.linalg.norm(np.maximum(np.maximum(mins - q_min, q_min - maxs), 0), axis=1)
+        assert abs(tree.query_nearest(q_min)[1] - distances.min()) < 1e-9, "nearest query differs from brute force"
+    expected = []
+    for i in range(0, len(proxies), 256):
+        # each block of boxes against all boxes after its first one
+        j = np.arange(i, len(proxies))
+        overlap = np.all(mins[i:i + 256, None] <= maxs[None, j], axis=2) & np.all(maxs[i:i + 256, None] >= mins[None, j], axis=2)
+        a, b = np.nonzero(overlap)
+        a, b = a + i, j[b]
+        keep = a < b
+        expected.append(np.stack((proxies[a[keep]], proxies[b[keep]]), axis=1))
+    expected = np.sort(np.concatenate(expected), axis=1)
+    pairs = tree.query_pairs()
+    assert np.array_equal(np.unique(pairs, axis=0), np.unique(expected, axis=0)) and len(pairs) == len(expected), "pair query differs from brute force"
+
+
+if __name__ == "__main__":
+    for name, seconds in benchmark_aabb_tree().items():
+        print("{:<24}{:>10.3f} ms".format(name, seconds * 1000))
@@ -18,6 +18,7 @@
 # System imports
 import os
 from math import *
+import numpy as np
 
 # Blender imports
 import bpy
@@ -25,7 +26,7 @@ import bmesh
 import mathutils
 from mathutils import Vector, Euler, Matrix
 from bpy_extras import view3d_utils
-from bpy.types import Object, Scene, Event
+from bpy.types import Mesh, Object, Scene, Event
 try:
     from bpy.types import ViewLayer, LayerCollection
 except ImportError:
@@ -37,6 +38,10 @@ from .python_utils import confirm_iter, confirm_list
 from .wrappers import blender_version_wrapper
 from .reporting import b280
 
+# global vars
+# (vert indices, group indices, weights, vertex count) of every vertex group membership, sorted by group, keyed by mesh pointer (opt-in)
+vertex_group_cache = dict()
+
 
 #################### PREFERENCES ####################
 
@@ -387,18 +392,74 @@ def is_adaptive(ob:Object):
             return True
     return False
 
-def get_vertices_in_group(obj:Object, vertex_group):
+def get_vertex_group_index(obj:Object, vertex_group):
+    """ index of vertex group given by name or index """
     if isinstance(vertex_group, int):
         if vertex_group >= len(obj.vertex_groups):
             raise IndexError("Index out of range!")
+        return vertex_group
     elif isinstance(vertex_group, str):
         if vertex_group not in obj.vertex_groups:
             raise NameError("'{obj}' has no vertex group, '{vg}'!".format(obj=obj.name, vg=vertex_group))
-        vertex_group = obj.vertex_groups[vertex_group].index
+        return obj.vertex_groups[vertex_group].index
     else:
         raise ValueError("Expecting second argument to be of type 'str', or 'int'. Got {}".format(type(vertex_group)))
 
-    return [v for v in obj.data.vertices if vertex_group in [vg.group for vg in v.groups]]
+
+def read_vertex_group_memberships(mesh:Mesh, use_cache:bool=False):
+    """ (vert indices, group indices, weights) of every vertex group membership in mesh, sorted by group
+
+    the API has no bulk read for memberships, so this still visits every vertex's groups in Python (each
+    group lookup after that is a searchsorted on the arrays); with 'use_cache', the arrays are reused until
+    the mesh geometry is updated in the depsgraph or 'clear_vertex_group_cache' is called, so only cache
+    where weights are not edited in between (vertex_group.add/remove do not invalidate the cache by themselves)
+    """
+    key = mesh.as_pointer()
+    cached = vertex_group_cache.get(key) if use_cache else None
+    if cached is not None and cached[3] == len(mesh.vertices):
+        return cached[:3]
+    memberships = [(v.index, g.group, g.weight) for v in mesh.vertices for g in v.groups]
+    memberships = np.array(memberships, dtype=np.float64).reshape(-1, 3)
+    verts = memberships[:, 0].astype(np.int32)
+    groups = memberships[:, 1].astype(np.int32)
+    weights = memberships[:, 2].astype(np.float32)
+    order = np.argsort(groups, kind="stable")
+    memberships = (verts[order], groups[order], weights[order])
+    if use_cache:
+        vertex_group_cache[key] = memberships + (len(mesh.vertices),)
+    return memberships
+
+
+def clear_vertex_group_cache(mesh:Mesh=None):
+    """ forget cached vertex group memberships of mesh (of all meshes if None) """
+    if mesh is None:
+        vertex_group_cache.clear()
+    else:
+        vertex_group_cache.pop(mesh.as_pointer(), None)
+
+
+def get_vertex_group_arrays(obj:Object, vertex_groups, use_cache:bool=False):
+    """ (vert indices, weights) arrays of a vertex group given by name or index (list of them for a list of groups) """
+    verts, groups, weights = read_vertex_group_memberships(obj.data, use_cache=use_cache)
+    group_indices = [get_vertex_group_index(obj, vg) for vg in confirm_list(vertex_groups)]
+    starts = np.searchsorted(groups, group_indices, side="left")
+    ends = np.searchsorted(groups, group_indices, side="right")
+    arrays = [(verts[start:end], weights[start:end]) for start, end in zip(starts, ends)]
+    return arrays if isinstance(vertex_groups, (list, tuple)) else arrays[0]
+
+
+def get_vertex_group_weights(obj:Object, vertex_group, default:float=0.0, use_cache:bool=False):
+    """ weight of every vertex in a vertex group given by name or index ('default' for verts outside the group) """
+    verts, weights = get_vertex_group_arrays(obj, vertex_group, use_cache=use_cache)
+    all_weights = np.full(len(obj.data.vertices), default, dtype=np.float32)
+    all_weights[verts] = weights
+    return all_weights
+
+
+def get_vertices_in_group(obj:Object, vertex_group, use_cache:bool=False):
+    verts, _ = get_vertex_group_arrays(obj, vertex_group, use_cache=use_cache)
+    vertices = obj.data.vertices
+    return [vertices[i] for i in verts.tolist()]
 
 
 #################### VIEWPORT ####################
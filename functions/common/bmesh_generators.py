@@ -17,6 +17,7 @@
 
 # System imports
 import math
+import numpy as np
 
 # Blender imports
 import bpy
@@ -25,7 +26,7 @@ from mathutils import Vector
 
 # Module imports
 from .blender import select_geom
-from .bmesh_utils import smooth_bm_faces
+from .bmesh_utils import append_arrays_to_bmesh, smooth_bm_faces
 
 
 def make_rectangle(coord1:Vector, coord2:Vector, face:bool=True, flip_normal:bool=False, bme:bmesh=None):
@@ -118,31 +119,8 @@ def make_cube(coord1:Vector, coord2:Vector, sides:list=[False]*6, flip_normals:b
     bme = bme or bmesh.new()
 
     # create vertices in the following x,y,z order (later reordered): [---, --+, -+-, -++, +--, +-+, ++-, +++]
-    v_list = [bme.verts.new((x, y, z)) for x in (coord1.x, coord2.x) for y in (coord1.y, coord2.y) for z in (coord1.z, coord2.z)]
-    v1, v2, v3, v4, v5, v6, v7, v8 = v_list
-
-    # create faces
-    new_faces = []
-    if sides[0]:
-        new_faces.append([v6, v8, v4, v2])
-    if sides[1]:
-        new_faces.append([v3, v7, v5, v1])
-    if sides[4]:
-        new_faces.append([v4, v8, v7, v3])
-    if sides[3]:
-        new_faces.append([v2, v4, v3, v1])
-    if sides[2]:
-        new_faces.append([v8, v6, v5, v7])
-    if sides[5]:
-        new_faces.append([v6, v2, v1, v5])
-
-    for f in new_faces:
-        if flip_normals:
-            f.reverse()
-        new_f = bme.faces.new(f)
-        # if seams:
-        #     for e in new_f.edges:
-        #         e.seam = True
+    coords, loop_totals, loop_verts, smooth = cube_arrays(coord1, coord2, sides, flip_normals)
+    v1, v2, v3, v4, v5, v6, v7, v8 = append_arrays_to_bmesh(bme, coords, loop_totals, loop_verts, smooth=smooth)
 
     # reorder verts to the following x,y,z order: [---, -+-, ++-, +--, --+, +-+, +++, -++]
     verts = [v1, v3, v7, v5, v2, v6, v8, v4]
@@ -166,22 +144,11 @@ def make_circle(radius:float, vertices:int, co:tuple=Vector((0, 0, 0)), fill:boo
     """
     # initialize vars
     bme = bme or bmesh.new()
-    verts = []
-
-    # create verts around circumference of circle
-    for i in range(vertices):
-        circ_val = ((2 * math.pi) / vertices) * (i - 0.5)
-        x = radius * math.cos(circ_val)
-        y = radius * math.sin(circ_val)
-        coord = co + Vector((x, y, 0))
-        verts.append(bme.verts.new(coord))
-    # create face
-    if fill:
-        bme.faces.new(verts if not flip_normals else verts[::-1])
-    # create edges
-    else:
-        for i in range(len(verts)):
-            bme.edges.new((verts[i - 1], verts[i]))
+
+    # create verts around circumference of circle, with a face or edges between them
+    coords, loop_totals, loop_verts, smooth = circle_arrays(radius, vertices, co, fill, flip_normals)
+    edges = None if fill else ring_edges(vertices)
+    verts = append_arrays_to_bmesh(bme, coords, loop_totals, loop_verts, edges, smooth)
 
     # select geometry
     if select:
@@ -208,40 +175,12 @@ def make_cylinder(radius:float, height:float, vertices:int, co:Vector=Vector((0,
     """
     # initialize vars
     bme = bme or bmesh.new()
-    top_verts = []
-    bot_verts = []
-    side_faces = []
-
-    # create upper and lower circles
-    for i in range(vertices):
-        circ_val = ((2 * math.pi) / vertices) * i
-        x = radius * math.cos(circ_val)
-        y = radius * math.sin(circ_val)
-        z = height / 2
-        coord_t = co + Vector((x, y, z))
-        coord_b = co + Vector((x, y, -z))
-        top_verts.append(bme.verts.new(coord_t))
-        bot_verts.append(bme.verts.new(coord_b))
-
-    # if seams:
-    #     for i in range(len(top_verts)):
-    #         v1 = top_verts[i]
-    #         v2 = top_verts[(i-1)]
-    #         v3 = bot_verts[i]
-    #         v4 = bot_verts[(i-1)]
-    #         bme.edges.new((v1, v2)).seam = True
-    #         bme.edges.new((v3, v4)).seam = True
-    #     bme.edges.new((top_verts[0], bot_verts[0])).seam = True
-
-    # create faces on the sides
-    _, side_faces = connect_circles(top_verts if flip_normals else bot_verts, bot_verts if flip_normals else top_verts, bme)
-    smooth_bm_faces(side_faces)
-
-    # create top and bottom faces
-    if top_face:
-        bme.faces.new(top_verts if not flip_normals else top_verts[::-1])
-    if bot_face:
-        bme.faces.new(bot_verts[::-1] if not flip_normals else bot_verts)
+
+    # create upper and lower circles, side faces (smooth) and top and bottom faces
+    coords, loop_totals, loop_verts, smooth = cylinder_arrays(radius, height, vertices, co, bot_face, top_face, flip_normals)
+    new_verts = append_arrays_to_bmesh(bme, coords, loop_totals, loop_verts, smooth=smooth)
+    top_verts = new_verts[0::2]
+    bot_verts = new_verts[1::2]
 
     # return bme & dictionary with lists of top and bottom vertices
     return bme, {"bottom":bot_verts[::-1], "top":top_verts}
@@ -270,17 +209,11 @@ def make_tube(radius:float, height:float, thickness:float, vertices:int, co:Vect
     if bme == None:
         bme = bmesh.new()
 
-    # create upper and lower circles
-    bme, inner_verts = make_cylinder(radius, height, vertices, co=co, bot_face=False, top_face=False, flip_normals=not flip_normals, bme=bme)
-    bme, outer_verts = make_cylinder(radius + thickness, height, vertices, co=co, bot_face=False, top_face=False, flip_normals=flip_normals, bme=bme)
-    if top_face:
-        connect_circles(outer_verts["top"], inner_verts["top"], bme, flip_normals=flip_normals, select=False)
-    if bot_face:
-        connect_circles(outer_verts["bottom"], inner_verts["bottom"], bme, flip_normals=flip_normals, select=False)
-    if bot_face_inner:
-        bme.faces.new(inner_verts["bottom"])
-    if top_face_inner:
-        bme.faces.new(inner_verts["top"][::-1])
+    # create inner and outer cylinders and the faces connecting them
+    coords, loop_totals, loop_verts, smooth = tube_arrays(radius, height, thickness, vertices, co, top_face, bot_face, top_face_inner, bot_face_inner, flip_normals)
+    new_verts = append_arrays_to_bmesh(bme, coords, loop_totals, loop_verts, smooth=smooth)
+    inner_verts = {"bottom":new_verts[1:2 * vertices:2][::-1], "top":new_verts[0:2 * vertices:2]}
+    outer_verts = {"bottom":new_verts[2 * vertices + 1::2][::-1], "top":new_verts[2 * vertices::2]}
     # return bmesh
     return bme, {"outer":outer_verts, "inner":inner_verts}
 
@@ -298,3 +231,134 @@ def connect_circles(circle1, circle2, bme, offset=0, flip_normals=False, smooth=
         f.smooth = smooth
         faces.append(f)
     return bme, faces
+
+
+###############################
+### Array generators     ######
+###############################
+# each returns flat (coords, loop_totals, loop_verts, smooth) arrays for 'new_mesh_from_arrays';
+# parameters may be arrays of M values (or (M, 3) coordinates) to generate M primitives in one call
+
+
+def _batch(coords:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray, smooth:np.ndarray):
+    """ concatenate M copies of one primitive's topology, offsetting vertex indices, for (M, V, 3) coords """
+    num, verts_per = coords.shape[:2]
+    loop_verts = (np.asarray(loop_verts, dtype=np.int32)[None] + (np.arange(num, dtype=np.int32) * verts_per)[:, None]).ravel()
+    return coords.reshape(-1, 3), np.tile(np.asarray(loop_totals, dtype=np.int32), num), loop_verts, np.tile(np.asarray(smooth, dtype=bool), num)
+
+
+def _batch_size(co, *values):
+    """ number of primitives M from (M, 3) coordinates or (M,) values (1 if all are single) """
+    sizes = [len(v) for v in values if np.ndim(v) > 0]
+    if np.ndim(co) > 1:
+        sizes.append(len(co))
+    return max(sizes, default=1)
+
+
+def _circle_ring(vertices:int, phase:float=0):
+    angles = (2 * np.pi / vertices) * (np.arange(vertices) + phase)
+    return np.cos(angles), np.sin(angles)
+
+
+def ring_edges(vertices:int, num:int=1):
+    """ (num * vertices, 2) edges closing each ring of 'vertices' consecutive verts """
+    ring = np.arange(vertices, dtype=np.int32)
+    edges = np.stack((np.roll(ring, 1), ring), axis=1)
+    return (edges[None] + (np.arange(num, dtype=np.int32) * vertices)[:, None, None]).reshape(-1, 2)
+
+
+def cube_arrays(coord1, coord2, sides:list=[True]*6, flip_normals:bool=False):
+    """ arrays of (M) axis aligned cubes from back/left/bottom 'coord1' to front/right/top 'coord2'
+
+    sides are [+z, -z, +x, -x, +y, -y]; verts are in the x,y,z order [---, --+, -+-, -++, +--, +-+, ++-, +++]
+    """
+    coord1 = np.asarray(coord1, dtype=np.float64).reshape(-1, 3)
+    coord2 = np.asarray(coord2, dtype=np.float64).reshape(-1, 3)
+    corners = np.array([(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=bool)
+    coords = np.where(corners[None], coord2[:, None], coord1[:, None])
+    # faces in the order make_cube has always created them
+    side_faces = [(0, [5, 7, 3, 1]), (1, [2, 6, 4, 0]), (4, [3, 7, 6, 2]), (3, [1, 3, 2, 0]), (2, [7, 5, 4, 6]), (5, [5, 1, 0, 4])]
+    faces = np.array([f for side, f in side_faces if sides[side]], dtype=np.int32).reshape(-1, 4)
+    if flip_normals:
+        faces = faces[:, ::-1]
+    return _batch(coords, np.full(len(faces), 4), faces.ravel(), np.zeros(len(faces), dtype=bool))
+
+
+def circle_arrays(radius, vertices:int, co=(0, 0, 0), fill:bool=True, flip_normals:bool=False):
+    """ arrays of (M) circles of 'vertices' verts in the XY plane (with no faces unless 'fill') """
+    num = _batch_size(co, radius)
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (num,))
+    co = np.broadcast_to(np.asarray(co, dtype=np.float64).reshape(-1, 3), (num, 3))
+    cos, sin = _circle_ring(vertices, -0.5)
+    coords = np.empty((num, vertices, 3))
+    coords[..., 0] = radius[:, None] * cos
+    coords[..., 1] = radius[:, None] * sin
+    coords[..., 2] = 0
+    coords += co[:, None]
+    ring = np.arange(vertices, dtype=np.int32)
+    faces = [ring[::-1] if flip_normals else ring] if fill else []
+    return _batch(coords, [vertices] * len(faces), np.concatenate(faces) if faces else [], np.zeros(len(faces), dtype=bool))
+
+
+def _cylinder_topology(vertices:int, bot_face:bool, top_face:bool, flip_normals:bool):
+    """ faces of a cylinder whose verts alternate top, bottom around the circle """
+    top = np.arange(0, 2 * vertices, 2, dtype=np.int32)
+    bot = top + 1
+    # side quads as created by 'connect_circles'
+    circle1, circle2 = (top, bot) if flip_normals else (bot, top)
+    sides = np.stack((circle1, circle2, np.roll(circle2, 1), np.roll(circle1, 1)), axis=1)
+    faces = list(sides)
+    if top_face:
+        faces.append(top[::-1] if flip_normals else top)
+    if bot_face:
+        faces.append(bot if flip_normals else bot[::-1])
+    return faces, np.arange(len(faces)) < vertices
+
+
+def cylinder_arrays(radius, height, vertices:int, co=(0, 0, 0), bot_face:bool=True, top_face:bool=True, flip_normals:bool=False):
+    """ arrays of (M) cylinders along Z centered at 'co' (verts alternate top, bottom around the circle; sides are smooth) """
+    num = _batch_size(co, radius, height)
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (num,))
+    height = np.broadcast_to(np.asarray(height, dtype=np.float64), (num,))
+    co = np.broadcast_to(np.asarray(co, dtype=np.float64).reshape(-1, 3), (num, 3))
+    cos, sin = _circle_ring(vertices)
+    coords = np.empty((num, vertices, 2, 3))
+    coords[..., 0] = (radius[:, None] * cos)[..., None]
+    coords[..., 1] = (radius[:, None] * sin)[..., None]
+    coords[..., 2] = height[:, None, None] / 2 * np.array((1, -1))
+    coords = coords.reshape(num, -1, 3) + co[:, None]
+    faces, smooth = _cylinder_topology(vertices, bot_face, top_face, flip_normals)
+    return _batch(coords, [len(f) for f in faces], np.concatenate(faces), smooth)
+
+
+def tube_arrays(radius, height, thickness, vertices:int, co=(0, 0, 0), top_face:bool=True, bot_face:bool=True, top_face_inner:bool=False, bot_face_inner:bool=False, flip_normals:bool=False):
+    """ arrays of (M) tubes: inner cylinder verts, then outer cylinder verts (each alternating top, bottom) """
+    num = _batch_size(co, radius, height, thickness)
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (num,))
+    thickness = np.broadcast_to(np.asarray(thickness, dtype=np.float64), (num,))
+    inner = cylinder_arrays(radius, np.broadcast_to(height, (num,)), vertices, co, False, False, not flip_normals)[0].reshape(num, -1, 3)
+    outer = cylinder_arrays(radius + thickness, np.broadcast_to(height, (num,)), vertices, co, False, False, flip_normals)[0].reshape(num, -1, 3)
+    coords = np.concatenate((inner, outer), axis=1)
+
+    inner_faces, inner_smooth = _cylinder_topology(vertices, False, False, not flip_normals)
+    outer_faces, outer_smooth = _cylinder_topology(vertices, False, False, flip_normals)
+    outer_faces = [f + 2 * vertices for f in outer_faces]
+    faces = inner_faces + outer_faces
+    smooth = list(inner_smooth) + list(outer_smooth)
+    inner_top = np.arange(0, 2 * vertices, 2, dtype=np.int32)
+    inner_bot = inner_top[::-1] + 1
+    outer_top = inner_top + 2 * vertices
+    outer_bot = inner_bot + 2 * vertices
+    # caps between the circles as created by 'connect_circles' (smooth)
+    for create, circle1, circle2 in ((top_face, outer_top, inner_top), (bot_face, outer_bot, inner_bot)):
+        if create:
+            caps = np.stack((circle1, circle2, np.roll(circle2, 1), np.roll(circle1, 1)), axis=1)
+            faces += list(caps[:, ::-1] if flip_normals else caps)
+            smooth += [True] * vertices
+    if bot_face_inner:
+        faces.append(inner_bot)
+        smooth.append(False)
+    if top_face_inner:
+        faces.append(inner_top[::-1])
+        smooth.append(False)
+    return _batch(coords, [len(f) for f in faces], np.concatenate(faces), smooth)
@@ -17,18 +17,30 @@
 
 # System imports
 import math
+import numpy as np
 
 # Blender imports
 import bpy
-from bpy.types import Object
+from bpy.types import Mesh, Object
 import bmesh
 from bmesh.types import BMesh, BMVert, BMEdge, BMFace
 from mathutils import Vector, Matrix, Color
 from mathutils.bvhtree import BVHTree
 
 # Module imports
+from .blender import link_object, new_mesh_from_object, select
+from .maths_arrays import points_bounds, points_center
+from .mesh_arrays import join_mesh_arrays, new_mesh_from_arrays, polygon_ordered_loop_verts
+from .mesh_bridge import *
 from .python_utils import *
+from .reporting import b280
+from .transform import transform_directions
 
+# global vars
+# temporary vert layer marking the order of verts added by 'append_arrays_to_bmesh'
+append_order_layer = "append_arrays_order"
+# appends with fewer verts than this create their elements one at a time instead of through a temporary mesh
+append_arrays_bulk_min = 1000
 
 def smooth_bm_faces(faces:iter):
     """ set given bmesh faces to smooth """
@@ -44,6 +56,36 @@ def smooth_bm_faces(faces:iter):
 ###############################
 ### Topology Operators   ######
 ###############################
+def bmesh_topology(bme:BMesh):
+    """ NumPy topology arrays and CSR adjacency of bme (cached per geometry hash; indices match bme.verts/edges/faces) """
+    return mesh_topology(bme)
+
+
+def bm_indices(bme:BMesh, item_type:str, elements:iter):
+    """ index array of bmesh elements of 'item_type' ('verts', 'edges' or 'faces') """
+    getattr(bme, item_type).index_update()
+    return np.fromiter((ele.index for ele in elements), dtype=np.int64)
+
+
+def bm_elements(bme:BMesh, item_type:str, indices:iter):
+    """ bmesh elements of 'item_type' ('verts', 'edges' or 'faces') at indices """
+    seq = getattr(bme, item_type)
+    seq.ensure_lookup_table()
+    return [seq[i] for i in np.asarray(indices, dtype=np.int64).tolist()]
+
+
+def bm_mask(bme:BMesh, item_type:str, elements:iter):
+    """ boolean mask over bme.verts/edges/faces that is True for 'elements' """
+    mask = np.zeros(len(getattr(bme, item_type)), dtype=bool)
+    mask[bm_indices(bme, item_type, elements)] = True
+    return mask
+
+
+def bm_elements_from_mask(bme:BMesh, item_type:str, mask:np.ndarray):
+    """ set of bmesh elements of 'item_type' where mask is True """
+    return set(bm_elements(bme, item_type, np.flatnonzero(mask)))
+
+
 # COMPLETE
 # also known as 'face_neighbors_by_edge'/'face_neighbors_by_face' in 'cut_mesh'
 def face_neighbors(bmface:BMFace, by:str="edges", limit:set=set()):
@@ -102,53 +144,17 @@ def rightEdgeForEdgeRegardToVertex(edge:BMEdge, vertex):
 
 
 def decrease_vert_selection(bme:BMesh, selected_verts, iterations:int=1):
-    """ remove outer layer of selection
-
-    TODO, treat this as a region growing subtraction of the border
-    rather than iterate the whole selection each time.
-    """
-
-    # make a copy instead of modify in place, in case
-    # oritinal selection is important
-    sel_verts = set(selected_verts)
-
-    def is_boundary(v):
-        return not all([ed.other_vert(v) in sel_verts for ed in v.link_edges])
+    """ remove outer layer of selection ('iterations' rings, one vectorized pass per ring) """
+    topology = bmesh_topology(bme)
+    mask = shrink_mask(topology.vert_verts, bm_mask(bme, "verts", selected_verts), rings=iterations)
+    return bm_elements_from_mask(bme, "verts", mask)
 
-    for i in range(iterations):
 
-        border = [v for v in sel_verts if is_boundary(v)] #TODO...smarter way to find new border...connected to old border
-        sel_verts.difference_update(border)
-
-    return sel_verts
 def increase_vert_selection(bme:BMesh, selected_verts, iterations:int=1):
-    """ grow outer layer of selection
-
-    TODO, treat this as a region growing subtraction of the border
-    rather than iterate the whole selection each time.
-    """
-
-    # make a copy instead of modify in place, in case
-    # oritinal selection is important
-    sel_verts = set(selected_verts)
-
-    new_verts = set()
-    for v in sel_verts:
-        new_verts.update(vert_neighbors(v))
-
-    iters = 0
-    while iters < iterations and new_verts:
-        iters += 1
-        new_candidates = set()
-        for v in new_verts:
-            new_candidates.update(vert_neighbors(v))
-
-        new_verts = new_candidates - sel_verts
-
-        if new_verts:
-            sel_verts |= new_verts
-
-    return sel_verts
+    """ grow outer layer of selection ('iterations' rings, one vectorized pass per ring) """
+    topology = bmesh_topology(bme)
+    mask = grow_mask(topology.vert_verts, bm_mask(bme, "verts", selected_verts), rings=iterations)
+    return bm_elements_from_mask(bme, "verts", mask)
 
 
 # COMPLETE
@@ -163,30 +169,12 @@ def grow_selection(bme:BMesh, start_faces:set, max_iters:int=1000):
     Returns:
         set(BMFaces)
     """
-
-    total_selection = set(start_faces)
-    new_faces = set()
-    for f in start_faces:
-        new_faces.update(face_neighbors_by_vert(f))
-
-    print("there were %i start_faces" % len(start_faces))
-    print("there are %i new_faces" % len(new_faces))
-
-    iters = 0
-    while iters < max_iters and len(new_faces):
-        iters += 1
-        candidates = set()
-        for f in new_faces:
-            candidates.update(face_neighbors(f))
-
-        new_faces = candidates - total_selection
-        if new_faces:
-            total_selection |= new_faces
-
-    if iters == max_iters:
-        print("max iterations reached")
-
-    return total_selection
+    topology = bmesh_topology(bme)
+    mask = bm_mask(bme, "faces", start_faces)
+    # the first ring takes all faces sharing a vert with the selection, later rings faces sharing an edge
+    mask[topology.face_faces_by_vert.gather(np.flatnonzero(mask))] = True
+    mask = grow_mask(topology.face_faces, mask, rings=max_iters)
+    return bm_elements_from_mask(bme, "faces", mask)
 
 
 def flood_selection_by_verts(bme:BMesh, selected_faces:set, seed_face:BMFace, max_iters:int=1000):
@@ -202,24 +190,17 @@ def flood_selection_by_verts(bme:BMesh, selected_faces:set, seed_face:BMFace, ma
     Returns:
         set(BMFaces)
     """
-    total_selection = set([f for f in selected_faces])
-    levy = set([f for f in selected_faces])  #it's funny because it stops the flood :-)
-
-    new_faces = set(face_neighbors_strict(seed_face)) - levy
-    iters = 0
-    while iters < max_iters and new_faces:
-        iters += 1
-        new_candidates = set()
-        for f in new_faces:
-            new_candidates.update(face_neighbors_strict(f))
-
-        new_faces = new_candidates - total_selection
-
-        if new_faces:
-            total_selection |= new_faces
-    if iters == max_iters:
-        print("max iterations reached")
-    return total_selection
+    topology = bmesh_topology(bme)
+    levy = bm_mask(bme, "faces", selected_faces)  #it's funny because it stops the flood :-)
+    # like 'face_neighbors_strict', only cross edges between manifold verts
+    manifold_verts = np.fromiter((v.is_manifold for v in bme.verts), dtype=bool, count=len(bme.verts))
+    adjacency = topology.face_faces_through(manifold_verts[topology.edges].all(axis=1))
+    # flood from the neighbors of the seed (the seed itself is selected once the flood reaches back to it)
+    mask = np.zeros(topology.num_faces, dtype=bool)
+    mask[adjacency.gather(bm_indices(bme, "faces", [seed_face]))] = True
+    mask &= ~levy
+    mask = grow_mask(adjacency, mask, rings=max_iters, within=~levy)
+    return bm_elements_from_mask(bme, "faces", mask | levy)
 
 def flood_selection_faces(bme:BMesh, selected_faces:set, seed_face:BMFace, max_iters:int=1000, verbose:bool=True):
     """
@@ -235,26 +216,10 @@ def flood_selection_faces(bme:BMesh, selected_faces:set, seed_face:BMFace, max_i
     Returns:
         set(BMFaces)
     """
-    total_selection = set(selected_faces)
-    levy = set(selected_faces)  #it's funny because it stops the flood :-)
-
-    new_faces = set(face_neighbors(seed_face)) - levy
-    iters = 0
-    while iters < max_iters and new_faces:
-        iters += 1
-        new_candidates = set()
-        for f in new_faces:
-            new_candidates.update(face_neighbors(f))
-
-        new_faces = new_candidates - total_selection
-
-        if new_faces:
-            total_selection |= new_faces
-
-    if verbose and iters == max_iters:
-        print("max iterations reached")
-
-    return total_selection
+    topology = bmesh_topology(bme)
+    levy = bm_mask(bme, "faces", selected_faces)  #it's funny because it stops the flood :-)
+    mask = grow_mask(topology.face_faces, bm_mask(bme, "faces", [seed_face]), rings=max_iters, within=~levy)
+    return bm_elements_from_mask(bme, "faces", mask | levy)
 
 def flood_selection_edge_loop(bme:BMesh, edge_loop:set, seed_face:BMFace, max_iters:int=1000, verbose:bool=True):
     """
@@ -270,43 +235,14 @@ def flood_selection_edge_loop(bme:BMesh, edge_loop:set, seed_face:BMFace, max_it
     Returns:
         set(BMFaces)
     """
-    edge_levy = set(edge_loop)
-
-    total_selection = set()
-    total_selection.add(seed_face)
-
-    #face_levy = set()
-    #for e in edge_loop:
-    #    face_levy.update([f for f in e.link_faces])  # it's funny because it stops the flood :-)
-
-    new_faces = set(face_neighbors(seed_face, limit=edge_levy)) #- face_levy
-    iters = 0
-    while iters < max_iters and new_faces:
-        iters += 1
-        new_candidates = set()
-        for f in new_faces:
-            new_candidates.update(face_neighbors(f, limit=edge_levy))
-
-        new_faces = (new_candidates - total_selection)
-        #remove = set()
-        #for f in new_faces:
-        #    if any([e for e in f.edges if e in edge_levy]):
-        #        remove.add(f)
-
-        if new_faces:
-            total_selection |= new_faces
-            #new_faces -= face_levy
-    if iters == max_iters:
-        print("max iterations reached")
-
-
-    return total_selection
+    topology = bmesh_topology(bme)
+    edge_levy = bm_mask(bme, "edges", edge_loop)
+    mask = grow_mask(topology.face_faces_through(~edge_levy), bm_mask(bme, "faces", [seed_face]), rings=max_iters)
+    return bm_elements_from_mask(bme, "faces", mask)
 
 def grow_selection_to_find_face(bme:BMesh, start_face:BMFace, stop_face:BMFace, max_iters:int=1000, verbose:bool=True):
     """ Grows selection iterartively with neighbors until stop face is reached
 
-    contemplating indexes vs faces themselves?  will try both ways for speed
-
     Parameters:
         bme (BMesh): BMesh object
         start_face (BMFace): face to grow selection from
@@ -317,29 +253,19 @@ def grow_selection_to_find_face(bme:BMesh, start_face:BMFace, stop_face:BMFace,
     Returns:
         set(BMFaces)
     """
+    topology = bmesh_topology(bme)
+    mask = bm_mask(bme, "faces", [start_face])
+    stop_idx = bm_indices(bme, "faces", [stop_face])[0]
+    # expand only the newest ring each iteration (stops by itself once the selection stops growing)
+    for iters, ring in enumerate(mask_rings(topology.face_faces, mask), 1):
+        if mask[stop_idx]:
+            break
+        if iters == max_iters:
+            if verbose:
+                print("max iterations reached")
+            break
 
-    total_selection = set([start_face])
-    new_faces = set(face_neighbors(start_face))
-
-    if stop_face in new_faces:
-        total_selection |= new_faces
-        return total_selection
-
-    iters = 0
-    while iters < max_iters and stop_face not in new_faces:
-        iters += 1
-        candidates = set()
-        for f in new_faces:
-            candidates.update(face_neighbors(f))
-
-        new_faces = candidates - total_selection
-        if new_faces:
-            total_selection |= new_faces
-
-    if iters == max_iters:
-        print("max iterations reached")
-
-    return total_selection
+    return bm_elements_from_mask(bme, "faces", mask)
 
 def grow_to_find_mesh_end(bme:BMesh, start_face:BMFace, max_iters:int=20, verbose:bool=True):
     """ Grows selection until a non manifold face is reached.
@@ -361,86 +287,69 @@ def grow_to_find_mesh_end(bme:BMesh, start_face:BMFace, max_iters:int=20, verbos
 
     geom = {}
 
-    total_selection = set([start_face])
-    new_faces = set(face_neighbors(start_face))
-
-    def not_manifold(faces):
-        for f in faces:
-            if not all([ed.is_manifold for ed in f.edges]):
-                return f
-        return None
+    topology = bmesh_topology(bme)
+    # faces with any edge not shared by exactly two faces
+    non_manifold_edges = topology.edge_faces.counts != 2
+    non_manifold_faces = np.bincount(topology.loop_faces, weights=non_manifold_edges[topology.loop_edges], minlength=topology.num_faces) > 0
 
+    mask = bm_mask(bme, "faces", [start_face])
+    stop_face = None
     iters = 0
-    stop_face = not_manifold(new_faces)
-    if stop_face:
-        total_selection |= new_faces
-        geom["end"] = stop_face
-        geom["faces"] = total_selection
-        return geom
-
-    while new_faces and iters < max_iters and not stop_face:
+    for new_faces in mask_rings(topology.face_faces, mask):
+        stop_faces = new_faces[non_manifold_faces[new_faces]]
+        if len(stop_faces):
+            stop_face = stop_faces[0]
+            break
         iters += 1
-        candidates = set()
-        for f in new_faces:
-            candidates.update(face_neighbors(f))
-
-        new_faces = candidates - total_selection
-        if new_faces:
-            total_selection |= new_faces
-            stop_face = not_manifold(new_faces)
+        if iters > max_iters:
+            break
 
-    if iters == max_iters:
-        if verbose:
-            print("max iterations reached")
-        geom["end"] = None
-    elif not stop_face:
+    if stop_face is not None:
+        geom["end"] = bm_elements(bme, "faces", [stop_face])[0]
+    else:
         if verbose:
-            print("completely manifold mesh")
+            print("max iterations reached" if iters > max_iters else "completely manifold mesh")
         geom["end"] = None
-    else:
-        geom["end"] = stop_face
 
-    geom["faces"] = total_selection
+    geom["faces"] = bm_elements_from_mask(bme, "faces", mask)
     return geom
 
-# COMPLETE. TODO: support 'edges' item_type
-def bmesh_loose_parts(bme:BMesh, item_type:str="faces", selected:set=None, max_iters:int=100, verbose=False):
+def bmesh_loose_parts(bme:BMesh, item_type:str="faces", selected:set=None, max_iters:int=None, verbose=False):
     """ Gets list of loose parts in bmesh
 
     Parameters:
         bme (BMesh): BMesh object
         item_type (str): string in ['faces', 'edges', 'verts'] for type of item on islands to be returned
-        selected (set, list, None): selected BMFaces/BMEdges/BMVerts (must match item_type)
-        max_iters (int): maximum number of loose parts to be found
+        selected (set, list, None): selected BMFaces/BMEdges/BMVerts (must match item_type); islands are
+                                    connected through selected items only
+        max_iters (int, None): maximum number of loose parts to be returned (no limit if None)
 
     Returns:
-        list of islands (lists) of BMFaces/BMVerts
+        list of islands (sets) of BMFaces/BMEdges/BMVerts
     """
     assert item_type in ("faces", "edges", "verts")
 
-    # get set of total faces/edges/verts
-    if selected is None or len(selected) == 0:
-        total_items = set(getattr(bme, item_type)[:])
-    else:
-        total_items = set(selected)  # don't want to modify initial set
-
-    islands = []
-    iters = 0
-    while len(total_items) and iters < max_iters:
-        iters += 1
-        seed = total_items.pop()
-
-        if item_type == "faces":
-            island = flood_selection_faces(bme, {}, seed, max_iters=10000, verbose=verbose)
-        elif item_type == "edges":
-            raise Exception("Edges not yet supported by bmesh_loose_parts function")
-        elif item_type == "verts":
-            island = flood_island_within_selected_verts(bme, total_items, seed, max_iters=10000, verbose=verbose)
+    topology = bmesh_topology(bme)
+    seq = getattr(bme, item_type)
+    mask = None
+    if selected is not None and len(selected) > 0:
+        mask = np.zeros(len(seq), dtype=bool)
+        mask[bm_indices(bme, item_type, selected)] = True
+    labels = topology.loose_parts(item_type, mask)
+
+    # group element indices by label
+    idxs = np.flatnonzero(labels >= 0)
+    idxs = idxs[np.argsort(labels[idxs], kind="stable")]
+    counts = np.bincount(labels[idxs])
+    groups = np.split(idxs, np.cumsum(counts)[:-1]) if len(idxs) else []
+    if max_iters is not None:
+        groups = groups[:max_iters]
+    if verbose:
+        print("found %i loose parts" % len(groups))
 
-        islands.append(island)
-        total_items.difference_update(island)
+    seq.ensure_lookup_table()
+    return [set(seq[i] for i in group.tolist()) for group in groups]
 
-    return islands
 
 def walk_non_man_edge(bme:BMesh, start_edge:BMEdge, stop:set, max_iters:int=5000):
     """
@@ -460,30 +369,28 @@ def walk_non_man_edge(bme:BMesh, start_edge:BMEdge, stop:set, max_iters:int=5000
     #  found starting edge (completed loop)
     #  found vert with 2 other non manifold edges
 
-    def next_pair(prev_ed, prev_vert):
-        v_next = prev_ed.other_vert(prev_vert)
-        eds = [e for e in v_next.link_edges if not e.is_manifold and e != prev_ed]
-        print(eds)
-        if len(eds):
-            return eds[0], v_next
-        else:
-            return None, None
-
+    topology = bmesh_topology(bme)
+    non_man = np.flatnonzero(topology.edge_faces.counts != 2)
+    vert_chains, edge_chains, closed = order_edge_chains(topology.edges[non_man], non_man)
+    start = int(bm_indices(bme, "edges", [start_edge])[0])
+    chain_idx = next((i for i, chain in enumerate(edge_chains) if start in chain), None)
+    if chain_idx is None:
+        return [[], []]
+    eds, vs, is_closed = edge_chains[chain_idx], vert_chains[chain_idx], closed[chain_idx]
+    pos = eds.index(start)
+    # walk away from the start edge through either of its verts
+    walks = [(eds[pos + 1:] + (eds[:pos] if is_closed else []), vs[pos + 1:] + (vs[1:pos + 1] if is_closed else [])),
+             ((eds[:pos][::-1] + (eds[pos + 1:][::-1] if is_closed else [])), (vs[:pos + 1][::-1] + (vs[pos + 1:-1][::-1] if is_closed else [])))]
     chains = []
-    for v in start_edge.verts:
+    for walk_eds, walk_vs in walks:
         edge_loop = []
-        prev_v = start_edge.other_vert(v)
-        prev_ed = start_edge
-        next_ed, next_v = next_pair(prev_ed, prev_v)
-        edge_loop += [next_ed]
-        iters = 0
-        while next_ed and next_v and not (next_ed in stop or next_v in stop) and iters < max_iters:
-            iters += 1
-
-            next_ed, next_v = next_pair(next_ed, next_v)
-            if next_ed:
-                edge_loop += [next_ed]
-
+        walk_eds = walk_eds[:max_iters + 1]
+        for ed, v in zip(bm_elements(bme, "edges", walk_eds), bm_elements(bme, "verts", walk_vs[:len(walk_eds)])):
+            if v in stop:
+                break
+            edge_loop.append(ed)
+            if ed in stop:
+                break
         chains += [edge_loop]
 
     return chains
@@ -505,33 +412,13 @@ def flood_island_within_selected_verts(bme:BMesh, selected_verts:set, seed_eleme
         set of verticies
     """
 
-    selected_verts = set(selected_verts)
-
-    flood_selection = set()
-    flood_selection.add(seed_element)
-    new_verts = set([v for v in vert_neighbors(seed_element) if v in selected_verts])
-
+    topology = bmesh_topology(bme)
+    seed_verts = seed_element.verts if type(seed_element) is BMFace else [seed_element]
+    mask = grow_mask(topology.vert_verts, bm_mask(bme, "verts", seed_verts), rings=max_iters, within=bm_mask(bme, "verts", selected_verts))
     if verbose:
-        print("there are %i new_verts at first iteration" % len(new_verts))
-    iters = 0
-    while iters < max_iters and new_verts:
-        iters += 1
-        new_candidates = set()
-        for v in new_verts:
-            new_candidates.update(vert_neighbors(v))
-
-        new_verts = new_candidates & selected_verts
-        if verbose:
-            print("at iteration %i there are %i new_verts" % (iters, len(new_verts)))
-
-        if new_verts:
-            flood_selection |= new_verts
-            selected_verts -= new_verts
-
-    if verbose and iters == max_iters:
-        print("max iterations reached")
+        print("flooded %i verts" % mask.sum())
 
-    return flood_selection
+    return bm_elements_from_mask(bme, "verts", mask)
 
 # segmentation only
 def flood_selection_vertex_perimeter(bme:BMesh, perimeter_verts:set, seed_element, max_iters:int=10000):
@@ -548,34 +435,12 @@ def flood_selection_vertex_perimeter(bme:BMesh, perimeter_verts:set, seed_elemen
         set of verticies
     """
 
-    flood_selection = set()
-    if type(seed_element) is BMVert:
-        flood_selection.add(seed_element)
-        new_verts = set(vert_neighbors(seed_element)) - perimeter_verts
+    topology = bmesh_topology(bme)
+    perimeter = bm_mask(bme, "verts", perimeter_verts)
+    seed_verts = seed_element.verts if type(seed_element) is BMFace else [seed_element]
+    mask = grow_mask(topology.vert_verts, bm_mask(bme, "verts", seed_verts), rings=max_iters, within=~perimeter)
 
-    elif type(seed_element) is BMFace:
-        flood_selection.update(seed_element.verts[:])
-        for v in seed_element.verts:
-            new_verts = set(vert_neighbors(v)) - perimeter_verts
-
-    flood_selection |= perimeter_verts
-
-    iters = 0
-    while iters < max_iters and new_verts:
-        iters += 1
-        new_candidates = set()
-        for v in new_verts:
-            new_candidates.update(vert_neighbors(v))
-
-        new_verts = new_candidates - flood_selection
-
-        if new_verts:
-            flood_selection |= new_verts
-
-    if iters == max_iters:
-        print("max iterations reached")
-
-    return flood_selection
+    return bm_elements_from_mask(bme, "verts", mask | perimeter)
 
 # segmentation only
 def partition_faces_between_edge_boundaries(bme:BMesh, input_faces:set, boundary_edges:set, max_iters:int=1000):
@@ -591,22 +456,45 @@ def partition_faces_between_edge_boundaries(bme:BMesh, input_faces:set, boundary
         list of islands (lists) of BMFaces
     """
 
-    if len(input_faces) == 0:
-        input_faces = set(bme.faces[:])
+    topology = bmesh_topology(bme)
+    labels = topology.face_parts_between_edges(~bm_mask(bme, "edges", boundary_edges))
+    # keep the islands containing any input face
+    input_mask = bm_mask(bme, "faces", input_faces) if len(input_faces) else np.ones(topology.num_faces, dtype=bool)
+    island_labels = np.unique(labels[input_mask])[:max_iters]
 
-    iters = 0
-    islands = []
-    while len(input_faces) and iters < max_iters:
-        iters += 1
+    return [bm_elements_from_mask(bme, "faces", labels == label) for label in island_labels.tolist()]
 
-        seed_face = input_faces.pop()
-        island = flood_selection_edge_loop(bme, boundary_edges, seed_face, max_iters=10000)
 
-        input_faces.difference_update(island)
+def bmesh_geodesic_distances(bme:BMesh, source_verts:set, max_distance:float=None):
+    """ distance along edges from the nearest of 'source_verts' to every vert (indexed like bme.verts, inf where unreached)
 
-        islands += [island]
+    Parameters:
+        bme (BMesh): BMesh object
+        source_verts (list, set): BMVerts to measure distances from
+        max_distance (float, None): stop measuring past this distance
+
+    Returns:
+        np.ndarray of float distances
+    """
+    topology = bmesh_topology(bme)
+    return topology.geodesic_distances(bm_indices(bme, "verts", source_verts), max_distance=max_distance)
+
+
+def select_within_distance(bme:BMesh, source_verts:set, distance:float, item_type:str="verts"):
+    """ BMVerts (or BMEdges/BMFaces with all of their verts) within geodesic 'distance' of 'source_verts'
 
-    return islands
+    Parameters:
+        bme (BMesh): BMesh object
+        source_verts (list, set): BMVerts to grow selection from
+        distance (float): maximum distance along edges from the source verts
+        item_type (str): string in ['faces', 'edges', 'verts'] for type of items to be returned
+
+    Returns:
+        set of BMVerts/BMEdges/BMFaces
+    """
+    topology = bmesh_topology(bme)
+    distances = topology.geodesic_distances(bm_indices(bme, "verts", source_verts), max_distance=distance)
+    return bm_elements_from_mask(bme, item_type, topology.distance_region(distances, distance, item_type))
 
 
 def edge_loops_from_bmedges(bme:BMesh, bm_edges:list, ret:dict={"VERTS"}):
@@ -618,74 +506,26 @@ def edge_loops_from_bmedges(bme:BMesh, bm_edges:list, ret:dict={"VERTS"}):
 
     Returns:
         geom_dict: a dictionary with keys 'VERTS' 'EDGES' containing lists of the corresponding data
+                   and key 'CLOSED' with a bool per loop
 
                    geom_dict['VERTS'] =   [ [1, 6, 7, 2], ...]
 
                    closed loops have matching start and end vert indices
                    closed loops will not have duplicate edge indices
 
-    Notes:  This method is not "smart" in any way, and does not leverage BMesh
-    connectivity data.  Therefore it could iterate  len(bm_edges)! (factorial) times
-    There are better methods to use if your bm_edges are already in order  This is mostly
-    used to sort non_man_edges = [ed.index for ed in bmesh.edges if not ed.is_manifold]
-    There will be better methods regardless that utilize walking some day....
+    Notes:  Edges are walked once through a vert->edge adjacency (see 'order_edge_chains'),
+    so loops are split at branching verts (verts with more than two of the given edges).
+    This is mostly used to sort non_man_edges = [ed.index for ed in bme.edges if not ed.is_manifold]
     """
-    geom_dict = dict()
-    geom_dict["VERTS"] = []
-    geom_dict["EDGES"] = []
-    edges = bm_edges.copy()
-
-    while edges:
-        current_edge = bmesh.edges[edges.pop()]
-
-        vert_e, vert_st = current_edge.verts[:]
-        vert_end, vert_start = vert_e.index, vert_st.index
-        line_poly = [vert_start, vert_end]
-        ed_loop = [current_edge.index]
-        ok = True
-        while ok:
-            ok = False
-            # for i, ed in enumerate(edges):
-            i = len(edges)
-            while i:
-                i -= 1
-                ed = bmesh.edges[edges[i]]
-                v_1, v_2 = ed.verts
-                v1, v2 = v_1.index, v_2.index
-                if v1 == vert_end:
-                    line_poly.append(v2)
-                    ed_loop.append(ed.index)
-                    vert_end = line_poly[-1]
-                    ok = 1
-                    del edges[i]
-                    # break
-                elif v2 == vert_end:
-                    line_poly.append(v1)
-                    ed_loop.append(ed.index)
-                    vert_end = line_poly[-1]
-                    ok = 1
-                    del edges[i]
-                    # break
-                elif v1 == vert_start:
-                    line_poly.insert(0, v2)
-                    ed_loop.insert(0, ed.index)
-                    vert_start = line_poly[0]
-                    ok = 1
-                    del edges[i]
-                    # break
-                elif v2 == vert_start:
-                    line_poly.insert(0, v1)
-                    ed_loop.insert(0, ed.index)
-                    vert_start = line_poly[0]
-                    ok = 1
-                    del edges[i]
-                    # break
+    bme.verts.index_update()
+    bme.edges.ensure_lookup_table()
+    edge_verts = [(v0.index, v1.index) for v0, v1 in (bme.edges[i].verts for i in bm_edges)]
+    vert_chains, edge_chains, closed = order_edge_chains(edge_verts, bm_edges)
 
-        if "VERTS" in ret:
-            geom_dict["VERTS"] += [line_poly]
-        if "EDGES" in ret:
-            print("adding edge loop to dict")
-            geom_dict["EDGES"] += [ed_loop]
+    geom_dict = dict()
+    geom_dict["VERTS"] = vert_chains if "VERTS" in ret else []
+    geom_dict["EDGES"] = edge_chains if "EDGES" in ret else []
+    geom_dict["CLOSED"] = closed
 
     return geom_dict
 
@@ -758,8 +598,13 @@ def face_region_boundary_loops(bme:BMesh, sel_faces:list):
     Returns:
         [face indices], [ed indices]
     """
-    face_set = set(sel_faces)
-    edges_raw = [ed.index for ed in bme.edges if ed.select and len([f.index for f in ed.link_faces if f.index in face_set]) == 1]
+    topology = bmesh_topology(bme)
+    face_mask = np.zeros(topology.num_faces, dtype=bool)
+    face_mask[np.asarray(list(sel_faces), dtype=np.int64)] = True
+    # selected edges used by exactly one face of the region
+    region_counts = np.bincount(topology.loop_edges, weights=face_mask[topology.loop_faces], minlength=topology.num_edges)
+    selected = np.fromiter((ed.select for ed in bme.edges), dtype=bool, count=len(bme.edges))
+    edges_raw = np.flatnonzero(selected & (region_counts == 1)).tolist()
 
     geom_dict = edge_loops_from_bmedges(bme, edges_raw, ret={"VERTS", "EDGES"})
 
@@ -775,94 +620,32 @@ def find_face_loop(bme:BMesh, edge:BMEdge, select:bool=False):
         select (bool): select faces and edges as we go
 
     Returns:
-        [face indices], [ed indices]
+        [face indices], [ed indices] ([] if edge has no faces)
     """
     #reality check
-    if not len(ed.link_faces): return []
-
-    def ed_to_vect(ed):
-        vect = ed.verts[1].co - ed.verts[0].co
-        vect.normalize()
-        return vect
-
-    def next_edge(cur_face, cur_ed):
-        ledges = [ed for ed in cur_face.edges]
-        n = ledges.index(cur_ed)
-        j = (n+2) % 4
-        return cur_face.edges[j]
-
-    def next_face(cur_face, edge):
-        if len(edge.link_faces) == 1: return None
-        next_face = [f for f in edge.link_faces if f != cur_face][0]
-        return next_face
-
-    loop_eds = []
-    loop_faces = []
-    loop_revs = []
-
-    for f in ed.link_faces:
-        if len(f.edges) != 4: continue
-        eds = [ed.index]
-        fs = [f.index]
-        revs = [False]
-
-        f_next = True
-        f_cur = f
-        ed_cur = ed
-        while f_next != f:
-            if select:
-                f_cur.select_set(True)
-                ed_cur.select_set(True)
-
-            ed_next = next_edge(f_cur, ed_cur)
-            eds += [ed_next.index]
-
-            parallel = ed_to_vect(ed_next).dot(ed_to_vect(ed_cur)) > 0
-            prev_rev = revs[-1]
-            rever = parallel == prev_rev
-            revs += [rever]
-
-            f_next = next_face(f_cur, ed_next)
-            if not f_next: break
-
-            fs += [f_next.index]
-            if len(f_next.verts) != 4:
-                break
-
-            ed_cur = ed_next
-            f_cur = f_next
-
-        #if we looped
-        if f_next == f:
-
-            face_loop_fs = fs
-            face_loop_eds = eds[:len(eds)-1]
-
-            return face_loop_fs, face_loop_eds
-        else:
-            if len(fs):
-                loop_faces.append(fs)
-                loop_eds.append(eds)
-                loop_revs.append(revs)
+    if not len(edge.link_faces): return []
+    return find_face_loops(bme, [edge], select=select)[0]
 
-    if len(loop_faces) == 2:
-        loop_faces[0].reverse()
-        face_loop_fs = loop_faces[0] +  loop_faces[1]
-        tip = loop_eds[0][1:]
-        tip.reverse()
-        face_loop_eds = tip + loop_eds[1]
-        rev_tip = loop_revs[0][1:]
-        rev_tip.reverse()
 
+def find_face_loops(bme:BMesh, edges:list, select:bool=False):
+    """ face loops (and the edge rings they cross) through many bmedges, walked all at once
 
-    elif len(loop_faces) == 1:
-        face_loop_fs = loop_faces[0]
-        face_loop_eds = loop_eds[0]
-
-    else:
-        face_loop_fs, face_loop_eds = [], []
+    Parameters:
+        bme (BMesh): BMesh object
+        edges (list): edges to start from
+        select (bool): select faces and edges of the loops
 
-    return  face_loop_fs, face_loop_eds
+    Returns:
+        list of ([face indices], [ed indices]), one per edge
+    """
+    topology = bmesh_topology(bme)
+    face_loops, edge_rings, _ = topology.quad_face_loops(bm_indices(bme, "edges", edges))
+    if select:
+        for f in bm_elements(bme, "faces", np.concatenate(face_loops) if face_loops else []):
+            f.select_set(True)
+        for ed in bm_elements(bme, "edges", np.concatenate(edge_rings) if edge_rings else []):
+            ed.select_set(True)
+    return [(fs.tolist(), eds.tolist()) for fs, eds in zip(face_loops, edge_rings)]
 
 
 def edge_loop_neighbors(bme:BMesh, edge_loop:list, strict:bool=False, trim_tails:bool=True, expansion:str="EDGES", quad_only:bool=True):
@@ -951,9 +734,7 @@ def edge_loop_neighbors(bme:BMesh, edge_loop:list, strict:bool=False, trim_tails
 
         #get the face loops, a little differently, just walk from 2 perpendicular edges
 
-        for ed in v1.link_edges:
-            if ed.index not in perp_eds: continue
-            f_inds, _e_inds = find_face_loop(bme, ed, select=False)
+        for f_inds, _e_inds in find_face_loops(bme, [ed for ed in v1.link_edges if ed.index in perp_eds]):
             #print(f_inds)
             #keep only the part of face loop direclty next door
             if strict:
@@ -989,147 +770,111 @@ def edge_loop_neighbors(bme:BMesh, edge_loop:list, strict:bool=False, trim_tails
 # BMESH CREATION FUNCTIONS           #
 ######################################
 
-def join_bmesh(source, target, src_trg_map, src_mx=None, trg_mx=None):
-    """
+def bmesh_arrays(bme:BMesh, matrix:Matrix=None):
+    """ flat (coords, loop_totals, loop_verts) arrays of bme geometry, transformed by 'matrix' if given
 
+    always read fresh from bme (no adjacency is needed, so the topology cache is bypassed)
     """
-    L = len(target.verts)
-    print("Target has %i verts" % L)
-
-    print("Source has %i verts" % len(source.verts))
-    l = len(src_trg_map)
-    print("is the src_trg_map being sticky...%i" % l)
-    if not src_mx:
-        src_mx = Matrix.Identity(4)
-
-    if not trg_mx:
-        trg_mx = Matrix.Identity(4)
-        i_trg_mx = Matrix.Identity(4)
-    else:
-        i_trg_mx = trg_mx.inverted()
-
-
-
-    new_bmverts = []
-
-    source.verts.ensure_lookup_table()
-
-    for v in source.verts:
-        if v.index not in src_trg_map:
-            new_ind = len(target.verts)
-            new_bv = target.verts.new(i_trg_mx * src_mx * v.co)
-            new_bmverts.append(new_bv)
-            # new_bv.index = new_ind
-            src_trg_map[v.index] = new_ind
-
-    # new_bmverts = [target.verts.new(i_trg_mx * src_mx * v.co) for v in source.verts]# if v.index not in src_trg_map]
-
-    # def src_to_trg_ind(v):
-    #    subbed = False
-    #    if v.index in src_trg_map:
-    #
-    #       new_ind = src_trg_map[v.index]
-    #        subbed = True
-    #    else:
-    #        new_ind = v.index + L  #TODO, this takes the actual versts from sources, these verts are in target
-    #
-    #    return new_ind, subbed
-
-    # new_bmfaces = [target.faces.new(tuple(new_bmverts[v.index] for v in face.verts)) for face in source.faces]
-    target.verts.index_update()
-    # target.verts.sort()  # does this still work?
-    target.verts.ensure_lookup_table()
-    # print("new faces")
-    # for f in source.faces:
-        # print(tuple(src_to_trg_ind(v) for v in f.verts))
-
-    # subbed = set()
-    new_bmfaces = []
-    for f in source.faces:
-        v_inds = []
-        for v in f.verts:
-            new_ind = src_trg_map[v.index]
-            v_inds.append(new_ind)
-
-        new_bmfaces += [target.faces.new(tuple(target.verts[i] for i in v_inds))]
-
-    # new_bmfaces = [target.faces.new(tuple(target.verts[src_to_trg_ind(v)] for v in face.verts)) for face in source.faces]
-    target.faces.ensure_lookup_table()
-    target.verts.ensure_lookup_table()
-    target.verts.index_update()
+    topology = MeshTopology.from_bmesh(bme)
+    coords = topology.coords
+    if matrix is not None:
+        mx = np.array(matrix, dtype=np.float64)
+        coords = coords @ mx[:3, :3].T + mx[:3, 3]
+    loop_verts = polygon_ordered_loop_verts(topology.loop_starts, topology.loop_totals, topology.loop_verts)
+    return coords, topology.loop_totals, loop_verts
 
-    # throw away the loose verts...not very elegant with edges and what not
-    # n_removed = 0
-    # for vert in new_bmverts:
-    #    if (vert.index - L) in src_trg_map: #these are verts that are not needed
-    #        target.verts.remove(vert)
-    #        n_removed += 1
 
-    # bmesh_delete(target, verts=del_verts)
+def append_arrays_to_bmesh(bme:BMesh, coords:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray, edges:np.ndarray=None, smooth:np.ndarray=None):
+    """ add flat vertex/polygon arrays to bme and return the new BMVerts (in the order of 'coords')
 
-    target.verts.index_update()
-    target.verts.ensure_lookup_table()
-    target.faces.ensure_lookup_table()
-
-    new_L = len(target.verts)
+    small appends create their elements directly; larger ones go through a temporary mesh and 'from_mesh'
+    (needs write access to bpy.data). New elements usually follow the existing ones in bme.verts, but bmesh
+    reuses the slots of removed elements, so bulk-added verts are checked against a temporary order layer
+    """
+    if len(coords) < append_arrays_bulk_min:
+        return append_elements_to_bmesh(bme, coords, loop_totals, loop_verts, edges, smooth)
+    mesh = new_mesh_from_arrays("join_bmesh_tmp", coords, loop_totals, loop_verts, edges, smooth)
+    num_new = len(mesh.vertices)
+    try:
+        # existing verts get 0 in the new layer, new verts their (1-based) position in 'coords'
+        order = mesh.attributes.new(append_order_layer, "INT", "POINT")
+        order.data.foreach_set("value", np.arange(1, num_new + 1, dtype=np.int32))
+        bme.verts.layers.int.new(append_order_layer)
+        # from_mesh adds to the existing bmesh geometry
+        bme.from_mesh(mesh)
+    finally:
+        bpy.data.meshes.remove(mesh)
+    bme.verts.ensure_lookup_table()
+    layer = bme.verts.layers.int[append_order_layer]
+    new_verts = bme.verts[len(bme.verts) - num_new:]
+    if any(v[layer] != i + 1 for i, v in enumerate(new_verts)):
+        new_verts = sorted((v for v in bme.verts if v[layer] > 0), key=lambda v: v[layer])
+    bme.verts.layers.int.remove(layer)
+    return new_verts
+
+
+def append_elements_to_bmesh(bme:BMesh, coords:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray, edges:np.ndarray=None, smooth:np.ndarray=None):
+    """ add flat vertex/polygon arrays to bme one element at a time (see 'append_arrays_to_bmesh') """
+    verts = [bme.verts.new(co) for co in np.asarray(coords, dtype=np.float64).reshape(-1, 3).tolist()]
+    loop_verts = np.asarray(loop_verts).tolist()
+    smooth = [False] * len(loop_totals) if smooth is None else np.asarray(smooth, dtype=bool).tolist()
+    start = 0
+    for total, use_smooth in zip(np.asarray(loop_totals).tolist(), smooth):
+        f = bme.faces.new([verts[i] for i in loop_verts[start:start + total]])
+        f.smooth = use_smooth
+        start += total
+    # loose edges (edges of the new faces already exist)
+    if edges is not None:
+        for i, j in np.asarray(edges).reshape(-1, 2).tolist():
+            if bme.edges.get((verts[i], verts[j])) is None:
+                bme.edges.new((verts[i], verts[j]))
+    return verts
 
-    if src_trg_map:
-        if new_L != L + len(source.verts) -l:
-            print("seems some verts were left in that should not have been")
 
-    del src_trg_map
+def join_bmesh(source, target, src_trg_map, src_mx=None, trg_mx=None):
+    """ add source geometry to target, welding source verts in src_trg_map onto existing target verts
 
-def join_bmesh2(source, target, src_mx=None, trg_mx=None):
+    Parameters:
+        source (BMesh): BMesh object source
+        target (BMesh): BMesh object target
+        src_trg_map (dict): source vert index -> target vert index; filled in with the new target
+                            index of every other source vert
+        src_mx (Matrix): matrix of the source BMesh object
+        trg_mx (Matrix): matrix of the target BMesh object
 
-    src_trg_map = dict()
+    Returns:
+        None
+    """
     L = len(target.verts)
-    if not src_mx:
-        src_mx = Matrix.Identity(4)
-
-    if not trg_mx:
-        trg_mx = Matrix.Identity(4)
-        i_trg_mx = Matrix.Identity(4)
-    else:
-        i_trg_mx = trg_mx.inverted()
-
-
-    new_bmverts = []
-    source.verts.ensure_lookup_table()
-
-    for v in source.verts:
-        if v.index not in src_trg_map:
-            new_ind = len(target.verts)
-            new_bv = target.verts.new(i_trg_mx * src_mx * v.co)
-            new_bmverts.append(new_bv)
-            src_trg_map[v.index] = new_ind
-
-
-    target.verts.index_update()
-    target.verts.ensure_lookup_table()
-
-    new_bmfaces = []
-    for f in source.faces:
-        v_inds = []
-        for v in f.verts:
-            new_ind = src_trg_map[v.index]
-            v_inds.append(new_ind)
-
-        new_bmfaces += [target.faces.new(tuple(target.verts[i] for i in v_inds))]
-
-    target.faces.ensure_lookup_table()
+    # one matrix for all source coords
+    mx = np.identity(4) if src_mx is None else np.array(src_mx, dtype=np.float64)
+    if trg_mx is not None:
+        mx = np.linalg.inv(np.array(trg_mx, dtype=np.float64)) @ mx
+    coords, loop_totals, loop_verts = bmesh_arrays(source, mx)
+    # hold on to the weld targets before appending can renumber the target verts
     target.verts.ensure_lookup_table()
-    target.verts.index_update()
-
-
+    mapped_src = [i for i in src_trg_map if 0 <= i < len(coords)]
+    weld_targets = [target.verts[src_trg_map[i]] for i in mapped_src]
+    new_verts = append_arrays_to_bmesh(target, coords, loop_totals, loop_verts)
+
+    mapped = np.zeros(len(coords), dtype=bool)
+    mapped[mapped_src] = True
+    if mapped_src:
+        bmesh.ops.weld_verts(target, targetmap=dict(zip((new_verts[i] for i in mapped_src), weld_targets)))
     target.verts.index_update()
     target.verts.ensure_lookup_table()
     target.faces.ensure_lookup_table()
+    # report where the new (unwelded) verts ended up
+    unmapped = np.flatnonzero(~mapped)
+    src_trg_map.update((i, new_verts[i].index) for i in unmapped.tolist())
 
-    new_L = len(target.verts)
+    if len(target.verts) != L + len(unmapped):
+        print("seems some verts were left in that should not have been")
 
 
-    if new_L != L + len(source.verts):
-        print("seems some verts were left out")
+def join_bmesh2(source, target, src_mx=None, trg_mx=None):
+    """ add source geometry (in src_mx space) to target (in trg_mx space) """
+    join_bmesh(source, target, dict(), src_mx, trg_mx)
 
 
 def new_bmesh_from_bmelements(geom):
@@ -1185,7 +930,7 @@ def new_bmesh_from_bmelements(geom):
 
 def join_objects(obs, name:str=""):
     """
-    uses BMesh to join objects.  Advantage is that it is context
+    joins objects by concatenating their mesh arrays.  Advantage is that it is context
     agnostic, so no editmode or bpy.ops has to be used.
 
     Parameters:
@@ -1196,31 +941,28 @@ def join_objects(obs, name:str=""):
         new object with name specified.  Otherwise '_joined' will
         be added to the name of the first object in the list
     """
-    target_bme = bmesh.new()
-    trg_mx = obs[0].matrix_world
+    trg_mx = obs[0].matrix_world.copy()
     name = name or obs[0].name + "_joined"
 
+    meshes, temp_meshes = [], []
     for ob in obs:
-        src_mx = ob.matrix_world
-
-        if ob.data.is_editmode:
-            src_bme = bmesh.from_editmesh(ob.data)
+        if ob.type == "MESH" and ob.data.is_editmode:
+            ob.update_from_editmode()
+        if ob.type == "MESH" and len(ob.modifiers) == 0:
+            meshes.append(ob.data)
         else:
-            src_bme = bmesh.new()
-            if ob.type == "MESH":
-                src_bme.from_object(ob, bpy.context.scene)
-            else:
-                me = ob.to_mesh(bpy.context.scene, apply_modifiers=True, settings="PREVIEW")
-                src_bme.from_mesh(me)
-                bpy.data.meshes.remove(me)
-        join_bmesh(src_bme, target_bme, src_mx, trg_mx)
-        src_bme.free()
-
-    new_me = bpy.data.meshes.new(name)
+            m = new_mesh_from_object(ob)
+            temp_meshes.append(m)
+            meshes.append(m)
+    try:
+        coords, loop_totals, loop_verts = join_mesh_arrays(obs, matrix=trg_mx, meshes=meshes)
+    finally:
+        for m in temp_meshes:
+            bpy.data.meshes.remove(m)
+
+    new_me = new_mesh_from_arrays(name, coords, loop_totals, loop_verts)
     new_ob = bpy.data.objects.new(name, new_me)
     new_ob.matrix_world = trg_mx
-    target_bme.to_mesh(new_me)
-    target_bme.free()
     return new_ob
 
 def join_bmesh_map(source:BMesh, target:BMesh, src_trg_map:set=None, src_mx:Matrix=None, trg_mx:Matrix=None):
@@ -1316,72 +1058,63 @@ def bmesh_ops_delete(bme:BMesh, geom:list, context:str="VERTS"):
     Returns:
         None
     """
+    verts = [item for item in geom if isinstance(item, BMVert)]
+    edges = [item for item in geom if isinstance(item, BMEdge)]
+    faces = [item for item in geom if isinstance(item, BMFace)]
+    # these contexts remove the given elements only (and whatever uses them)
+    given = {"VERTS": verts, "FACES_ONLY": faces, "EDGES_FACES": edges, "TAGGED_ONLY": faces + edges + verts}
+    if context in given:
+        geom = given[context]
+    else:
+        # leftover edges and verts are found from reference counts on the mesh topology
+        topology = bmesh_topology(bme)
+        verts, edges, faces = delete_masks(topology, bm_mask(bme, "verts", verts), bm_mask(bme, "edges", edges), bm_mask(bme, "faces", faces), context)
+        geom = bm_elements(bme, "faces", np.flatnonzero(faces)) + bm_elements(bme, "edges", np.flatnonzero(edges)) + bm_elements(bme, "verts", np.flatnonzero(verts))
 
-    verts = set()
-    edges = set()
-    faces = set()
+    # remove everything in one op (removing an element also removes the elements using it)
+    if geom:
+        bmesh.ops.delete(bme, geom=geom, context="TAGGED_ONLY")
 
-    for item in geom:
-        if type(item) is BMVert:
-            verts.add(item)
-        elif type(item) is BMEdge:
-            edges.add(item)
-        elif type(item) is BMFace:
-            faces.add(item)
 
-    # Remove geometry
-    if context == "VERTS":
-        for v in verts:
-            bme.verts.remove(v)
+def delete_masks(topology:MeshTopology, verts:np.ndarray, edges:np.ndarray, faces:np.ndarray, context:str="VERTS"):
+    """ masks of the verts, edges and faces 'bmesh_ops_delete' removes for the input masks and context
 
-    elif context == "EDGES":
-        all_verts = set()
-        for e in edges:
-            all_verts |= set(e.verts)
-            bme.edges.remove(e)
-        for v in all_verts:
-            if len(v.link_edges) == 0:
-                bme.verts.remove(v)
+    elements whose removal is implied by a removed vert or edge are not included
+    """
+    no_verts = np.zeros(topology.num_verts, dtype=bool)
+    no_edges = np.zeros(topology.num_edges, dtype=bool)
+    no_faces = np.zeros(topology.num_faces, dtype=bool)
 
-    elif context == "FACES_ONLY":
-        for f in faces:
-            bme.faces.remove(f)
+    def verts_left_without_edges(touched, removed_edges):
+        # reference count of remaining edges per vert
+        remaining = np.bincount(topology.edges.ravel(), weights=np.repeat(~removed_edges, 2), minlength=topology.num_verts)
+        return touched & (remaining == 0)
 
+    if context == "VERTS":
+        return verts, no_edges, no_faces
+    elif context == "EDGES":
+        touched = np.zeros(topology.num_verts, dtype=bool)
+        touched[topology.edges[edges].ravel()] = True
+        return verts_left_without_edges(touched, edges), edges, no_faces
+    elif context == "FACES_ONLY":
+        return no_verts, no_edges, faces
     elif context == "EDGES_FACES":
-        remove_faces = set()
-        for e in edges:
-            remove_faces |= set(e.link_faces)
-            bme.edges.remove(e)
-        for f in remove_faces:
-            if f.is_valid: bme.faces.remove(f)
-
+        return no_verts, edges, no_faces
     elif context.startswith("FACES"):
-        all_edges = set()
-        remove_edges = set()
-        all_verts = set()
-        for f in faces:
-            remove_edges |= all_edges.intersection(set(f.edges))
-            all_edges |= set(f.edges)
-            all_verts |= set(f.verts)
-            bme.faces.remove(f)
+        # reference count of removed and of all faces per edge
+        removed_faces = np.bincount(topology.loop_edges, weights=faces[topology.loop_faces], minlength=topology.num_edges)
         if context == "FACES":
-            all_edges = all_edges - remove_edges
-            for e in all_edges:
-                if len(e.link_faces) == 0:
-                    bme.edges.remove(e)
-        for e in remove_edges:
-            if e.is_valid: bme.edges.remove(e)
-        for v in all_verts:
-            if len(v.link_edges) == 0:
-                bme.verts.remove(v)
-
+            remove_edges = (removed_faces > 0) & (removed_faces == topology.edge_faces.counts)
+        else:
+            # interior edges of the removed region only
+            remove_edges = removed_faces >= 2
+        touched = np.zeros(topology.num_verts, dtype=bool)
+        touched[topology.loop_verts[faces[topology.loop_faces]]] = True
+        return verts_left_without_edges(touched, remove_edges), remove_edges, faces
     elif context == "TAGGED_ONLY":
-        for v in verts:
-            bme.verts.remove(v)
-        for e in edges:
-            bme.edges.remove(e)
-        for f in faces:
-            bme.faces.remove(f)
+        return verts, edges, faces
+    raise ValueError("Unknown delete context '{}'".format(context))
+
 
 def bmesh_delete(bme:BMesh, verts:set=None, edges:set=None, faces:set=None):
     """
@@ -1395,15 +1128,9 @@ def bmesh_delete(bme:BMesh, verts:set=None, edges:set=None, faces:set=None):
     Returns:
         None
     """
-    if verts is not None:
-        for v in verts:
-            if v.is_valid: bme.verts.remove(v)
-    if edges is not None:
-        for e in edges:
-            if e.is_valid: bme.verts.remove(e)
-    if faces is not None:
-        for f in faces:
-            if f.is_valid: bme.verts.remove(f)
+    geom = [item for items in (faces, edges, verts) if items is not None for item in items if item.is_valid]
+    if geom:
+        bmesh.ops.delete(bme, geom=geom, context="TAGGED_ONLY")
 
 
 # d3g only
@@ -1429,30 +1156,13 @@ def bme_rip_vertex(bme, bmvert):
 ###  Geometric Operators  ##########
 ####################################
 def get_com_bmverts(lverts):
-    n_verts = len(lverts)
-    COM = Vector((0,0,0))
-    for v in lverts:
-        COM += v.co
-    COM *= 1/n_verts
-    return COM
+    return Vector(points_center([v.co for v in lverts]))
 
 def bound_box_bmverts(bmvs:iter):
-    bounds = []
-    for i in range(0,3):
-        components = [v.co[i] for v in bmvs]
-        low = min(components)
-        high = max(components)
-        bounds.append((low,high))
-
-    return bounds
+    return [tuple(b) for b in points_bounds([v.co for v in bmvs]).tolist()]
 # Doesn't belong here, but is almost alwasy used on the return of bound_box_bmverts
 def bbox_center(bounds):
-
-    x = 0.5 * (bounds[0][0] + bounds[0][1])
-    y = 0.5 * (bounds[1][0] + bounds[1][1])
-    z = 0.5 * (bounds[2][0] + bounds[2][1])
-
-    return Vector((x,y,z))
+    return Vector(np.mean(bounds, axis=1))
 
 #this one goes in geometry because of the flat part
 #also a topological operator
@@ -1498,6 +1208,79 @@ def bme_linked_flat_faces(bme:BMesh, start_face:BMFace, angle:float, max_iters=1
 
     return list(flat_faces)
 
+
+def bvh_ray_cast_each(bvh:BVHTree, origins:np.ndarray, directions:np.ndarray, distance:float=None):
+    """ cast (N, 3) rays against bvh one BVHTree.ray_cast call at a time (directions may be one (3,) direction for all rays)
+
+    Returns:
+        (N,) hit face indices (-1 where nothing was hit) and (N,) hit distances (inf where nothing was hit)
+    """
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+    directions = np.broadcast_to(np.asarray(directions, dtype=np.float64), origins.shape)
+    args = () if distance is None else (distance,)
+    indices = np.full(len(origins), -1, dtype=np.int64)
+    distances = np.full(len(origins), np.inf)
+    # plain tuples avoid creating numpy scalars per ray
+    for i, (origin, direction) in enumerate(zip(map(tuple, origins.tolist()), map(tuple, directions.tolist()))):
+        _, _, index, dist = bvh.ray_cast(origin, direction, *args)
+        if index is not None:
+            indices[i] = index
+            distances[i] = dist
+    return indices, distances
+
+
+def undercut_masks(mesh:Mesh, view:Vector, matrix:Matrix=None, epsilon:float=0.000001, min_island_size:int=75, occlusion:bool=True):
+    """ faces of mesh that cannot be seen along 'view'
+
+    Parameters:
+        mesh (Mesh): mesh data (normals should be consistent)
+        view (Vector): direction toward the viewer
+        matrix (Matrix, None): object matrix if 'view' is in world coords (None if in local coords)
+        epsilon (float): faces are facing away below this dot product of normal and view
+        min_island_size (int): up facing islands with fewer faces count as overhang, smaller overhang islands are ignored
+        occlusion (bool): also find faces facing the view that are hidden behind other faces
+
+    Returns:
+        (overhang, occluded) boolean masks over mesh.polygons
+    """
+    topology = mesh_topology(mesh)
+    view = np.asarray(view, dtype=np.float64).reshape(3)
+    if matrix is not None:
+        view = transform_directions(view, matrix, inverse=True)[0]
+    view /= np.linalg.norm(view)
+    normals = np.empty(topology.num_faces * 3, dtype=np.float32)
+    mesh.polygons.foreach_get("normal", normals)
+    normals = normals.reshape(-1, 3)
+
+    # classify all face directions at once
+    down = normals @ view <= -epsilon
+
+    # small up facing islands surrounded by overhang become overhang
+    up_labels = topology.loose_parts("faces", ~down)
+    up_sizes = np.bincount(up_labels[~down], minlength=1)
+    down |= ~down & (up_sizes[np.maximum(up_labels, 0)] < min_island_size)
+    # ignore small overhang islands
+    down_labels = topology.loose_parts("faces", down)
+    down_sizes = np.bincount(down_labels[down], minlength=1)
+    overhang = down & (down_sizes[np.maximum(down_labels, 0)] > min_island_size)
+
+    occluded = np.zeros(topology.num_faces, dtype=bool)
+    if occlusion:
+        candidates = np.flatnonzero(~down)
+        centers = np.empty(topology.num_faces * 3, dtype=np.float32)
+        mesh.polygons.foreach_get("center", centers)
+        centers = centers.reshape(-1, 3)[candidates]
+        # step off the surface so rays do not hit their own face
+        scale = np.ptp(topology.coords, axis=0).max() if topology.num_verts else 1
+        origins = centers + normals[candidates] * (scale * 1e-5)
+        loop_verts = polygon_ordered_loop_verts(topology.loop_starts, topology.loop_totals, topology.loop_verts)
+        polygons = np.split(loop_verts, np.cumsum(topology.loop_totals)[:-1])
+        bvh = BVHTree.FromPolygons(topology.coords.tolist(), [p.tolist() for p in polygons])
+        hit_faces, _ = bvh_ray_cast_each(bvh, origins, view)
+        occluded[candidates] = hit_faces >= 0
+
+    return overhang, occluded
+
 #Super Weird, Super Specific, Needs to go into it's own file
 #Note a very genericly useful utility
 def remove_undercuts(context:BMesh, ob:Object, view:Vector, world:bool=True, smooth:bool=True, epsilon:float=0.000001):
@@ -1508,11 +1291,11 @@ def remove_undercuts(context:BMesh, ob:Object, view:Vector, world:bool=True, smo
         ob (Object): mesh object
         view (Vector): view vector
         world (bool): True if view vector is in world coords
-        smooth (bool):
-        epsilon (float):
+        smooth (bool): relax the border loops of the undercut regions before extruding them
+        epsilon (float): faces are facing away below this dot product of normal and view
 
     Returns:
-        Bmesh with Undercuts Removed?
+        new object with undercuts blocked out along the view ('undercut_masks' has the face masks only)
 
     best to make sure normals are consistent beforehand
     best for manifold meshes, however non-man works
@@ -1520,244 +1303,81 @@ def remove_undercuts(context:BMesh, ob:Object, view:Vector, world:bool=True, smo
 
     """
 
-
-    # careful, this can get expensive with multires
-    me = ob.to_mesh(context.scene, True, "RENDER")
-    bme = bmesh.new()
-    bme.from_mesh(me)
-    bme.normal_update()
-    bme.verts.ensure_lookup_table()
-    bme.edges.ensure_lookup_table()
-    bme.faces.ensure_lookup_table()
-
-    bvh = BVHTree.FromBMesh(bme)
-
+    me = new_mesh_from_object(ob)
     # keep track of the world matrix
-    mx = ob.matrix_world
+    mx = ob.matrix_world.copy()
+    overhang, occluded = undercut_masks(me, view, mx if world else None, epsilon)
+    undercut = overhang | occluded
 
+    local_view = np.asarray(view, dtype=np.float64).reshape(3)
     if world:
-        # convert the view vector from  world to local coords
-        i_mx = mx.inverted()
-        view = i_mx.to_quaternion() * view
-
-    face_directions = [[0]] * len(bme.faces)
-
-    up_faces = set()
-    overhang_faces = set()  # all faces pointing away from view
-    # precalc all the face directions and store in dict
-    for f in bme.faces:
-        direction = f.normal.dot(view)
-
-        if direction <= -epsilon:
-            overhang_faces.add(f)
-        else:
-            up_faces.add(f)
-
-        face_directions[f.index] = direction
-
-    print("there are %i up_faces" % len(up_faces))
-    print("there are %i down_faces" % len(overhang_faces))
-
-
-    # for f in bme.faces:
-    #    if f in overhangs:
-    #        f.select_set(True)
-    #    else:
-    #        f.select_set(False)
-
-    def face_neighbors_up(bmface:BMFace):
-        return [n for n in face_neighbors(bmface) if n in up_faces]
-
-    # remove smal islands from up_faces and add to overhangs
-    max_iters = len(up_faces)
-    iters_0 = 0
-    islands_removed = 0
-
-    up_faces_copy = up_faces.copy()
-    upfacing_islands = []  # islands bigger than a certain threshold (by surface area?)
-    while len(up_faces_copy) and iters_0 < max_iters:
-        iters_0 += 1
-        max_iters_1 = len(up_faces)
-        seed = up_faces_copy.pop()
-        new_faces = set(face_neighbors_up(seed))
-        up_faces_copy -= new_faces
-
-        island = set([seed])
-        island |= new_faces
-
-        iters_1 = 0
-        while iters_1 < max_iters_1 and new_faces:
-            iters_1 += 1
-            new_candidates = set()
-            for f in new_faces:
-                new_candidates.update(face_neighbors_up(f))
-
-            new_faces = new_candidates - island
-
-            if new_faces:
-                island |= new_faces
-                up_faces_copy -= new_faces
-        if len(island) < 75: #small patch surrounded by overhang, add to overhang area
-            islands_removed += 1
-            overhang_faces |= island
-        else:
-            upfacing_islands += [island]
-
-    print("%i upfacing islands removed" % islands_removed)
-    print("there are now %i down faces" % len(overhang_faces))
-
-    def face_neighbors_down(bmface:BMFace):
-        return [n for n in face_neighbors(bmface) if n in overhang_faces]
-
-    overhang_faces_copy = overhang_faces.copy()
-    overhang_islands = []  # islands bigger than a certain threshold (by surface area?)
-    while len(overhang_faces_copy):
-        seed = overhang_faces_copy.pop()
-        new_faces = set(face_neighbors_down(seed))
-        island = set([seed])
-        island |= new_faces
-        overhang_faces_copy -= new_faces
-        iters = 0
-        while iters < 100000 and new_faces:
-            iters += 1
-            new_candidates = set()
-            for f in new_faces:
-                new_candidates.update(face_neighbors_down(f))
-
-            new_faces = new_candidates - island
-
-            if new_faces:
-                island |= new_faces
-                overhang_faces_copy -= new_faces
-        if len(island) > 75: #TODO, calc overhang factor.  Surface area dotted with direction
-            overhang_islands += [island]
-
-    for f in bme.faces:
-        f.select_set(False)
-    for ed in bme.edges:
-        ed.select_set(False)
-    for v in bme.verts:
-        v.select_set(False)
-
-    island_loops = []
-    island_verts = []
-    del_faces = set()
-    for isl in overhang_islands:
-        loop_eds = []
-        loop_verts = set()
-        del_faces |= isl
-        for f in isl:
-            for ed in f.edges:
-                if len(ed.link_faces) == 1:
-                    loop_eds += [ed]
-                    loop_verts.update([ed.verts[0], ed.verts[1]])
-                elif (ed.link_faces[0] in isl) and (ed.link_faces[1] not in isl):
-                    loop_eds += [ed]
-                    loop_verts.update([ed.verts[0], ed.verts[1]])
-                elif (ed.link_faces[1] in isl) and (ed.link_faces[0] not in isl):
-                    loop_eds += [ed]
-                    loop_verts.update([ed.verts[0], ed.verts[1]])
-
-            #f.select_set(True)
-        island_verts += [list(loop_verts)]
-        island_loops += [loop_eds]
-
-    bme.faces.ensure_lookup_table()
-    bme.edges.ensure_lookup_table()
+        local_view = transform_directions(local_view, mx, inverse=True)[0]
+    local_view = Vector(local_view / np.linalg.norm(local_view))
 
-    loop_edges = []
-    for ed_loop in island_loops:
-        loop_edges += ed_loop
-        for ed in ed_loop:
-            ed.select_set(True)
-
-    loops_tools.relax_loops_util(bme, loop_edges, 5)
-
-    for ed in bme.edges:
-        ed.select_set(False)
-
-    exclude_vs = set()
-    for vs in island_verts:
-        exclude_vs.update(vs)
-
-    smooth_verts = []
-    for v in exclude_vs:
-        smooth_verts += [ed.other_vert(v) for ed in v.link_edges if ed.other_vert(v) not in exclude_vs]
+    bme = bmesh.new()
+    bme.from_mesh(me)
+    bpy.data.meshes.remove(me)
+    topology = bmesh_topology(bme)
 
-    ret = bmesh.ops.extrude_edge_only(bme, edges = loop_edges)
+    # edges on the border of the undercut regions (or the mesh boundary inside them)
+    removed_faces = np.bincount(topology.loop_edges, weights=undercut[topology.loop_faces], minlength=topology.num_edges)
+    total_faces = topology.edge_faces.counts
+    loop_edges = bm_elements(bme, "edges", np.flatnonzero((removed_faces > 0) & ((removed_faces < total_faces) | (total_faces == 1))))
+    del_faces = bm_elements(bme, "faces", np.flatnonzero(undercut))
 
+    # relax the border loops so the extruded walls follow a smoother outline
+    if smooth:
+        border_verts = list({v for ed in loop_edges for v in ed.verts})
+        for _ in range(5):
+            bmesh.ops.smooth_vert(bme, verts=border_verts, factor=0.5, use_axis_x=True, use_axis_y=True, use_axis_z=True)
 
-    new_fs = [ele for ele in ret["geom"] if type(ele) is BMFace]
-    new_vs = [ele for ele in ret["geom"] if type(ele) is BMVert]
+    ret = bmesh.ops.extrude_edge_only(bme, edges=loop_edges)
+    new_fs = [ele for ele in ret["geom"] if isinstance(ele, BMFace)]
+    new_vs = [ele for ele in ret["geom"] if isinstance(ele, BMVert)]
 
     #TODO, ray cast down to base plane?
     for v in new_vs:
-        v.co -= 10*view
-
-    for f in new_fs:
-        f.select_set(True)
-
-    bmesh_delete(bme, faces=del_faces)
-
-    del_verts = []
-    for v in bme.verts:
-        if all([f in del_faces for f in v.link_faces]):
-            del_verts += [v]
-    bmesh_delete(bme, verts=del_verts)
-
+        v.co -= 10 * local_view
 
-    del_edges = []
-    for ed in bme.edges:
-        if len(ed.link_faces) == 0:
-            del_edges += [ed]
-    print("deleting %i edges" % len(del_edges))
-    bmesh_ops_delete(bme, geom=del_edges, context="EDGES_FACES")
+    # remove undercut faces with their edges and verts that are no longer used
+    bmesh_ops_delete(bme, geom=del_faces, context="FACES")
     bmesh.ops.recalc_face_normals(bme, faces=new_fs)
-
     bme.normal_update()
+    bme.faces.index_update()
+    new_face_indices = np.array([f.index for f in new_fs], dtype=np.int64)
 
     new_me = bpy.data.meshes.new(ob.name + "_blockout")
-
     obj = bpy.data.objects.new(new_me.name, new_me)
-    context.scene.objects.link(obj)
-
-    obj.select = True
-    context.scene.objects.active = obj
+    link_object(obj, scene=context.scene)
+    select(obj, active=True)
 
     bme.to_mesh(obj.data)
+    bme.free()
+
     # Get material
     mat = bpy.data.materials.get("Model Material")
     if mat is None:
         # create material
-        print("creating model material")
         mat = bpy.data.materials.new(name="Model Material")
-        # mat.diffuse_color = Color((0.8, .8, .8))
-
     # Assign it to object
     obj.data.materials.append(mat)
-    print("Model material added")
 
     mat2 = bpy.data.materials.get("Undercut Material")
     if mat2 is None:
         # create material
         mat2 = bpy.data.materials.new(name="Undercut Material")
-        mat2.diffuse_color = Color((0.8, .2, .2))
-
-
+        mat2.diffuse_color = Color((0.8, .2, .2)) if not b280() else (0.8, .2, .2, 1)
     obj.data.materials.append(mat2)
     mat_ind = obj.data.materials.find("Undercut Material")
-    print("Undercut material is %i" % mat_ind)
 
-    for f in new_faces:
-        obj.data.polygons[f.index].material_index = mat_ind
+    material_indices = np.zeros(len(obj.data.polygons), dtype=np.int32)
+    material_indices[new_face_indices] = mat_ind
+    obj.data.polygons.foreach_set("material_index", material_indices)
 
     if world:
         obj.matrix_world = mx
 
-    bme.free()
-    del bvh
-
-    return
+    return obj
 
 
 # segmentation only
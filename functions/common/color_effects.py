@@ -469,3 +469,123 @@ def translate_pixels(old_pixels, translate_x, translate_y, wrap_x, wrap_y, width
                 trans_idx = round((width * row2 + col2) * channels)
                 new_pixels[idx:idx + channels] = old_pixels[trans_idx:trans_idx + channels]
     return new_pixels
+
+
+# marching squares segments for each cell case (corner bits: 1=(x, y), 2=(x+1, y), 4=(x+1, y+1), 8=(x, y+1));
+# cell edges: 0=bottom, 1=right, 2=top, 3=left; segments run from edge to edge with the inside on the left
+marching_squares_table = np.array((
+    ((-1, -1), (-1, -1)),
+    ((0, 3), (-1, -1)),
+    ((1, 0), (-1, -1)),
+    ((1, 3), (-1, -1)),
+    ((2, 1), (-1, -1)),
+    ((0, 3), (2, 1)),
+    ((2, 0), (-1, -1)),
+    ((2, 3), (-1, -1)),
+    ((3, 2), (-1, -1)),
+    ((0, 2), (-1, -1)),
+    ((1, 0), (3, 2)),
+    ((1, 2), (-1, -1)),
+    ((3, 1), (-1, -1)),
+    ((0, 1), (-1, -1)),
+    ((3, 0), (-1, -1)),
+    ((-1, -1), (-1, -1)),
+), dtype=np.int64)
+marching_squares_counts = np.array((0, 1, 1, 1, 1, 2, 1, 1, 1, 1, 2, 1, 1, 1, 1, 0), dtype=np.int64)
+
+
+@jit(nopython=True)
+def _cell_case(frames, f, x, y, threshold):
+    case = 0
+    if frames[f, y, x] >= threshold:
+        case |= 1
+    if frames[f, y, x + 1] >= threshold:
+        case |= 2
+    if frames[f, y + 1, x + 1] >= threshold:
+        case |= 4
+    if frames[f, y + 1, x] >= threshold:
+        case |= 8
+    return case
+
+
+@jit(nopython=True)
+def _cell_edge(x, y, edge):
+    """ pixel coordinates at both ends of a cell edge """
+    if edge == 0:
+        return x, y, x + 1, y
+    elif edge == 1:
+        return x + 1, y, x + 1, y + 1
+    elif edge == 2:
+        return x, y + 1, x + 1, y + 1
+    return x, y, x, y + 1
+
+
+@jit(nopython=True, parallel=True)
+def marching_squares_segments(frames, threshold):
+    """ directed contour segments of (F, H, W) pixel stacks (padded with values below threshold)
+
+    Returns:
+        (S, 2) ids of the pixel edges each segment runs between (unique across frames),
+        (S, 2) pixel coordinates (minus the padding) where each segment starts
+    """
+    num_frames, height, width = frames.shape
+    num_rows = num_frames * (height - 1)
+    frame_size = 2 * width * height
+    # count segments in each row of cells, then fill every row from its offset
+    row_counts = np.zeros(num_rows, dtype=np.int64)
+    for r in prange(num_rows):
+        f = r // (height - 1)
+        y = r % (height - 1)
+        n = 0
+        for x in range(width - 1):
+            n += marching_squares_counts[_cell_case(frames, f, x, y, threshold)]
+        row_counts[r] = n
+    row_offsets = np.zeros(num_rows + 1, dtype=np.int64)
+    row_offsets[1:] = np.cumsum(row_counts)
+    seg_edges = np.empty((row_offsets[-1], 2), dtype=np.int64)
+    seg_coords = np.empty((row_offsets[-1], 2))
+    for r in prange(num_rows):
+        f = r // (height - 1)
+        y = r % (height - 1)
+        i = row_offsets[r]
+        for x in range(width - 1):
+            case = _cell_case(frames, f, x, y, threshold)
+            for s in range(marching_squares_counts[case]):
+                for j in range(2):
+                    x0, y0, x1, y1 = _cell_edge(x, y, marching_squares_table[case, s, j])
+                    # horizontal edges first, then vertical edges
+                    seg_edges[i, j] = f * frame_size + (0 if y0 == y1 else width * height) + y0 * width + x0
+                    if j == 0:
+                        v0 = frames[f, y0, x0]
+                        t = (threshold - v0) / (frames[f, y1, x1] - v0)
+                        seg_coords[i, 0] = x0 + t * (x1 - x0) - 1
+                        seg_coords[i, 1] = y0 + t * (y1 - y0) - 1
+                i += 1
+    return seg_edges, seg_coords
+
+
+@jit(nopython=True)
+def trace_segment_loops(next_seg):
+    """ order segments into closed loops by following 'next_seg'
+
+    Returns:
+        segment indices in loop order, offsets of each loop into them
+    """
+    num_segs = len(next_seg)
+    visited = np.zeros(num_segs, dtype=np.bool_)
+    order = np.empty(num_segs, dtype=np.int64)
+    offsets = np.zeros(num_segs + 1, dtype=np.int64)
+    num_loops = 0
+    k = 0
+    for i in range(num_segs):
+        if visited[i]:
+            continue
+        j = i
+        while not visited[j]:
+            visited[j] = True
+            order[k] = j
+            k += 1
+            j = next_seg[j]
+        num_loops += 1
+        offsets[num_loops] = k
+    return order, offsets[:num_loops + 1]
@@ -0,0 +1,95 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+import numpy as np
+
+# Blender imports
+# NONE!
+
+# Module imports
+# NONE!
+
+
+def swept_aabb_times(box_min:np.ndarray, box_max:np.ndarray, displacement:np.ndarray, other_mins:np.ndarray, other_maxs:np.ndarray):
+    """ entry and exit times (as fractions of displacement) of a box moving against (M, 3) static boxes
+
+    the moving box overlaps box i for t in [t_enter[i], t_exit[i]] (no overlap if t_enter > t_exit)
+    """
+    box_min = np.asarray(box_min, dtype=np.float64)
+    box_max = np.asarray(box_max, dtype=np.float64)
+    d = np.asarray(displacement, dtype=np.float64)
+    other_mins = np.asarray(other_mins, dtype=np.float64).reshape(-1, 3)
+    other_maxs = np.asarray(other_maxs, dtype=np.float64).reshape(-1, 3)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t0 = (other_mins - box_max) / d
+        t1 = (other_maxs - box_min) / d
+    t_enter = np.minimum(t0, t1)
+    t_exit = np.maximum(t0, t1)
+    # axes without motion either always or never overlap
+    still = d == 0
+    overlap = (box_max > other_mins) & (box_min < other_maxs)
+    t_enter = np.where(still, np.where(overlap, -np.inf, np.inf), t_enter)
+    t_exit = np.where(still, np.where(overlap, np.inf, -np.inf), t_exit)
+    return t_enter.max(axis=1), t_exit.min(axis=1)
+
+
+def conservative_advancement(box_min:np.ndarray, box_max:np.ndarray, displacement:np.ndarray, other_mins:np.ndarray, other_maxs:np.ndarray):
+    """ fraction of displacement a moving box can travel this step without tunneling through any of the static boxes
+
+    the box may advance to first contact plus half of the thinner box (measured along the motion) per step,
+    so a thin neighbor is always seen overlapping by the solver before the box could pass through it; boxes
+    overlapped from the start only hold the box back while it moves deeper into them (along the axis they
+    overlap least), so resting on or sliding out of a neighbor is never slowed down
+    """
+    d = np.asarray(displacement, dtype=np.float64)
+    length = np.linalg.norm(d)
+    if length == 0 or len(other_mins) == 0:
+        return 1.0
+    box_min = np.asarray(box_min, dtype=np.float64)
+    box_max = np.asarray(box_max, dtype=np.float64)
+    other_mins = np.asarray(other_mins, dtype=np.float64).reshape(-1, 3)
+    other_maxs = np.asarray(other_maxs, dtype=np.float64).reshape(-1, 3)
+    t_enter, t_exit = swept_aabb_times(box_min, box_max, d, other_mins, other_maxs)
+    hit = (t_enter <= t_exit) & (t_enter < 1) & (t_exit > 0)
+    # already overlapping: heading in if the motion pushes deeper along the axis of least overlap
+    overlapping = hit & (t_enter < 0)
+    if overlapping.any():
+        depths = np.minimum(box_max, other_maxs[overlapping]) - np.maximum(box_min, other_mins[overlapping])
+        axis = np.argmin(depths, axis=1)
+        inward = np.sign((other_mins[overlapping] + other_maxs[overlapping])[np.arange(len(axis)), axis] - (box_min + box_max)[axis])
+        hit[overlapping] = inward * d[axis] > 0
+    if not hit.any():
+        return 1.0
+    direction = np.abs(d) / length
+    other_thickness = (other_maxs[hit] - other_mins[hit]) @ direction
+    thickness = np.minimum(other_thickness, (box_max - box_min) @ direction)
+    t_safe = np.maximum(t_enter[hit], 0) + 0.5 * thickness / length
+    return float(min(1.0, t_safe.min()))
+
+
+def polygon_bounds(coords:np.ndarray, loop_starts:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray):
+    """ (M, 3) min and max corners of each polygon (so large concave scenery is swept against face by face) """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    loop_totals = np.asarray(loop_totals, dtype=np.int64)
+    if len(loop_totals) == 0:
+        return np.empty((0, 3)), np.empty((0, 3))
+    group_start = np.repeat(np.cumsum(loop_totals) - loop_totals, loop_totals)
+    loops = np.repeat(loop_starts, loop_totals) + np.arange(len(group_start)) - group_start
+    points = coords[np.asarray(loop_verts)[loops]]
+    starts = np.cumsum(loop_totals) - loop_totals
+    return np.minimum.reduceat(points, starts, axis=0), np.maximum.reduceat(points, starts, axis=0)
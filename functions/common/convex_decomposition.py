@@ -0,0 +1,159 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+import heapq
+import numpy as np
+
+# Blender imports
+# NONE!
+
+# Module imports
+# NONE!
+
+
+def polygon_geometry(coords:np.ndarray, loop_starts:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray):
+    """ compute polygon normals, centers and areas from flat mesh arrays
+
+    Parameters:
+        coords (np.ndarray): (V, 3) vertex coordinates
+        loop_starts (np.ndarray): first loop index of each polygon
+        loop_totals (np.ndarray): number of loops in each polygon
+        loop_verts (np.ndarray): vertex index of each loop
+
+    Returns:
+        normals (np.ndarray): (P, 3) unit polygon normals (Newell's method)
+        centers (np.ndarray): (P, 3) polygon centers (vertex average)
+        areas (np.ndarray): (P,) polygon areas
+    """
+    num_polys = len(loop_starts)
+    poly_of_loop = np.repeat(np.arange(num_polys), loop_totals)
+    group_start = np.repeat(np.cumsum(loop_totals) - loop_totals, loop_totals)
+    pos = np.arange(len(poly_of_loop)) - group_start
+    totals = np.repeat(loop_totals, loop_totals)
+    starts = np.repeat(loop_starts, loop_totals)
+    cur = coords[loop_verts[starts + pos]].astype(np.float64)
+    nxt = coords[loop_verts[starts + (pos + 1) % totals]].astype(np.float64)
+    # Newell's method: sum of cross products around the polygon
+    normals = np.zeros((num_polys, 3))
+    np.add.at(normals, poly_of_loop, np.cross(cur, nxt))
+    areas = np.linalg.norm(normals, axis=1) / 2
+    normals /= np.maximum(areas * 2, 1e-12)[:, None]
+    centers = np.zeros((num_polys, 3))
+    np.add.at(centers, poly_of_loop, cur)
+    centers /= np.maximum(loop_totals, 1)[:, None]
+    return normals, centers, areas
+
+
+def is_closed_surface(loop_starts:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray):
+    """ check that every polygon edge is shared by at least two polygons (no boundary edges) """
+    group_start = np.repeat(np.cumsum(loop_totals) - loop_totals, loop_totals)
+    pos = np.arange(len(group_start)) - group_start
+    starts = np.repeat(loop_starts, loop_totals)
+    cur = loop_verts[starts + pos]
+    nxt = loop_verts[starts + (pos + 1) % np.repeat(loop_totals, loop_totals)]
+    edges = np.sort(np.stack((cur, nxt), axis=1), axis=1)
+    _, counts = np.unique(edges, axis=0, return_counts=True)
+    return bool(len(counts)) and bool((counts > 1).all())
+
+
+def convex_decomposition(coords:np.ndarray, loop_starts:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray, max_pieces:int=8, concavity_tolerance:float=0.02, max_samples:int=256, solid:bool=None):
+    """ split a concave mesh into a small set of approximately convex pieces
+
+    Top-down hierarchical approximation: the most concave piece is repeatedly split
+    in two along whichever of its principal axes yields the least concave halves,
+    until every piece is within tolerance or 'max_pieces' is reached.
+
+    Parameters:
+        coords (np.ndarray): (V, 3) vertex coordinates
+        loop_starts (np.ndarray): first loop index of each polygon
+        loop_totals (np.ndarray): number of loops in each polygon
+        loop_verts (np.ndarray): vertex index of each loop
+        max_pieces (int): maximum number of convex pieces to return
+        concavity_tolerance (float): concavity (relative to the mesh's bounding diagonal) below which a piece is treated as convex
+        max_samples (int): maximum faces/points sampled when measuring concavity of a piece
+        solid (bool): treat mesh as a closed solid (if None, detected from boundary edges);
+                      open surfaces are measured two-sided, so curved patches are split until nearly flat
+
+    Returns:
+        list of (N, 3) float32 arrays of vertex coordinates (one point cloud per convex piece)
+    """
+    coords = np.asarray(coords, dtype=np.float32).reshape(-1, 3)
+    if len(loop_starts) == 0 or max_pieces <= 1:
+        return [coords.copy()]
+
+    normals, centers, areas = polygon_geometry(coords, loop_starts, loop_totals, loop_verts)
+    poly_of_loop = np.repeat(np.arange(len(loop_starts)), loop_totals)
+    group_start = np.repeat(np.cumsum(loop_totals) - loop_totals, loop_totals)
+    grouped_verts = loop_verts[np.repeat(loop_starts, loop_totals) + np.arange(len(poly_of_loop)) - group_start]
+    if solid is None:
+        solid = is_closed_surface(loop_starts, loop_totals, loop_verts)
+    diagonal = max(float(np.linalg.norm(coords.max(axis=0) - coords.min(axis=0))), 1e-9)
+
+    def piece_verts(faces):
+        return np.unique(grouped_verts[np.isin(poly_of_loop, faces)])
+
+    def concavity(faces):
+        """ largest distance of piece verts in front of piece face planes (0 for convex pieces) """
+        if len(faces) > max_samples:
+            faces = faces[np.argsort(areas[faces])[-max_samples:]]
+        points = coords[piece_verts(faces)].astype(np.float64)
+        if len(points) > max_samples * 4:
+            points = points[np.linspace(0, len(points) - 1, max_samples * 4).astype(np.int64)]
+        n = normals[faces]
+        offsets = (points @ n.T) - (n * centers[faces]).sum(axis=1)
+        if not solid:
+            offsets = np.abs(offsets)
+        return max(float(offsets.max()), 0) / diagonal
+
+    def best_split(faces):
+        pts = centers[faces]
+        weights = areas[faces] + 1e-12
+        mean = np.average(pts, axis=0, weights=weights)
+        cov = np.cov((pts - mean).T, aweights=weights) if len(faces) > 1 else np.eye(3)
+        _, axes = np.linalg.eigh(np.atleast_2d(cov))
+        best = None
+        for axis in axes.T:
+            side = (pts - mean) @ axis > 0
+            if side.all() or not side.any():
+                continue
+            left, right = faces[side], faces[~side]
+            c_left, c_right = concavity(left), concavity(right)
+            score = c_left * weights[side].sum() + c_right * weights[~side].sum()
+            if best is None or score < best[0]:
+                best = (score, (left, c_left), (right, c_right))
+        return None if best is None else best[1:]
+
+    all_faces = np.arange(len(loop_starts))
+    counter = 0
+    heap = [(-concavity(all_faces), counter, all_faces)]
+    finished = []
+    while heap and len(heap) + len(finished) < max_pieces:
+        neg_concavity, _, faces = heapq.heappop(heap)
+        if -neg_concavity <= concavity_tolerance:
+            finished.append(faces)
+            break
+        halves = best_split(faces)
+        if halves is None:
+            finished.append(faces)
+            continue
+        for child_faces, child_concavity in halves:
+            counter += 1
+            heapq.heappush(heap, (-child_concavity, counter, child_faces))
+    finished += [faces for _, _, faces in heap]
+
+    return [coords[piece_verts(faces)] for faces in finished]
@@ -28,153 +28,78 @@ import bmesh
 from mathutils import Vector, Color
 
 # Module imports
+from .blender import link_object
+from .bmesh_utils import append_arrays_to_bmesh
 from .color_effects import *
 from .maths import *
+from .maths_arrays import *
 from .python_utils import *
 
 
-class Vector2:
-    """ Implementation of the mathutils 'Vector' data type that supports double precision """
-    def __init__(self, value=(0, 0, 0)):
-        assert type(value) in (tuple, list, Vector, Vector2, types.GeneratorType, bpy_prop_array)
-        if type(value) in (Vector, Color, bpy_prop_array):
-            self._seq = [round(i, 6) for i in value]
-        else:
-            self._seq = list(value)
-
-    def __str__(self):
-        return "<Vector2(" + str(tuple(self._seq)) + ")>"
-
-    def __add__(self, other):
-        assert isinstance(other, Vector2) or isinstance(Vector)
-        assert len(self) == len(other)
-        new_vec = Vector2(self.to_list())
-        new_vec.x += other.x
-        new_vec.y += other.y
-        if len(self) > 2:
-            new_vec.z += other.z
-        return new_vec
-
-    def __sub__(self, other):
-        assert isinstance(other, Vector2) or isinstance(other, Vector)
-        assert len(self) == len(other)
-        new_vec = Vector2(self.to_list())
-        new_vec.x -= other.x
-        new_vec.y -= other.y
-        if len(self) > 2:
-            new_vec.z -= other.z
-        return new_vec
-
-    def __mul__(self, other):
-        new_vec = Vector2(self.to_list())
-        if isinstance(other, Vector2) or isinstance(other, Vector):
-            assert len(self) == len(other)
-            new_vec.x = self.x * other.x
-            new_vec.y = self.y * other.y
-            if len(self) > 2:
-                new_vec.z = self.z * other.z
-        elif isinstance(other, int) or isinstance(other, float):
-            new_vec.x = self.x * other
-            new_vec.y = self.y * other
-            if len(self) > 2:
-                new_vec.z = self.z * other
-        else:
-            raise
-        return new_vec
-
-    def __div__(self, other):
-        new_vec = Vector2(self.to_list())
-        if isinstance(other, Vector2) or isinstance(other, Vector):
-            assert len(self) == len(other)
-            new_vec.x = self.x / other.x
-            new_vec.y = self.y / other.y
-            if len(self) > 2:
-                new_vec.z = self.z / other.z
-        elif isinstance(other, int) or isinstance(other, float):
-            new_vec.x = self.x / other
-            new_vec.y = self.y / other
-            if len(self) > 2:
-                new_vec.z = self.z / other
-        else:
-            raise
-        return new_vec
-
-    def __truediv__(self, other):
-        return self.__div__(other)
-
-    def __len__(self):
-        return len(self._seq)
-
-    def __getitem__(self, val):
-        assert type(val) in (int, slice)
-        if isinstance(val, int):
-            return self._seq[val]
-        else:
-            return self._seq[s.start:s.stop:s.step]
-
-    def __iter__(self):
-        self._idx = 0
-        return self
-
-    def __next__(self):
-        if self._idx < len(self._seq):
-            result = self._seq[self._idx]
-            self._idx += 1
-            return result
-        else:
-            raise StopIteration
+def _ring_edges(offsets:np.ndarray):
+    """ (K, 2) edges closing each run of coordinates between consecutive offsets into a ring """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    idx = np.arange(offsets[-1] if len(offsets) else 0)
+    starts = np.repeat(offsets[:-1], counts)
+    ends = np.repeat(offsets[1:], counts)
+    sizes = np.repeat(counts, counts)
+    next_idx = np.where(idx + 1 == ends, starts, idx + 1)
+    # single coordinates have no edges and two coordinates share one edge
+    keep = (sizes > 2) | ((sizes == 2) & (idx == starts))
+    return np.stack((idx[keep], next_idx[keep]), axis=1)
+
+
+def _write_edge_mesh(mesh, coords:np.ndarray, edges:np.ndarray):
+    """ replace mesh geometry with (N, 2 or 3) coords and (K, 2) edges in bulk """
+    coords = np.asarray(coords, dtype=np.float32)
+    coords3d = np.zeros((len(coords), 3), dtype=np.float32)
+    coords3d[:, :min(coords.shape[1], 3)] = coords[:, :3]
+    mesh.clear_geometry()
+    mesh.vertices.add(len(coords3d))
+    mesh.vertices.foreach_set("co", coords3d.ravel())
+    mesh.edges.add(len(edges))
+    mesh.edges.foreach_set("vertices", np.asarray(edges, dtype=np.int32).ravel())
+    mesh.update()
+    return mesh
+
+
+def _as_coord_array(coords, dims:int=2):
+    """ coordinates as a float (N, k) array (no copy for float arrays) """
+    if isinstance(coords, np.ndarray) and coords.dtype == np.float64 and coords.ndim == 2:
+        return coords
+    coords = [tuple(c) for c in coords] if not isinstance(coords, np.ndarray) else coords
+    return np.asarray(coords, dtype=np.float64).reshape(len(coords), -1) if len(coords) else np.empty((0, dims))
+
+
+def _reserve(buffer:np.ndarray, size:int):
+    """ buffer, or a copy of it with room for at least 'size' rows (capacity at least doubles, so appends are amortized O(1)) """
+    if size <= len(buffer):
+        return buffer
+    grown = np.empty((max(size, 2 * len(buffer)),) + buffer.shape[1:], dtype=buffer.dtype)
+    grown[:len(buffer)] = buffer
+    return grown
 
-    def length(self):
-        return len(self._seq)
 
-    def to_list(self):
-        return self._seq.copy()
-
-    def to_tuple(self):
-        return tuple(self._seq)
-
-    @property
-    def x(self):
-        return self._seq[0]
-
-    @x.setter
-    def x(self, value):
-        self._seq[0] = value
-
-    @property
-    def y(self):
-        return self._seq[1]
+class Island:
+    """ data type for storing connected vertices (an (N, k) coordinate array, possibly a view into an Archipelago)
 
-    @y.setter
-    def y(self, value):
-        self._seq[1] = value
+    the coordinates are the first '_size' rows of '_buffer', which has spare rows for appending
+    """
+    __slots__ = ("_buffer", "_size", "_type")
 
-    @property
-    def z(self):
-        if self.length < 3:
-            raise AttributeErorr("unavailable on 2d vector")
-        return self._seq[2]
-
-    @y.setter
-    def z(self, value):
-        self._seq[2] = value
+    def __init__(self, coords, island_type=None):
+        assert type(coords) in (tuple, list, np.ndarray)
+        self._coords = _as_coord_array(coords)
+        self._type = island_type
 
     @property
-    def xy(self):
-        return Vector2(self._seq[:2])
-
-    @xy.setter
-    def xy(self, value):
-        self.x = value[0]
-        self.y = value[1]
-
+    def _coords(self):
+        return self._buffer[:self._size]
 
-class Island:
-    """ data type for storing connected vertices """
-    def __init__(self, coords, island_type=None):
-        assert type(coords) in (tuple, list)
-        self._coords = list(coords)
-        self._type = island_type
+    @_coords.setter
+    def _coords(self, coords):
+        self._buffer, self._size = coords, len(coords)
 
     def __str__(self):
         return "Island of {c} coordinates.".format(c=len(self._coords))
@@ -182,17 +107,11 @@ class Island:
     def __len__(self):
         return len(self._coords)
 
-    def __iter__(self):
-        self._idx = 0
-        return self
+    def __getitem__(self, idx):
+        return self._coords[idx]
 
-    def __next__(self):
-        if self._idx < len(self._coords):
-            result = self._coords[self._idx]
-            self._idx += 1
-            return result
-        else:
-            raise StopIteration
+    def __iter__(self):
+        return iter(self._coords)
 
     @property
     def coords(self):
@@ -204,23 +123,16 @@ class Island:
 
     def to_bmesh(self, bme=None):
         bme = bme or bmesh.new()
-        first_vert = None
-        for coord in self._coords:
-            v = bme.verts.new(coord)
-            if first_vert is None:
-                first_vert = v
-            else:
-                bme.edges.new((v, last_vert))
-            last_vert = v
-        bme.edges.new((v, first_vert))
+        coords3d = np.zeros((len(self._coords), 3))
+        coords3d[:, :min(self._coords.shape[1], 3)] = self._coords[:, :3]
+        append_arrays_to_bmesh(bme, coords3d, np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), _ring_edges((0, len(self._coords))))
         return bme
 
     def to_mesh(self, mesh):
-        bme = self.to_bmesh()
-        return bme.to_mesh(mesh)
+        return _write_edge_mesh(mesh, self._coords, _ring_edges((0, len(self._coords))))
 
     def from_bmesh(self, bme):
-        self._coords = [Vector2(v.co) for v in bme.verts]
+        self._coords = np.array([v.co for v in bme.verts], dtype=np.float64).reshape(-1, 3)
 
     def draw_mesh(self):
         m = bpy.data.meshes.new(str(self))
@@ -229,61 +141,126 @@ class Island:
         link_object(obj)
 
     def append(self, coord):
-        assert type(coord) in (tuple, list, Vector, Vector2)
-        return self._coords.append(coord)
+        assert type(coord) in (tuple, list, Vector, Vector2, np.ndarray)
+        coord = np.asarray(tuple(coord), dtype=np.float64)
+        if self._size == 0:
+            self._coords = coord.reshape(1, -1)
+        else:
+            self._buffer = _reserve(self._buffer, self._size + 1)
+            self._buffer[self._size] = coord
+            self._size += 1
 
 
 class Archipelago:
-    """ data type for storing a group of Islands """
+    """ data type for storing a group of Islands
+
+    coordinates of all islands are stored in one (N, k) array; island i is coords[offsets[i]:offsets[i + 1]]
+    (both arrays are the filled part of a buffer with spare rows for appending)
+    """
+    __slots__ = ("_coord_buffer", "_num_coords", "_offset_buffer", "_num_offsets", "_types")
+
     def __init__(self, islands=[], island_type=None):
         assert type(islands) in (tuple, list)
         for island in islands:
-            assert type(island) in (tuple, list, Island)
-        self._islands = list()
-        for island in islands:
-            self._islands.append(island if isinstance(island, Island) else Island(island, island_type=island_type))
+            assert type(island) in (tuple, list, np.ndarray, Island)
+        islands = [island if isinstance(island, Island) else Island(island, island_type=island_type) for island in islands]
+        counts = [len(island) for island in islands]
+        self._offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self._coords = np.concatenate([island.coords for island in islands]) if sum(counts) else np.empty((0, 2))
+        self._types = [island.type for island in islands]
+
+    @classmethod
+    def from_arrays(cls, coords:np.ndarray, offsets:np.ndarray, island_type=None):
+        """ archipelago sharing (N, k) coords with islands between consecutive 'offsets' (no copy) """
+        arch = cls.__new__(cls)
+        arch._coords = np.asarray(coords, dtype=np.float64)
+        arch._offsets = np.asarray(offsets, dtype=np.int64)
+        arch._types = [island_type] * (len(arch._offsets) - 1)
+        return arch
+
+    @property
+    def _coords(self):
+        return self._coord_buffer[:self._num_coords]
+
+    @_coords.setter
+    def _coords(self, coords):
+        self._coord_buffer, self._num_coords = coords, len(coords)
+
+    @property
+    def _offsets(self):
+        return self._offset_buffer[:self._num_offsets]
+
+    @_offsets.setter
+    def _offsets(self, offsets):
+        self._offset_buffer, self._num_offsets = offsets, len(offsets)
 
     def __str__(self):
-        return "Archipelago of {i} islands with {v} total vertices.".format(i=len(self._islands), v=len(self.coords))
+        return "Archipelago of {i} islands with {v} total vertices.".format(i=len(self), v=len(self._coords))
 
     def __len__(self):
-        return len(self._islands)
+        return len(self._offsets) - 1
 
     def __add__(self, other):
         assert isinstance(other, Archipelago)
-        new_arch = Archipelago([island for island in self.islands])
-        for island in other.islands:
-            new_arch.append(island)
-        return new_arch
+        arch = Archipelago.from_arrays(
+            np.concatenate((self._coords, other.coords)) if len(other.coords) else self._coords.copy(),
+            np.concatenate((self._offsets, other.offsets[1:] + self._offsets[-1])),
+        )
+        arch._types = self._types + other._types
+        return arch
+
+    def __getitem__(self, idx:int):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("island index out of range")
+        return Island(self._coords[self._offsets[idx]:self._offsets[idx + 1]], island_type=self._types[idx])
 
     def __iter__(self):
-        self._idx = 0
-        return self
-
-    def __next__(self):
-        if self._idx < len(self._islands):
-            result = self._islands[self._idx]
-            self._idx += 1
-            return result
-        else:
-            raise StopIteration
+        return (self[i] for i in range(len(self)))
 
     @property
     def islands(self):
-        return self._islands
+        return list(self)
 
     @property
     def coords(self):
-        all_coords = list()
-        for island in self._islands:
-            all_coords += island.coords
-        return all_coords
+        return self._coords
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    @property
+    def counts(self):
+        return np.diff(self._offsets)
+
+    def signed_areas(self):
+        """ (I,) shoelace area of each island (positive for counter-clockwise islands) """
+        if len(self) == 0:
+            return np.zeros(0)
+        idx = np.arange(len(self._coords))
+        next_idx = np.where(idx + 1 == np.repeat(self._offsets[1:], self.counts), np.repeat(self._offsets[:-1], self.counts), idx + 1)
+        cross = self._coords[:, 0] * self._coords[next_idx, 1] - self._coords[next_idx, 0] * self._coords[:, 1]
+        areas = np.zeros(len(self))
+        nonempty = self.counts > 0
+        if len(cross):
+            areas[nonempty] = 0.5 * np.add.reduceat(cross, self._offsets[:-1][nonempty])
+        return areas
+
+    def simplify(self, epsilon:float):
+        """ new archipelago with each (closed) island simplified by Douglas-Peucker within 'epsilon' """
+        keep = np.concatenate([douglas_peucker(island.coords, epsilon, closed=True) for island in self] or [np.zeros(0, dtype=bool)])
+        kept_counts = np.zeros(len(self), dtype=np.int64)
+        nonempty = self.counts > 0
+        if len(keep):
+            kept_counts[nonempty] = np.add.reduceat(keep.astype(np.int64), self._offsets[:-1][nonempty])
+        arch = Archipelago.from_arrays(self._coords[keep], np.concatenate(([0], np.cumsum(kept_counts))))
+        arch._types = list(self._types)
+        return arch
 
     def to_mesh(self, mesh):
-        bme = bmesh.new()
-        for island in self._islands:
-            island.to_bmesh(bme)
-        return bme.to_mesh(mesh)
+        return _write_edge_mesh(mesh, self._coords, _ring_edges(self._offsets))
 
     def draw_mesh(self):
         m = bpy.data.meshes.new(str(self))
@@ -292,12 +269,24 @@ class Archipelago:
         link_object(obj)
 
     def append(self, island):
-        assert type(island) in (tuple, list, Island)
-        return self._islands.append(island if isinstance(island, Island) else Island(island))
+        assert type(island) in (tuple, list, np.ndarray, Island)
+        island = island if isinstance(island, Island) else Island(island)
+        if self._num_coords == 0:
+            self._coords = island.coords.copy()
+        else:
+            self._coord_buffer = _reserve(self._coord_buffer, self._num_coords + len(island))
+            self._coord_buffer[self._num_coords:self._num_coords + len(island)] = island.coords
+            self._num_coords += len(island)
+        self._offset_buffer = _reserve(self._offset_buffer, self._num_offsets + 1)
+        self._offset_buffer[self._num_offsets] = self._num_coords
+        self._num_offsets += 1
+        self._types.append(island.type)
 
 
 class ArchipelagoSequence:
     """ data type for storing a sequence of Archipelagos """
+    __slots__ = ("_archipelagos",)
+
     def __init__(self, archipelagos=None):
         if archipelagos is None:
             self._archipelagos = list()
@@ -313,22 +302,13 @@ class ArchipelagoSequence:
 
     def __add__(self, other):
         assert isinstance(other, ArchipelagoSequence)
-        new_arch_seq = Archipelago([a for a in self._archipelagos])
-        for arch in other.archipelagos:
-            new_arch_seq.append(arch)
-        return new_arch_seq
+        return ArchipelagoSequence(self._archipelagos + other.archipelagos)
 
-    def __iter__(self):
-        self._idx = 0
-        return self
+    def __getitem__(self, idx:int):
+        return self._archipelagos[idx]
 
-    def __next__(self):
-        if self._idx < len(self._archipelagos):
-            result = self._archipelagos[self._idx]
-            self._idx += 1
-            return result
-        else:
-            raise StopIteration
+    def __iter__(self):
+        return iter(self._archipelagos)
 
     @property
     def archipelagos(self):
@@ -339,6 +319,42 @@ class ArchipelagoSequence:
         return self._archipelagos.append(arch)
 
 
+def trace_contours(frames:np.ndarray, threshold:float, epsilon:float=None):
+    """ outlines of the regions >= 'threshold' in each frame of an (F, H, W) pixel stack (marching squares)
+
+    coordinates are in pixels (pixel centers at whole numbers; outlines touching the image border run along its
+    edge at -0.5 and size - 0.5), outlines are counter-clockwise and tagged 'OUTLINE', holes are clockwise and
+    tagged 'HOLE'; 'epsilon' simplifies every island with Douglas-Peucker
+
+    Returns:
+        list of one Archipelago per frame
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    num_frames, height, width = frames.shape
+    # pad with values just below threshold and the data so every contour closes inside the stack
+    pad_value = min(frames.min(initial=threshold), threshold)
+    pad_value -= 1e-6 * (1 + abs(pad_value))
+    padded = np.pad(frames, ((0, 0), (1, 1), (1, 1)), mode="constant", constant_values=pad_value)
+    seg_edges, seg_coords = marching_squares_segments(padded, threshold)
+    # every crossed pixel edge starts exactly one segment and ends exactly one other
+    by_start = np.argsort(seg_edges[:, 0])
+    next_seg = by_start[np.searchsorted(seg_edges[by_start, 0], seg_edges[:, 1])]
+    order, offsets = trace_segment_loops(next_seg)
+    # loops are traced in segment order, so they come grouped by frame
+    loop_frames = seg_edges[order[offsets[:-1]], 0] // (2 * (width + 2) * (height + 2))
+    frame_loops = np.searchsorted(loop_frames, np.arange(num_frames + 1))
+    # crossings into the padding land on the image border, whatever the range of the pixel values
+    coords = seg_coords[order]
+    np.clip(coords, -0.5, (width - 0.5, height - 0.5), out=coords)
+    archipelagos = list()
+    for f in range(num_frames):
+        frame_offsets = offsets[frame_loops[f]:frame_loops[f + 1] + 1]
+        arch = Archipelago.from_arrays(coords[frame_offsets[0]:frame_offsets[-1]], frame_offsets - frame_offsets[0])
+        arch._types = ["OUTLINE" if area > 0 else "HOLE" for area in arch.signed_areas()]
+        archipelagos.append(arch if epsilon is None else arch.simplify(epsilon))
+    return archipelagos
+
+
 class MyImage:
     """ data type for storing and manipulating images with real-world dimensions """
     def __init__(self, pixels, size=(1, 1), name="Image", dimensions=None, channels=None, display_aspect=(1, 1), file_extension=".png"):
@@ -664,6 +680,11 @@ class MyImage:
         pixels = translate_pixels(old_pixels, translate_x, translate_y, wrap_x, wrap_y, self.size[0], self.size[1], self.channels)
         self.pixels = pixels
 
+    def trace_contours(self, threshold:float=0.5, epsilon:float=None):
+        """ Archipelago of outlines around pixels >= 'threshold' (single channel images only) """
+        assert self._channels == 1, "trace contours on a single channel (see 'get_channel' and 'set_channels')"
+        return trace_contours(self._pixels.reshape(1, self.size[1], self.size[0]), threshold, epsilon)[0]
+
 
 class MyImageSequence:
     """ data type for storing and manipulating sequences of MyImages """
@@ -810,3 +831,9 @@ class MyImageSequence:
     def translate(self, translate_x, translate_y, wrap_x, wrap_y):
         for im in self.images:
             im.translate(translate_x, translate_y, wrap_x, wrap_y)
+
+    def trace_contours(self, threshold:float=0.5, epsilon:float=None):
+        """ ArchipelagoSequence of outlines around pixels >= 'threshold', traced for all frames at once """
+        assert self.channels == 1, "trace contours on a single channel (see 'get_channel' and 'set_channels')"
+        frames = np.stack([im._pixels.reshape(self.size[1], self.size[0]) for im in self.images])
+        return ArchipelagoSequence(trace_contours(frames, threshold, epsilon))
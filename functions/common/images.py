@@ -27,6 +27,7 @@ from mathutils.interpolate import poly_3d_calc
 # Module imports
 from .reporting import b280
 from .maths import *
+from .maths_arrays import *
 from .colors import *
 
 common_pixel_cache = dict()
@@ -214,32 +215,33 @@ def get_uv_coord_in_ref_image(loc, img_obj):
     point   -- 2d sample location
     img_obj -- reference image to sample
     """
-    img_size = Vector(img_obj.data.size)
-    img_off = Vector(img_obj.empty_image_offset)
-    obj_dimensions = Vector((
-        img_obj.empty_display_size,
-        img_obj.empty_display_size * img_size.y / img_size.x,
-    ))
-    obj_dimensions = vec_mult(obj_dimensions, img_obj.scale)
-    relative_loc = loc.xy - img_obj.location.xy
-    pixel_offset = Vector((
-        relative_loc.x * (img_size.x / obj_dimensions.x),
-        relative_loc.y * (img_size.y / obj_dimensions.y),
-    ))
-    pixel_loc = Vector(pixel_offset[:2]) - vec_mult(img_size, img_off)
-    return pixel_loc
+    return Vector(get_uv_coords_in_ref_image([loc[:2]], img_obj)[0])
+
+
+def get_uv_coords_in_ref_image(locs:np.ndarray, img_obj):
+    """ returns (N, 2) pixel coordinates of 2d points 'locs' in a reference image object """
+    img_size = np.array(img_obj.data.size[:2], dtype=np.float64)
+    img_off = np.array(img_obj.empty_image_offset[:2], dtype=np.float64)
+    obj_dimensions = vecs_mult((img_obj.empty_display_size, img_obj.empty_display_size * img_size[1] / img_size[0]), img_obj.scale[:2])
+    relative_locs = as_points(locs)[:, :2] - np.array(img_obj.location[:2])
+    return vecs_mult(relative_locs, img_size / obj_dimensions) - img_size * img_off
+
+
+def get_pixels_at_coords(image, coords:np.ndarray, pixels=None):
+    """ (N, channels) pixel values at (N, 2) pixel coordinates (rounded) in image (no alpha conversion) """
+    pixels = np.asarray(pixels if pixels is not None else get_pixels(image), dtype=np.float32).reshape(-1, image.channels)
+    coords = vecs_round(coords).astype(np.int64)
+    pixel_numbers = image.size[0] * coords[:, 1] + coords[:, 0]
+    assert np.all((pixel_numbers >= 0) & (pixel_numbers < len(pixels)))
+    return pixels[pixel_numbers]
 
 
 def get_1d_pixel_array(pixels, size, channels):
-    pixels_1d = [pixels[i:i + channels] for i in range(0, len(pixels), channels)]
+    pixels_1d = np.asarray(pixels).reshape(-1, channels).tolist()
     return pixels_1d
 
 
 def get_2d_pixel_array(pixels, size, channels):
-    pixels_2d = np.zeros((size[0], size[1], channels)).tolist()
-    for row in range(size[0]):
-        for col in range(size[1]):
-            pixel_number = (col * size[0] + row) * channels
-            pixels_2d[row][col] = pixels[pixel_number:pixel_number + channels]
-
+    """ pixels indexed as [x][y][channel] """
+    pixels_2d = np.asarray(pixels).reshape(size[1], size[0], channels).transpose(1, 0, 2).tolist()
     return pixels_2d
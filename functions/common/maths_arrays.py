@@ -0,0 +1,261 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Vectorized counterparts of the 'vec_*' helpers in maths.py
+
+every function takes (N, k) arrays of points (or anything np.asarray accepts, including a single
+vector, which is treated as N=1) and works on all rows at once; operands broadcast like NumPy arrays
+"""
+
+# System imports
+import types
+import numpy as np
+
+# Blender imports
+from bpy.types import bpy_prop_array
+from mathutils import Vector, Color
+
+
+def as_points(points, dims:int=None):
+    """ points as a float (N, k) array ('dims' columns if given) """
+    points = np.asarray(points, dtype=np.float64)
+    if dims is not None:
+        return points.reshape(-1, dims)
+    return points.reshape(1, -1) if points.ndim < 2 else points
+
+
+def vecs_mult(v1:np.ndarray, v2:np.ndarray):
+    """ componentwise multiplication for rows of points """
+    return as_points(v1) * np.asarray(v2, dtype=np.float64)
+
+
+def vecs_div(v1:np.ndarray, v2:np.ndarray):
+    """ componentwise division for rows of points """
+    return as_points(v1) / np.asarray(v2, dtype=np.float64)
+
+
+def vecs_mod(v1:np.ndarray, v2:np.ndarray):
+    """ componentwise modulo for rows of points """
+    return np.mod(as_points(v1), np.asarray(v2, dtype=np.float64))
+
+
+def vecs_abs(v1:np.ndarray):
+    """ componentwise absolute value for rows of points """
+    return np.abs(as_points(v1))
+
+
+def vecs_clamp(v1:np.ndarray, low:float=0, high:float=1):
+    """ componentwise clamping of rows of points to the 'low'..'high' range """
+    return np.clip(as_points(v1), low, high)
+
+
+def vecs_conv(v1:np.ndarray, inner_type:type=int):
+    """ convert type of items in rows of points """
+    return as_points(v1).astype(inner_type)
+
+
+def vecs_round(v1:np.ndarray, precision:int=0, round_type:str="ROUND"):
+    """ round items in rows of points """
+    v1 = as_points(v1)
+    if round_type == "ROUND":
+        return np.round(v1, precision)
+    prec = 10**precision
+    if round_type == "FLOOR":
+        return np.floor(v1 * prec) / prec
+    elif round_type in ("CEILING", "CEIL"):
+        return np.ceil(v1 * prec) / prec
+    else:
+        raise Exception("Argument passed to 'round_type' parameter invalid: " + str(round_type))
+
+
+def vecs_length(v1:np.ndarray):
+    """ (N,) lengths of rows of vectors """
+    return np.linalg.norm(as_points(v1), axis=1)
+
+
+def vecs_dist(v1:np.ndarray, v2:np.ndarray):
+    """ (N,) distances between corresponding rows of points """
+    return np.linalg.norm(as_points(v1) - as_points(v2), axis=1)
+
+
+def vecs_interp(v1:np.ndarray, v2:np.ndarray, fac):
+    """ linear interpolation between rows of points ('fac' may be a scalar or one value per row) """
+    fac = np.asarray(fac, dtype=np.float64)
+    if fac.ndim == 1:
+        fac = fac.reshape(-1, 1)
+    return as_points(v1) * (1 - fac) + as_points(v2) * fac
+
+
+def points_center(points:np.ndarray):
+    """ mean of (N, k) points """
+    return as_points(points).mean(axis=0)
+
+
+def points_bounds(points:np.ndarray):
+    """ (k, 2) low and high value of (N, k) points along each axis """
+    points = as_points(points)
+    return np.stack((points.min(axis=0), points.max(axis=0)), axis=1)
+
+
+def round_nearest_array(nums:np.ndarray, divisor:float, round_type:str="ROUND"):
+    """ round each item to nearest multiple of 'divisor' """
+    nums = np.asarray(nums, dtype=np.float64)
+    if round_type == "FLOOR":
+        return np.floor(nums / divisor) * divisor
+    elif round_type in ("CEILING", "CEIL"):
+        return np.ceil(nums / divisor) * divisor
+    return np.round(nums / divisor) * divisor
+
+
+def douglas_peucker(points:np.ndarray, epsilon:float, closed:bool=False):
+    """ (N,) mask of points kept by Douglas-Peucker simplification of a polyline within 'epsilon'
+
+    distances to each chord are computed for the whole span at once; closed polylines are split at
+    the point farthest from the first one
+    """
+    points = as_points(points)
+    num_points = len(points)
+    keep = np.ones(num_points, dtype=bool)
+    if num_points < 3:
+        return keep
+    if closed:
+        points = np.concatenate((points, points[:1]))
+        far = int(np.argmax(vecs_dist(points, points[0])))
+        spans = [(0, far), (far, num_points)]
+    else:
+        spans = [(0, num_points - 1)]
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[s for span in spans for s in span]] = True
+    while spans:
+        start, end = spans.pop()
+        if end - start < 2:
+            continue
+        offsets = points[start + 1:end] - points[start]
+        chord = points[end] - points[start]
+        chord_length = np.linalg.norm(chord)
+        if chord_length > 0:
+            chord = chord / chord_length
+            offsets = offsets - np.outer(offsets @ chord, chord)
+        dists = vecs_length(offsets)
+        i = int(np.argmax(dists))
+        if dists[i] > epsilon:
+            mid = start + 1 + i
+            keep[mid] = True
+            spans += [(start, mid), (mid, end)]
+    return keep[:num_points]
+
+
+class Vector2:
+    """ Implementation of the mathutils 'Vector' data type that supports double precision
+
+    use the 'vecs_*' functions on (N, k) arrays when working with many points at once
+    """
+    __slots__ = ("_seq",)
+
+    def __init__(self, value=(0, 0, 0)):
+        assert type(value) in (tuple, list, Vector, Vector2, types.GeneratorType, bpy_prop_array, np.ndarray)
+        if type(value) in (Vector, Color, bpy_prop_array):
+            self._seq = [round(i, 6) for i in value]
+        else:
+            self._seq = [float(i) for i in value]
+
+    def __str__(self):
+        return "<Vector2(" + str(tuple(self._seq)) + ")>"
+
+    def __repr__(self):
+        return str(self)
+
+    def _other_seq(self, other):
+        if isinstance(other, (int, float)):
+            return [other] * len(self._seq)
+        assert len(self) == len(other)
+        return other
+
+    def __add__(self, other):
+        return Vector2([e1 + e2 for e1, e2 in zip(self._seq, self._other_seq(other))])
+
+    def __sub__(self, other):
+        return Vector2([e1 - e2 for e1, e2 in zip(self._seq, self._other_seq(other))])
+
+    def __mul__(self, other):
+        return Vector2([e1 * e2 for e1, e2 in zip(self._seq, self._other_seq(other))])
+
+    def __truediv__(self, other):
+        return Vector2([e1 / e2 for e1, e2 in zip(self._seq, self._other_seq(other))])
+
+    def __eq__(self, other):
+        return len(self) == len(other) and all(e1 == e2 for e1, e2 in zip(self._seq, other))
+
+    def __len__(self):
+        return len(self._seq)
+
+    def __getitem__(self, val):
+        return self._seq[val]
+
+    def __setitem__(self, key, value):
+        self._seq[key] = value
+
+    def __iter__(self):
+        return iter(self._seq)
+
+    def length(self):
+        return len(self._seq)
+
+    def to_list(self):
+        return self._seq.copy()
+
+    def to_tuple(self):
+        return tuple(self._seq)
+
+    def to_array(self):
+        return np.array(self._seq, dtype=np.float64)
+
+    @property
+    def x(self):
+        return self._seq[0]
+
+    @x.setter
+    def x(self, value):
+        self._seq[0] = value
+
+    @property
+    def y(self):
+        return self._seq[1]
+
+    @y.setter
+    def y(self, value):
+        self._seq[1] = value
+
+    @property
+    def z(self):
+        if len(self._seq) < 3:
+            raise AttributeError("unavailable on 2d vector")
+        return self._seq[2]
+
+    @z.setter
+    def z(self, value):
+        self._seq[2] = value
+
+    @property
+    def xy(self):
+        return Vector2(self._seq[:2])
+
+    @xy.setter
+    def xy(self, value):
+        self.x = value[0]
+        self.y = value[1]
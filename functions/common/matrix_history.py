@@ -0,0 +1,111 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+from collections import deque
+import numpy as np
+
+# Blender imports
+# NONE!
+
+# Module imports
+# NONE!
+
+
+class MatrixHistory:
+    """ bounded undo/redo history of (N, 4, 4) transform arrays
+
+    Only the rows that changed between two commits are stored, as full 3x4 float64
+    'before' and 'after' blocks rather than deltas, so undo and redo restore the exact
+    transforms that were committed; each step costs ~200 bytes per moved object.
+    The oldest steps are dropped once 'max_steps' or 'max_bytes' is exceeded.
+    """
+    def __init__(self, matrices:np.ndarray, max_steps:int=256, max_bytes:int=64 * 1024 * 1024, epsilon:float=1e-6):
+        self._current = self._compact(matrices)
+        self._undo = deque()
+        self._redo = list()
+        self._nbytes = 0
+        self.max_steps = max_steps
+        self.max_bytes = max_bytes
+        self.epsilon = epsilon
+
+    def __len__(self):
+        return len(self._undo)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    @property
+    def can_undo(self):
+        return len(self._undo) > 0
+
+    @property
+    def can_redo(self):
+        return len(self._redo) > 0
+
+    @staticmethod
+    def _compact(matrices):
+        return np.array(matrices, dtype=np.float64).reshape(-1, 4, 4)[:, :3, :].copy()
+
+    @staticmethod
+    def _expand(rows):
+        matrices = np.zeros((len(rows), 4, 4), dtype=np.float64)
+        matrices[:, :3, :] = rows
+        matrices[:, 3, 3] = 1
+        return matrices
+
+    @staticmethod
+    def _step_bytes(step):
+        return sum(a.nbytes for a in step)
+
+    def commit(self, matrices:np.ndarray):
+        """ record rows of 'matrices' that changed since the last commit (returns True if anything changed) """
+        matrices = self._compact(matrices)
+        changed = np.flatnonzero((np.abs(matrices - self._current) > self.epsilon).reshape(len(matrices), -1).any(axis=1))
+        if len(changed) == 0:
+            return False
+        step = (changed.astype(np.int32), self._current[changed], matrices[changed])
+        self._current = matrices
+        self._undo.append(step)
+        self._nbytes += self._step_bytes(step)
+        self._redo.clear()
+        while self._undo and (len(self._undo) > self.max_steps or self._nbytes > self.max_bytes):
+            self._nbytes -= self._step_bytes(self._undo.popleft())
+        return True
+
+    def undo(self):
+        """ step back once; returns (indices, (K, 4, 4) matrices) to restore, or None """
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        self._nbytes -= self._step_bytes(step)
+        self._redo.append(step)
+        indices, before, _ = step
+        self._current[indices] = before
+        return indices, self._expand(before)
+
+    def redo(self):
+        """ step forward once; returns (indices, (K, 4, 4) matrices) to restore, or None """
+        if not self._redo:
+            return None
+        step = self._redo.pop()
+        self._undo.append(step)
+        self._nbytes += self._step_bytes(step)
+        indices, _, after = step
+        self._current[indices] = after
+        return indices, self._expand(after)
@@ -0,0 +1,106 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Boundary and non-manifold analysis from polygon arrays
+
+edges are derived from the polygons themselves (pairs of consecutive loop verts, counted with np.unique),
+so the results do not depend on Mesh.edges and loose edges are ignored
+"""
+
+# System imports
+import numpy as np
+
+# Blender imports
+from bpy.types import Mesh
+
+# Module imports
+from .mesh_arrays import read_mesh_polygons, polygon_ordered_loop_verts
+from .mesh_bridge import order_edge_chains
+
+
+def polygon_edges(loop_starts:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray):
+    """ unique edges of polygons and the number of polygons using each
+
+    Returns:
+        (E, 2) edge verts (lower index first), (E,) face counts, (L,) edge of every polygon-ordered loop
+    """
+    loop_totals = np.asarray(loop_totals, dtype=np.int64)
+    loop_verts = polygon_ordered_loop_verts(np.asarray(loop_starts, dtype=np.int64), loop_totals, np.asarray(loop_verts, dtype=np.int64))
+    # next vert around each polygon
+    starts = np.repeat(np.cumsum(loop_totals) - loop_totals, loop_totals)
+    totals = np.repeat(loop_totals, loop_totals)
+    next_verts = loop_verts[starts + (np.arange(len(loop_verts)) - starts + 1) % np.maximum(totals, 1)]
+    a = np.minimum(loop_verts, next_verts)
+    b = np.maximum(loop_verts, next_verts)
+    num_verts = int(b.max()) + 1 if len(b) else 1
+    keys, loop_edges, counts = np.unique(a * num_verts + b, return_inverse=True, return_counts=True)
+    edge_verts = np.stack(np.divmod(keys, num_verts), axis=1)
+    return edge_verts, counts, loop_edges.reshape(-1)
+
+
+def boundary_edges(loop_starts:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray):
+    """ (K, 2) verts of edges used by a single polygon """
+    edge_verts, counts, _ = polygon_edges(loop_starts, loop_totals, loop_verts)
+    return edge_verts[counts == 1]
+
+
+def non_manifold_edges(loop_starts:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray):
+    """ (K, 2) verts of edges used by more than two polygons """
+    edge_verts, counts, _ = polygon_edges(loop_starts, loop_totals, loop_verts)
+    return edge_verts[counts > 2]
+
+
+def boundary_loops(loop_starts:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray):
+    """ ordered vert chains along the open borders of the mesh (and their closed flags) """
+    vert_chains, _, closed = order_edge_chains(boundary_edges(loop_starts, loop_totals, loop_verts))
+    return vert_chains, closed
+
+
+def region_boundary_edges(loop_starts:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray, face_mask:np.ndarray):
+    """ (K, 2) verts of edges bordering the polygons where 'face_mask' is True
+
+    an edge borders the region if it is used by region and non-region polygons, or by a single region polygon
+    """
+    edge_verts, counts, loop_edges = polygon_edges(loop_starts, loop_totals, loop_verts)
+    loop_in_region = np.repeat(np.asarray(face_mask, dtype=bool), loop_totals)
+    region_counts = np.bincount(loop_edges, weights=loop_in_region, minlength=len(edge_verts))
+    border = (region_counts > 0) & ((region_counts < counts) | (counts == 1))
+    return edge_verts[border]
+
+
+def region_boundary_loops(loop_starts:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray, face_mask:np.ndarray):
+    """ ordered vert chains around the polygons where 'face_mask' is True (and their closed flags) """
+    vert_chains, _, closed = order_edge_chains(region_boundary_edges(loop_starts, loop_totals, loop_verts, face_mask))
+    return vert_chains, closed
+
+
+def mesh_health(mesh:Mesh):
+    """ boundary and non-manifold edge counts of mesh polygons
+
+    Returns:
+        dictionary with keys 'num_edges', 'num_boundary_edges', 'num_non_manifold_edges' and 'is_closed_manifold'
+    """
+    _, counts, _ = polygon_edges(*read_mesh_polygons(mesh))
+    num_boundary = int(np.count_nonzero(counts == 1))
+    num_non_manifold = int(np.count_nonzero(counts > 2))
+    return {
+        "num_edges": len(counts),
+        "num_boundary_edges": num_boundary,
+        "num_non_manifold_edges": num_non_manifold,
+        "is_closed_manifold": len(counts) > 0 and num_boundary == 0 and num_non_manifold == 0,
+    }
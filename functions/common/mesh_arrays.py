@@ -0,0 +1,145 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+# Blender imports
+import bpy
+from bpy.types import Mesh
+
+# Module imports
+# NONE!
+
+# global vars
+# (name and element counts, mesh_hash) of recently hashed meshes keyed by mesh pointer (least recently used first)
+mesh_hash_cache = OrderedDict()
+mesh_hash_cache_size = 256
+
+
+def read_mesh_coords(mesh:Mesh):
+    """ read vertex coordinates of mesh into an (N, 3) float array """
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    return coords.reshape(-1, 3)
+
+
+def read_mesh_polygons(mesh:Mesh):
+    """ read polygon loop data of mesh into flat int arrays (loop_starts, loop_totals, loop_verts) """
+    num_polys = len(mesh.polygons)
+    loop_starts = np.empty(num_polys, dtype=np.int32)
+    loop_totals = np.empty(num_polys, dtype=np.int32)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    return loop_starts, loop_totals, loop_verts
+
+
+def mesh_hash(mesh:Mesh):
+    """ hash of mesh geometry (vertex coordinates and polygon topology) """
+    loop_starts, loop_totals, loop_verts = read_mesh_polygons(mesh)
+    hasher = hashlib.md5()
+    hasher.update(read_mesh_coords(mesh).tobytes())
+    hasher.update(loop_totals.tobytes())
+    hasher.update(loop_verts.tobytes())
+    return hasher.hexdigest()
+
+
+def cached_mesh_hash(mesh:Mesh):
+    """ 'mesh_hash' of mesh, reused until its name or element counts change or 'clear_mesh_hash_cache' is called
+
+    hashing reads all of the geometry, so register a depsgraph handler that clears the cached hash of meshes
+    whose geometry is updated (see 'handle_mesh_hash_cache')
+    """
+    key = mesh.as_pointer()
+    stamp = (mesh.name, len(mesh.vertices), len(mesh.edges), len(mesh.polygons), len(mesh.loops))
+    cached = mesh_hash_cache.get(key)
+    if cached is None or cached[0] != stamp:
+        cached = mesh_hash_cache[key] = (stamp, mesh_hash(mesh))
+        while len(mesh_hash_cache) > mesh_hash_cache_size:
+            mesh_hash_cache.popitem(last=False)
+    mesh_hash_cache.move_to_end(key)
+    return cached[1]
+
+
+def clear_mesh_hash_cache(mesh:Mesh=None):
+    """ forget cached hash of mesh (of all meshes if None) """
+    if mesh is None:
+        mesh_hash_cache.clear()
+    else:
+        mesh_hash_cache.pop(mesh.as_pointer(), None)
+
+
+def new_mesh_from_arrays(name:str, coords:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray, edges:np.ndarray=None, smooth:np.ndarray=None):
+    """ create new mesh from flat vertex/polygon arrays in bulk (no per-element bmesh calls)
+
+    'edges' adds (K, 2) edges besides the polygon edges, 'smooth' sets use_smooth per polygon
+    """
+    m = bpy.data.meshes.new(name)
+    m.vertices.add(len(coords))
+    m.vertices.foreach_set("co", np.asarray(coords, dtype=np.float32).ravel())
+    if edges is not None and len(edges):
+        m.edges.add(len(edges))
+        m.edges.foreach_set("vertices", np.asarray(edges, dtype=np.int32).ravel())
+    m.loops.add(len(loop_verts))
+    m.loops.foreach_set("vertex_index", np.asarray(loop_verts, dtype=np.int32))
+    m.polygons.add(len(loop_totals))
+    m.polygons.foreach_set("loop_start", (np.cumsum(loop_totals) - loop_totals).astype(np.int32))
+    m.polygons.foreach_set("loop_total", np.asarray(loop_totals, dtype=np.int32))
+    if smooth is not None:
+        m.polygons.foreach_set("use_smooth", np.asarray(smooth, dtype=bool))
+    # existing (loose) edges are kept when calculating the polygon edges
+    m.update(calc_edges=True)
+    return m
+
+
+def polygon_ordered_loop_verts(loop_starts:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray):
+    """ loop_verts reordered by polygon, so loop_starts can be rebuilt from loop_totals """
+    group_start = np.repeat(np.cumsum(loop_totals) - loop_totals, loop_totals)
+    return loop_verts[np.repeat(loop_starts, loop_totals) + np.arange(len(group_start)) - group_start]
+
+
+def join_mesh_arrays(objs:list, matrix=None, meshes:list=None):
+    """ concatenate geometry of mesh objects into flat arrays (coords, loop_totals, loop_verts)
+
+    Parameters:
+        objs (list): objects whose matrix_world places their geometry
+        matrix (Matrix, None): space of the result (world space if None)
+        meshes (list, None): mesh data to read for each object (defaults to obj.data)
+
+    Returns:
+        (coords, loop_totals, loop_verts)
+    """
+    to_target = np.eye(4) if matrix is None else np.linalg.inv(np.array(matrix, dtype=np.float64))
+    meshes = meshes or [obj.data for obj in objs]
+    all_coords, all_totals, all_verts = [], [], []
+    vert_offset = 0
+    for obj, mesh in zip(objs, meshes):
+        # one matrix multiply per object
+        mx = to_target @ np.array(obj.matrix_world, dtype=np.float64)
+        coords = read_mesh_coords(mesh)
+        loop_starts, loop_totals, loop_verts = read_mesh_polygons(mesh)
+        all_coords.append(coords @ mx[:3, :3].T + mx[:3, 3])
+        all_totals.append(loop_totals)
+        all_verts.append(polygon_ordered_loop_verts(loop_starts, loop_totals, loop_verts) + vert_offset)
+        vert_offset += len(coords)
+    if not all_coords:
+        return np.empty((0, 3)), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+    return np.concatenate(all_coords), np.concatenate(all_totals), np.concatenate(all_verts)
@@ -0,0 +1,589 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+import hashlib
+import heapq
+from collections import OrderedDict
+import numpy as np
+
+# Blender imports
+import bpy
+from bpy.types import Mesh
+from bmesh.types import BMesh
+
+# Module imports
+from .mesh_arrays import read_mesh_coords, read_mesh_polygons
+
+# global vars
+# MeshTopology keyed by geometry hash (least recently used first)
+topology_cache = OrderedDict()
+topology_cache_size = 16
+
+
+class CSRAdjacency:
+    """ compressed sparse row adjacency: neighbors of row i are indices[offsets[i]:offsets[i + 1]] """
+    __slots__ = ("offsets", "indices")
+
+    def __init__(self, offsets:np.ndarray, indices:np.ndarray):
+        self.offsets = offsets
+        self.indices = indices
+
+    @classmethod
+    def from_pairs(cls, rows:np.ndarray, cols:np.ndarray, num_rows:int, unique:bool=False):
+        """ build adjacency from parallel (row, col) arrays (duplicate pairs removed if 'unique') """
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        cols = np.asarray(cols, dtype=np.int64).reshape(-1)
+        if unique and len(rows) > 0:
+            keys = np.unique(rows * max(int(cols.max()) + 1, 1) + cols)
+            rows, cols = np.divmod(keys, max(int(cols.max()) + 1, 1))
+        order = np.argsort(rows, kind="stable")
+        counts = np.bincount(rows, minlength=num_rows)
+        offsets = np.zeros(num_rows + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(offsets, cols[order].astype(np.int32))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i:int):
+        return self.indices[self.offsets[i]:self.offsets[i + 1]]
+
+    @property
+    def counts(self):
+        return np.diff(self.offsets)
+
+    def rows(self):
+        """ row index of every entry in 'indices' """
+        return np.repeat(np.arange(len(self), dtype=np.int32), self.counts)
+
+    def gather(self, rows:np.ndarray):
+        """ concatenated neighbors of 'rows' (with repeats) """
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        starts = self.offsets[rows]
+        counts = self.offsets[rows + 1] - starts
+        group_start = np.repeat(np.cumsum(counts) - counts, counts)
+        return self.indices[np.repeat(starts, counts) + np.arange(counts.sum()) - group_start]
+
+
+class MeshTopology:
+    """ typed NumPy arrays of mesh geometry with lazily derived CSR adjacency
+
+    element indices match 'Mesh.vertices/edges/polygons' (or 'BMesh.verts/edges/faces' for 'from_bmesh')
+    """
+    __slots__ = ("coords", "edges", "loop_verts", "loop_edges", "loop_starts", "loop_totals", "_adjacency")
+
+    def __init__(self, coords:np.ndarray, edges:np.ndarray, loop_verts:np.ndarray, loop_edges:np.ndarray, loop_starts:np.ndarray, loop_totals:np.ndarray):
+        self.coords = coords
+        self.edges = edges
+        self.loop_verts = loop_verts
+        self.loop_edges = loop_edges
+        self.loop_starts = loop_starts
+        self.loop_totals = loop_totals
+        self._adjacency = dict()
+
+    @classmethod
+    def from_mesh(cls, mesh:Mesh):
+        """ read mesh data with foreach_get """
+        coords = read_mesh_coords(mesh)
+        loop_starts, loop_totals, loop_verts = read_mesh_polygons(mesh)
+        edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+        mesh.edges.foreach_get("vertices", edges)
+        loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("edge_index", loop_edges)
+        return cls(coords, edges.reshape(-1, 2), loop_verts, loop_edges, loop_starts, loop_totals)
+
+    @classmethod
+    def from_bmesh(cls, bme:BMesh):
+        """ read bmesh data through a temporary mesh (to_mesh keeps vert/edge/face order)
+
+        to_mesh copies the whole BMesh (including layers) in C, which is still far cheaper than reading its
+        elements one at a time in Python, but it is the main cost of 'mesh_topology' for a BMesh
+        """
+        mesh = bpy.data.meshes.new("mesh_bridge_tmp")
+        try:
+            bme.to_mesh(mesh)
+            return cls.from_mesh(mesh)
+        finally:
+            bpy.data.meshes.remove(mesh)
+
+    @property
+    def num_verts(self):
+        return len(self.coords)
+
+    @property
+    def num_edges(self):
+        return len(self.edges)
+
+    @property
+    def num_faces(self):
+        return len(self.loop_totals)
+
+    @property
+    def loop_faces(self):
+        """ face index of every loop """
+        return self._cached("loop_faces", self._build_loop_faces)
+
+    def _build_loop_faces(self):
+        group_start = np.repeat(np.cumsum(self.loop_totals) - self.loop_totals, self.loop_totals)
+        loops = np.repeat(self.loop_starts, self.loop_totals) + np.arange(len(group_start)) - group_start
+        loop_faces = np.empty(len(self.loop_verts), dtype=np.int32)
+        loop_faces[loops] = np.repeat(np.arange(self.num_faces, dtype=np.int32), self.loop_totals)
+        return loop_faces
+
+    def _cached(self, key:str, build):
+        value = self._adjacency.get(key)
+        if value is None:
+            value = self._adjacency[key] = build()
+        return value
+
+    def geometry_hash(self):
+        return topology_hash(self.coords, self.edges, self.loop_totals, self.loop_verts)
+
+    ################################################
+    # adjacency
+
+    @property
+    def vert_verts(self):
+        """ vertices sharing an edge with each vertex """
+        return self._cached("vert_verts", lambda: CSRAdjacency.from_pairs(self.edges.ravel(), self.edges[:, ::-1].ravel(), self.num_verts))
+
+    @property
+    def vert_edges(self):
+        return self._cached("vert_edges", lambda: CSRAdjacency.from_pairs(self.edges.ravel(), np.repeat(np.arange(self.num_edges), 2), self.num_verts))
+
+    @property
+    def vert_faces(self):
+        return self._cached("vert_faces", lambda: CSRAdjacency.from_pairs(self.loop_verts, self.loop_faces, self.num_verts, unique=True))
+
+    @property
+    def edge_faces(self):
+        return self._cached("edge_faces", lambda: CSRAdjacency.from_pairs(self.loop_edges, self.loop_faces, self.num_edges))
+
+    @property
+    def face_faces(self):
+        """ faces sharing an edge with each face """
+        return self._cached("face_faces", lambda: self._faces_through(self.edge_faces))
+
+    @property
+    def face_faces_by_vert(self):
+        """ faces sharing a vertex with each face """
+        return self._cached("face_faces_by_vert", lambda: self._faces_through(self.vert_faces))
+
+    def face_faces_through(self, edge_mask:np.ndarray):
+        """ faces sharing an edge with each face, through edges where 'edge_mask' is True only (not cached) """
+        keep = np.asarray(edge_mask, dtype=bool)[self.loop_edges]
+        return self._faces_through(CSRAdjacency.from_pairs(self.loop_edges[keep], self.loop_faces[keep], self.num_edges))
+
+    def face_parts_between_edges(self, edge_mask:np.ndarray):
+        """ loose part label of every face, linking faces only through edges where 'edge_mask' is True """
+        a, b = _chain_pairs(self.edge_faces, row_mask=np.asarray(edge_mask, dtype=bool))
+        return connected_components(self.num_faces, a, b)
+
+    def loose_parts(self, item_type:str="faces", mask:np.ndarray=None):
+        """ loose part label of every vert/edge/face (-1 where 'mask' is False)
+
+        verts are linked by edges, edges by shared verts and faces by shared edges;
+        with a mask, only masked elements are linked (parts are split where the mask is)
+        """
+        num_elements = {"verts": self.num_verts, "edges": self.num_edges, "faces": self.num_faces}[item_type]
+        mask = None if mask is None else np.asarray(mask, dtype=bool)
+        if item_type == "verts":
+            a, b = self.edges[:, 0], self.edges[:, 1]
+            if mask is not None:
+                keep = mask[a] & mask[b]
+                a, b = a[keep], b[keep]
+        elif item_type == "edges":
+            a, b = _chain_pairs(self.vert_edges, mask)
+        else:
+            a, b = _chain_pairs(self.edge_faces, mask)
+        if mask is None:
+            return connected_components(num_elements, a, b)
+        labels = np.full(num_elements, -1, dtype=np.int64)
+        labels[mask] = connected_components(num_elements, a, b)[mask]
+        labels[mask] = np.unique(labels[mask], return_inverse=True)[1].reshape(-1)
+        return labels
+
+    ################################################
+    # geodesics
+
+    @property
+    def vert_vert_lengths(self):
+        """ edge length of every 'vert_verts' entry """
+        return self._cached("vert_vert_lengths", lambda: np.linalg.norm(self.coords[self.vert_verts.indices] - self.coords[self.vert_verts.rows()], axis=1))
+
+    def geodesic_distances(self, sources:np.ndarray, source_distances:np.ndarray=None, max_distance:float=None):
+        """ distance along edges from the nearest source vert to every vert (inf where unreached)
+
+        'source_distances' offsets the sources (e.g. distances from a surface point to the verts of its face);
+        the search stops expanding past 'max_distance'
+        """
+        return dijkstra(self.vert_verts, self.vert_vert_lengths, sources, source_distances, max_distance)
+
+    def distance_region(self, distances:np.ndarray, max_distance:float, item_type:str="verts"):
+        """ mask of verts within 'max_distance', or of edges/faces with all of their verts within it """
+        inside = np.asarray(distances) <= max_distance
+        if item_type == "verts":
+            return inside
+        if item_type == "edges":
+            return inside[self.edges].all(axis=1)
+        outside_loops = np.bincount(self.loop_faces, weights=~inside[self.loop_verts], minlength=self.num_faces)
+        return outside_loops == 0
+
+    def iso_lines(self, values:np.ndarray, level:float):
+        """ polylines where per-vert 'values' (e.g. geodesic distances) cross 'level'
+
+        Returns:
+            (list of (P, 3) point arrays, list of closed flags, list of crossed edge index arrays);
+            closed lines repeat their first point at the end
+        """
+        values = np.asarray(values, dtype=np.float64)
+        below = values[self.edges] < level
+        crossing = (below[:, 0] != below[:, 1]) & np.isfinite(values[self.edges]).all(axis=1)
+        # crossing loops of each face, in face order, link up as consecutive pairs
+        loops = np.flatnonzero(crossing[self.loop_edges])
+        loops = loops[np.argsort(self.loop_faces[loops], kind="stable")]
+        loop_faces = self.loop_faces[loops]
+        counts = np.bincount(loop_faces, minlength=self.num_faces)
+        even = (counts[loop_faces] % 2) == 0
+        segments = self.loop_edges[loops[even]].reshape(-1, 2)
+        crossed_chains, _, closed = order_edge_chains(segments)
+        # interpolate crossing points along their edges
+        v0, v1 = self.edges[:, 0], self.edges[:, 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(crossing, (level - values[v0]) / (values[v1] - values[v0]), 0)
+        points = self.coords[v0] + t[:, None] * (self.coords[v1] - self.coords[v0])
+        return [points[chain] for chain in crossed_chains], closed, [np.array(chain) for chain in crossed_chains]
+
+    ################################################
+    # loop walking
+
+    @property
+    def edge_loops(self):
+        """ loops using each edge """
+        return self._cached("edge_loops", lambda: CSRAdjacency.from_pairs(self.loop_edges, np.arange(len(self.loop_edges)), self.num_edges))
+
+    @property
+    def loop_next(self):
+        """ next loop around the face of every loop """
+        return self._cached("loop_next", self._build_loop_next)
+
+    def _build_loop_next(self):
+        loop_faces = self.loop_faces
+        starts = self.loop_starts[loop_faces]
+        return (starts + (np.arange(len(loop_faces)) - starts + 1) % self.loop_totals[loop_faces]).astype(np.int32)
+
+    @property
+    def loop_radial(self):
+        """ other loop of the same edge for every loop of a manifold edge (-1 for other loops) """
+        return self._cached("loop_radial", self._build_loop_radial)
+
+    def _build_loop_radial(self):
+        edge_loops = self.edge_loops
+        radial = np.full(len(self.loop_edges), -1, dtype=np.int32)
+        manifold = np.flatnonzero(edge_loops.counts == 2)
+        first = edge_loops.indices[edge_loops.offsets[manifold]]
+        second = edge_loops.indices[edge_loops.offsets[manifold] + 1]
+        radial[first] = second
+        radial[second] = first
+        return radial
+
+    def quad_face_loops(self, seed_edges:np.ndarray):
+        """ face loop (and the edge ring it crosses) through each seed edge, walking all seeds at once
+
+        walks step from a quad across its opposite edge into the next face; they stop at
+        boundary or non-manifold edges and after entering a face that is not a quad (that face
+        is part of the loop)
+
+        Returns:
+            (list of face index arrays, list of ring edge index arrays, list of closed flags), one per seed;
+            ring edges start at the seed edge unless the loop extends both ways from it
+        """
+        seed_edges = np.asarray(seed_edges, dtype=np.int64).reshape(-1)
+        quad = self.loop_totals == 4
+        loop_next, loop_radial, loop_faces = self.loop_next, self.loop_radial, self.loop_faces
+        edge_loops = self.edge_loops
+        # one walker per quad on each side of a seed edge
+        counts = edge_loops.counts[seed_edges]
+        seeds = np.repeat(np.arange(len(seed_edges)), np.minimum(counts, 2))
+        sides = np.arange(len(seeds)) - np.repeat(np.cumsum(np.minimum(counts, 2)) - np.minimum(counts, 2), np.minimum(counts, 2))
+        start_loops = edge_loops.indices[edge_loops.offsets[seed_edges[seeds]] + sides]
+        keep = quad[loop_faces[start_loops]] & (counts[seeds] <= 2)
+        seeds, sides, start_loops = seeds[keep], sides[keep], start_loops[keep]
+        start_faces = loop_faces[start_loops]
+
+        # record (walker, face, edge) per step
+        walker_ids, step_faces, step_edges = [np.arange(len(seeds))], [start_faces], [self.loop_edges[start_loops]]
+        closed = np.zeros(len(seeds), dtype=bool)
+        active = np.arange(len(seeds))
+        cur = start_loops
+        while len(active):
+            opposite = loop_next[loop_next[cur]]
+            nxt = loop_radial[opposite]
+            walker_ids.append(active)
+            step_faces.append(np.full(len(active), -1, dtype=np.int32))
+            step_edges.append(self.loop_edges[opposite])
+            ok = nxt >= 0
+            faces = np.where(ok, loop_faces[nxt], -1)
+            # back in the start face: closed if the walk came around through the seed edge
+            returned = ok & (faces == start_faces[active])
+            closed[active[returned & (nxt == start_loops[active])]] = True
+            ok &= ~returned
+            step_faces[-1] = np.where(ok, faces, -1)
+            # a walk ends in the first face that is not a quad
+            ok &= quad[np.maximum(faces, 0)]
+            active, cur = active[ok], nxt[ok]
+
+        # gather the steps of each walker in order
+        walker_ids = np.concatenate(walker_ids)
+        order = np.argsort(walker_ids, kind="stable")
+        splits = np.cumsum(np.bincount(walker_ids, minlength=len(seeds)))[:-1]
+        walker_faces = np.split(np.concatenate(step_faces)[order], splits)
+        walker_edges = np.split(np.concatenate(step_edges)[order], splits)
+
+        face_loops, edge_rings, loop_closed = [], [], []
+        first_walkers = np.searchsorted(seeds, np.arange(len(seed_edges)), side="left")
+        last_walkers = np.searchsorted(seeds, np.arange(len(seed_edges)), side="right")
+        for i in range(len(seed_edges)):
+            walkers = range(first_walkers[i], last_walkers[i])
+            fs, eds = [np.empty(0, dtype=np.int32)] * 2
+            is_closed = False
+            if len(walkers):
+                w = walkers[0]
+                is_closed = bool(closed[w])
+                fs = walker_faces[w][walker_faces[w] >= 0]
+                # a closed walk ends by crossing the seed edge again
+                eds = walker_edges[w][:-1] if is_closed else walker_edges[w]
+                if len(walkers) == 2 and not is_closed:
+                    w2 = walkers[1]
+                    fs = np.concatenate((walker_faces[w2][walker_faces[w2] >= 0][::-1], fs))
+                    eds = np.concatenate((walker_edges[w2][1:][::-1], eds))
+            face_loops.append(fs)
+            edge_rings.append(eds)
+            loop_closed.append(is_closed)
+        return face_loops, edge_rings, loop_closed
+
+    def _faces_through(self, element_faces:CSRAdjacency):
+        # pair up every two faces linked to the same element
+        counts = element_faces.counts
+        faces = element_faces.indices
+        rows = np.repeat(faces, np.repeat(counts, counts))
+        cols = element_faces.gather(element_faces.rows())
+        keep = rows != cols
+        return CSRAdjacency.from_pairs(rows[keep], cols[keep], self.num_faces, unique=True)
+
+
+def dijkstra(adjacency:CSRAdjacency, weights:np.ndarray, sources:np.ndarray, source_distances:np.ndarray=None, max_distance:float=None):
+    """ multi-source shortest path distance to every row of 'adjacency' ('weights' per adjacency entry, inf where unreached) """
+    sources = np.asarray(sources, dtype=np.int64).reshape(-1)
+    source_distances = np.zeros(len(sources)) if source_distances is None else np.asarray(source_distances, dtype=np.float64).reshape(-1)
+    limit = np.inf if max_distance is None else max_distance
+    # plain lists are much faster than arrays for the scalar inner loop
+    offsets = adjacency.offsets.tolist()
+    indices = adjacency.indices.tolist()
+    weights = np.asarray(weights, dtype=np.float64).tolist()
+    dist = [np.inf] * len(adjacency)
+    for v, d in zip(sources.tolist(), source_distances.tolist()):
+        dist[v] = min(dist[v], d)
+    heap = [(dist[v], v) for v in set(sources.tolist()) if dist[v] <= limit]
+    heapq.heapify(heap)
+    while heap:
+        d, v = heapq.heappop(heap)
+        if d > dist[v]:
+            continue
+        for k in range(offsets[v], offsets[v + 1]):
+            nd = d + weights[k]
+            u = indices[k]
+            if nd < dist[u] and nd <= limit:
+                dist[u] = nd
+                heapq.heappush(heap, (nd, u))
+    return np.array(dist, dtype=np.float64)
+
+
+def connected_components(num_elements:int, a:np.ndarray, b:np.ndarray):
+    """ component label (0..K-1, ordered by lowest member) of each element linked by (a[i], b[i]) pairs
+
+    vectorized union-find: roots are hooked to the smaller root of each pair, then paths are fully compressed
+    """
+    parent = np.arange(num_elements, dtype=np.int64)
+    a = np.asarray(a, dtype=np.int64).reshape(-1)
+    b = np.asarray(b, dtype=np.int64).reshape(-1)
+    while len(a):
+        # after compression parent[a] and parent[b] are roots
+        root_a, root_b = parent[a], parent[b]
+        differ = root_a != root_b
+        if not differ.any():
+            break
+        a, b = a[differ], b[differ]
+        np.minimum.at(parent, np.maximum(root_a[differ], root_b[differ]), np.minimum(root_a[differ], root_b[differ]))
+        while True:
+            grand_parent = parent[parent]
+            if np.array_equal(grand_parent, parent):
+                break
+            parent = grand_parent
+    return np.unique(parent, return_inverse=True)[1].reshape(-1)
+
+
+def order_edge_chains(edge_verts:np.ndarray, edge_ids:np.ndarray=None):
+    """ order unordered edges into chains, walking every edge once
+
+    Parameters:
+        edge_verts (np.ndarray): (K, 2) vertex indices of the edges
+        edge_ids (np.ndarray, None): ids reported for the edges (defaults to 0..K-1)
+
+    Returns:
+        (vert chains, edge chains, closed flags); closed chains start and end with the same vert.
+        Chains end at verts of degree other than 2, so branching verts split chains; chains are
+        started from terminal verts in ascending vert order, taking their edges in ascending order,
+        then from the lowest remaining edge of each pure cycle
+    """
+    edge_verts = np.asarray(edge_verts, dtype=np.int64).reshape(-1, 2)
+    edge_ids = np.arange(len(edge_verts)) if edge_ids is None else np.asarray(edge_ids).reshape(-1)
+    if len(edge_verts) == 0:
+        return [], [], []
+    vert_edges = CSRAdjacency.from_pairs(edge_verts.ravel(), np.repeat(np.arange(len(edge_verts)), 2), int(edge_verts.max()) + 1)
+    offsets = vert_edges.offsets.tolist()
+    link_edges = vert_edges.indices.tolist()
+    degree = vert_edges.counts.tolist()
+    ends = edge_verts.tolist()
+    visited = [False] * len(ends)
+
+    def walk(v, e):
+        verts, eds = [v], []
+        while True:
+            visited[e] = True
+            eds.append(e)
+            v0, v1 = ends[e]
+            v = v1 if v0 == v else v0
+            verts.append(v)
+            if degree[v] != 2:
+                break
+            # continue through the other edge of v (stop if it closes the loop)
+            o = offsets[v]
+            e = link_edges[o + 1] if link_edges[o] == e else link_edges[o]
+            if visited[e]:
+                break
+        return verts, eds
+
+    chains = []
+    for v in np.flatnonzero((vert_edges.counts > 0) & (vert_edges.counts != 2)).tolist():
+        for e in link_edges[offsets[v]:offsets[v + 1]]:
+            if not visited[e]:
+                chains.append(walk(v, e))
+    for e in range(len(ends)):
+        if not visited[e]:
+            chains.append(walk(ends[e][0], e))
+
+    vert_chains = [verts for verts, _ in chains]
+    edge_chains = [edge_ids[eds].tolist() for _, eds in chains]
+    closed = [verts[0] == verts[-1] for verts in vert_chains]
+    return vert_chains, edge_chains, closed
+
+
+def grow_mask(adjacency:CSRAdjacency, mask:np.ndarray, rings:int=1, within:np.ndarray=None):
+    """ grow boolean mask by 'rings' rings of neighbors (until it stops growing if None), never leaving 'within' """
+    mask = np.array(mask, dtype=bool)
+    frontier = np.flatnonzero(mask)
+    ring = 0
+    while len(frontier) and (rings is None or ring < rings):
+        ring += 1
+        # new ring: neighbors of the last ring not in the mask yet
+        neighbors = adjacency.gather(frontier)
+        neighbors = neighbors[~mask[neighbors]]
+        if within is not None:
+            neighbors = neighbors[within[neighbors]]
+        frontier = np.unique(neighbors)
+        mask[frontier] = True
+    return mask
+
+
+def mask_rings(adjacency:CSRAdjacency, mask:np.ndarray, within:np.ndarray=None):
+    """ grow boolean 'mask' in place one ring of neighbors at a time, yielding the indices of each new ring
+
+    only the last ring is expanded, so walking until a condition is met costs O(size of the grown region)
+    """
+    frontier = np.flatnonzero(mask)
+    while len(frontier):
+        neighbors = adjacency.gather(frontier)
+        neighbors = neighbors[~mask[neighbors]]
+        if within is not None:
+            neighbors = neighbors[within[neighbors]]
+        frontier = np.unique(neighbors)
+        if len(frontier) == 0:
+            return
+        mask[frontier] = True
+        yield frontier
+
+
+def shrink_mask(adjacency:CSRAdjacency, mask:np.ndarray, rings:int=1):
+    """ remove 'rings' outer rings (elements with a neighbor outside the mask) from boolean mask """
+    mask = np.array(mask, dtype=bool)
+    outside = ~mask[adjacency.indices]
+    border = np.unique(adjacency.rows()[outside])
+    border = border[mask[border]]
+    for ring in range(rings):
+        if len(border) == 0:
+            break
+        mask[border] = False
+        # selected neighbors of the removed ring form the next border
+        neighbors = adjacency.gather(border)
+        border = np.unique(neighbors[mask[neighbors]])
+    return mask
+
+
+def _chain_pairs(adjacency:CSRAdjacency, mask:np.ndarray=None, row_mask:np.ndarray=None):
+    """ pairs linking consecutive entries of each adjacency row (so all entries of a row end up connected) """
+    rows = adjacency.rows()
+    cols = adjacency.indices
+    if row_mask is not None:
+        keep = row_mask[rows]
+        rows, cols = rows[keep], cols[keep]
+    if mask is not None:
+        keep = mask[cols]
+        rows, cols = rows[keep], cols[keep]
+    same_row = rows[1:] == rows[:-1]
+    return cols[:-1][same_row], cols[1:][same_row]
+
+
+def topology_hash(coords:np.ndarray, edges:np.ndarray, loop_totals:np.ndarray, loop_verts:np.ndarray):
+    hasher = hashlib.md5()
+    for array in (coords, edges, loop_totals, loop_verts):
+        hasher.update(np.ascontiguousarray(array).tobytes())
+    return hasher.hexdigest()
+
+
+def mesh_topology(data):
+    """ MeshTopology of a Mesh or BMesh, reused while its geometry hash is unchanged
+
+    the geometry arrays are read (and hashed) on every call, so any edit is seen; a cache hit saves deriving
+    the adjacency again (for a BMesh, each read also copies it into a temporary mesh, see 'from_bmesh')
+    """
+    topology = MeshTopology.from_bmesh(data) if isinstance(data, BMesh) else MeshTopology.from_mesh(data)
+    key = topology.geometry_hash()
+    cached = topology_cache.get(key)
+    if cached is not None:
+        topology_cache.move_to_end(key)
+        return cached
+    topology_cache[key] = topology
+    while len(topology_cache) > topology_cache_size:
+        topology_cache.popitem(last=False)
+    return topology
+
+
+def clear_topology_cache():
+    """ drop all cached topology (e.g. to free the memory after working on large meshes) """
+    topology_cache.clear()
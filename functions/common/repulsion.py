@@ -0,0 +1,149 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+import numpy as np
+
+# Blender imports
+# NONE!
+
+# Module imports
+# NONE!
+
+# global vars
+neighbor_offsets = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1) if (dx, dy, dz) >= (0, 0, 0)]
+
+
+def neighbor_pairs(points:np.ndarray, radius:float):
+    """ index pairs (i, j) with i < j of points closer than 'radius' (found with a uniform hash grid) """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    n = len(points)
+    if n < 2 or radius <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    cells = np.floor(points / radius).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    dims = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    all_i, all_j = [], []
+    # visit the own cell and half of the 26 neighbor cells so each pair of cells is visited once
+    for dx, dy, dz in neighbor_offsets:
+        neighbor_keys = keys + (dx * dims[1] + dy) * dims[2] + dz
+        starts = np.searchsorted(sorted_keys, neighbor_keys, side="left")
+        counts = np.searchsorted(sorted_keys, neighbor_keys, side="right") - starts
+        total = counts.sum()
+        if total == 0:
+            continue
+        # expand each point's neighbor cell range into explicit pairs
+        i = np.repeat(np.arange(n), counts)
+        group_start = np.repeat(np.cumsum(counts) - counts, counts)
+        j = order[np.repeat(starts, counts) + np.arange(total) - group_start]
+        if dx == dy == dz == 0:
+            keep = i < j
+            i, j = i[keep], j[keep]
+        all_i.append(i)
+        all_j.append(j)
+    if not all_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    i = np.concatenate(all_i)
+    j = np.concatenate(all_j)
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    close = np.einsum("ij,ij->i", points[j] - points[i], points[j] - points[i]) < radius * radius
+    return i[close], j[close]
+
+
+def _grid_pairs(points:np.ndarray, radii:np.ndarray):
+    """ candidate index pairs of overlapping spheres, sizing the hash grid from typical (not the largest) radii
+
+    spheres more than twice the median radius are kept out of the grid and tested against every point instead
+    """
+    regular = radii <= 2 * np.median(radii)
+    regular_idxs = np.flatnonzero(regular)
+    i, j = neighbor_pairs(points[regular_idxs], 2 * radii[regular_idxs].max())
+    i, j = regular_idxs[i], regular_idxs[j]
+    oversized = np.flatnonzero(~regular)
+    if len(oversized) == 0:
+        return i, j
+    # few oversized spheres: test each against all points at once
+    big = np.repeat(oversized, len(points))
+    other = np.tile(np.arange(len(points)), len(oversized))
+    # keep each pair once (pairs of two oversized spheres come up twice)
+    keep = (big != other) & (regular[other] | (big < other))
+    big, other = big[keep], other[keep]
+    close = np.linalg.norm(points[other] - points[big], axis=1) < radii[big] + radii[other]
+    big, other = big[close], other[close]
+    return np.concatenate((i, np.minimum(big, other))), np.concatenate((j, np.maximum(big, other)))
+
+
+def box_displacements(points:np.ndarray, radii:np.ndarray, box_mins:np.ndarray, box_maxs:np.ndarray):
+    """ (N, 3) displacements pushing spheres (points, radii) out of axis-aligned boxes (box_mins, box_maxs)
+
+    a sphere touching a box is pushed away from the closest point on the box; a sphere whose center is inside
+    a box is pushed out through the nearest face
+    """
+    box_mins = np.asarray(box_mins, dtype=np.float64).reshape(1, -1, 3)
+    box_maxs = np.asarray(box_maxs, dtype=np.float64).reshape(1, -1, 3)
+    centers = points[:, None, :]
+    offsets = centers - np.clip(centers, box_mins, box_maxs)
+    dists = np.linalg.norm(offsets, axis=2)
+    outside = dists > 1e-12
+    push = np.where(outside[..., None], offsets / np.maximum(dists, 1e-12)[..., None] * np.maximum(radii[:, None] - dists, 0)[..., None], 0)
+    # centers inside a box leave through the face with the least penetration
+    face_dists = np.concatenate((centers - box_mins, box_maxs - centers), axis=2)
+    face = np.argmin(face_dists, axis=2)
+    axis = face % 3
+    sign = np.where(face < 3, -1.0, 1.0)
+    depth = np.take_along_axis(face_dists, face[..., None], axis=2)[..., 0] + radii[:, None]
+    inside_push = np.zeros_like(push)
+    np.put_along_axis(inside_push, axis[..., None], (sign * depth)[..., None], axis=2)
+    push = np.where(outside[..., None], push, inside_push)
+    return push.sum(axis=1)
+
+
+def repulsion_displacements(points:np.ndarray, radii:np.ndarray, movable:np.ndarray=None, locks:np.ndarray=None, strength:float=1.0, box_mins:np.ndarray=None, box_maxs:np.ndarray=None):
+    """ (N, 3) displacements separating overlapping spheres (points, radii)
+
+    each overlapping pair is pushed apart along the line between centers by the overlap depth (times strength),
+    shared equally between movable points (fixed points do not move); 'locks' is an (N, 3) bool array of
+    axes along which a point may not move. Fixed obstacles such as environment objects are better passed as
+    axis-aligned boxes ('box_mins', 'box_maxs') than as spheres: movable spheres are pushed out of them
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    radii = np.asarray(radii, dtype=np.float64).reshape(-1)
+    movable = np.ones(len(points), dtype=bool) if movable is None else np.asarray(movable, dtype=bool)
+    displacements = np.zeros_like(points)
+    if len(points) >= 2:
+        i, j = _grid_pairs(points, radii)
+        offsets = points[j] - points[i]
+        dists = np.linalg.norm(offsets, axis=1)
+        overlaps = radii[i] + radii[j] - dists
+        hit = (overlaps > 0) & (movable[i] | movable[j])
+        i, j, offsets, dists, overlaps = i[hit], j[hit], offsets[hit], dists[hit], overlaps[hit]
+        # coincident centers get an arbitrary but deterministic direction
+        directions = np.where(dists[:, None] > 1e-12, offsets / np.maximum(dists, 1e-12)[:, None], (1.0, 0.0, 0.0))
+        # split the push between the movable points of each pair
+        share_i = np.where(movable[j], 0.5, 1.0) * movable[i]
+        share_j = np.where(movable[i], 0.5, 1.0) * movable[j]
+        push = directions * (overlaps * strength)[:, None]
+        np.add.at(displacements, i, -push * share_i[:, None])
+        np.add.at(displacements, j, push * share_j[:, None])
+    if box_mins is not None and len(box_mins) > 0 and movable.any():
+        displacements[movable] += box_displacements(points[movable], radii[movable], box_mins, box_maxs) * strength
+    if locks is not None:
+        displacements[np.asarray(locks, dtype=bool)] = 0
+    return displacements
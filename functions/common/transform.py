@@ -17,6 +17,7 @@
 
 # System imports
 import math
+import numpy as np
 
 # Blender imports
 import bpy
@@ -27,6 +28,7 @@ from bpy.types import Object
 # Module imports
 from .blender import *
 from .maths import mathutils_mult
+from .mesh_arrays import read_mesh_coords
 from .python_utils import confirm_iter
 
 
@@ -68,34 +70,20 @@ def parent_clear(objs, apply_transform:bool=True):
 
 
 def get_bounds(obj:Object):
-    """ brute force method for obtaining object bounding box """
-    # initialize min and max
-    min = Vector((math.inf, math.inf, math.inf))
-    max = Vector((-math.inf, -math.inf, -math.inf))
-    # calculate min and max verts
-    for v in obj.data.vertices:
-        if v.co.x > max.x:
-            max.x = v.co.x
-        elif v.co.x < min.x:
-            min.x = v.co.x
-        if v.co.y > max.y:
-            max.y = v.co.y
-        elif v.co.y < min.y:
-            min.y = v.co.y
-        if v.co.z > max.z:
-            max.z = v.co.z
-        elif v.co.z < min.z:
-            min.z = v.co.z
+    """ bounding box of object mesh vertices (8 corners in 'bound_box' order) """
+    coords = read_mesh_coords(obj.data)
+    if len(coords) == 0:
+        return [[0, 0, 0]] * 8
+    min, max = coords.min(axis=0).tolist(), coords.max(axis=0).tolist()
     # set up bounding box list of coord lists
-    bound_box = [list(min),
-                 [min.x, min.y, min.z],
-                 [min.x, min.y, max.z],
-                 [min.x, max.y, max.z],
-                 [min.x, max.y, min.z],
-                 [max.x, min.y, min.z],
-                 [max.y, min.y, max.z],
-                 list(max),
-                 [max.x, max.y, min.z]]
+    bound_box = [[min[0], min[1], min[2]],
+                 [min[0], min[1], max[2]],
+                 [min[0], max[1], max[2]],
+                 [min[0], max[1], min[2]],
+                 [max[0], min[1], min[2]],
+                 [max[0], min[1], max[2]],
+                 [max[0], max[1], max[2]],
+                 [max[0], max[1], min[2]]]
     return bound_box
 
 
@@ -111,27 +99,53 @@ def bounds(obj:Object, local:bool=False, use_adaptive_domain:bool=True):
     """
 
     local_coords = get_bounds(obj) if is_smoke(obj) and is_adaptive(obj) and not use_adaptive_domain else obj.bound_box[:]
-    om = obj.matrix_world
+    coords = np.array(local_coords, dtype=np.float64).reshape(-1, 3)
 
     if not local:
-        worldify = lambda p: mathutils_mult(om, Vector(p[:]))
-        coords = [worldify(p).to_tuple() for p in local_coords]
-    else:
-        coords = [p[:] for p in local_coords]
-
-    rotated = zip(*coords[::-1])
-    get_max = lambda i: max([co[i] for co in coords])
-    get_min = lambda i: min([co[i] for co in coords])
+        coords = transform_points(coords, obj.matrix_world)
 
     info = lambda: None
-    info.max = Vector((get_max(0), get_max(1), get_max(2)))
-    info.min = Vector((get_min(0), get_min(1), get_min(2)))
+    info.max = Vector(coords.max(axis=0))
+    info.min = Vector(coords.min(axis=0))
     info.mid = (info.min + info.max) / 2
     info.dist = info.max - info.min
 
     return info
 
 
+def bounds_batch(objs:list, local:bool=False, exact:bool=False):
+    """ bounds of many objects at once as (N, 3) min and max arrays (world space unless 'local')
+
+    by default the 8 'bound_box' corners of each object are transformed in one einsum (loose for rotated
+    objects); with 'exact', mesh vertex coordinates are read with foreach_get and transformed instead, giving
+    tight world-space bounds of the undeformed mesh (objects without vertices fall back to 'bound_box')
+    """
+    num_objs = len(objs)
+    mins = np.zeros((num_objs, 3))
+    maxs = np.zeros((num_objs, 3))
+    if num_objs == 0:
+        return mins, maxs
+    matrices = None if local else np.array([obj.matrix_world for obj in objs], dtype=np.float64).reshape(-1, 4, 4)
+    use_verts = np.array([exact and obj.type == "MESH" and len(obj.data.vertices) > 0 for obj in objs], dtype=bool)
+    # bound box corners of all objects in one go
+    box_idxs = np.flatnonzero(~use_verts)
+    if len(box_idxs) > 0:
+        corners = np.array([objs[i].bound_box for i in box_idxs], dtype=np.float64).reshape(-1, 8, 3)
+        if not local:
+            mx = matrices[box_idxs]
+            corners = np.einsum("nij,nkj->nki", mx[:, :3, :3], corners) + mx[:, None, :3, 3]
+        mins[box_idxs] = corners.min(axis=1)
+        maxs[box_idxs] = corners.max(axis=1)
+    # exact bounds from vertex coordinates
+    for i in np.flatnonzero(use_verts):
+        coords = read_mesh_coords(objs[i].data).astype(np.float64)
+        if not local:
+            coords = transform_points(coords, matrices[i])
+        mins[i] = coords.min(axis=0)
+        maxs[i] = coords.max(axis=0)
+    return mins, maxs
+
+
 def set_obj_origin(obj:Object, loc:tuple):
     """ set object origin """
     l, r, s = obj.matrix_world.decompose()
@@ -145,41 +159,52 @@ def set_obj_origin(obj:Object, loc:tuple):
     obj.matrix_world.translation = loc
 
 
+def _as_matrices(mat):
+    return np.asarray(mat, dtype=np.float64).reshape(-1, 4, 4) if np.ndim(mat) == 3 else np.asarray(mat, dtype=np.float64).reshape(4, 4)
+
+
+def transform_points(points:np.ndarray, mat:Matrix, inverse:bool=False):
+    """ map (N, 3) points through 4x4 matrix 'mat' (or its inverse) in one operation
+
+    'mat' may also be an (N, 4, 4) array holding one matrix per point; projective
+    matrices (bottom row other than 0, 0, 0, 1) get the perspective divide
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    mat = _as_matrices(mat)
+    if inverse:
+        mat = np.linalg.inv(mat)
+    coords = np.einsum("...ij,...j->...i", mat[..., :3, :3], points) + mat[..., :3, 3]
+    w = np.einsum("...j,...j->...", mat[..., 3, :3], points) + mat[..., 3, 3]
+    if not np.all(w == 1):
+        coords /= np.reshape(w, (-1, 1))
+    return coords
+
+
+def transform_directions(vecs:np.ndarray, mat:Matrix, inverse:bool=False):
+    """ map (N, 3) direction vectors through the 3x3 part of 'mat' (or its inverse), ignoring translation """
+    vecs = np.asarray(vecs, dtype=np.float64).reshape(-1, 3)
+    mat3 = _as_matrices(mat)[..., :3, :3]
+    if inverse:
+        mat3 = np.linalg.inv(mat3)
+    return np.einsum("...ij,...j->...i", mat3, vecs)
+
+
+def transform_normals(normals:np.ndarray, mat:Matrix, normalize:bool=True):
+    """ map (N, 3) normals through 'mat' with the inverse transpose (correct under non-uniform scale) """
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    normal_mat = np.swapaxes(np.linalg.inv(_as_matrices(mat)[..., :3, :3]), -1, -2)
+    normals = np.einsum("...ij,...j->...i", normal_mat, normals)
+    if normalize:
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals /= np.where(lengths == 0, 1, lengths)
+    return normals
+
+
 def transform_to_world(vec:Vector, mat:Matrix, junk_bme:bmesh=None):
-    """ transfrom vector to world space from 'mat' matrix local space """
-    # decompose matrix
-    loc = mat.to_translation()
-    rot = mat.to_euler()
-    scale = mat.to_scale()[0]
-    # apply rotation
-    if rot != Euler((0, 0, 0), "XYZ"):
-        junk_bme = bmesh.new() if junk_bme is None else junk_bme
-        v1 = junk_bme.verts.new(vec)
-        bmesh.ops.rotate(junk_bme, verts=[v1], cent=-loc, matrix=Matrix.Rotation(rot.x, 3, "X"))
-        bmesh.ops.rotate(junk_bme, verts=[v1], cent=-loc, matrix=Matrix.Rotation(rot.y, 3, "Y"))
-        bmesh.ops.rotate(junk_bme, verts=[v1], cent=-loc, matrix=Matrix.Rotation(rot.z, 3, "Z"))
-        vec = v1.co
-    # apply scale
-    vec = vec * scale
-    # apply translation
-    vec += loc
-    return vec
+    """ transfrom vector to world space from 'mat' matrix local space ('junk_bme' is no longer needed) """
+    return Vector(transform_points(vec, mat)[0])
 
 
 def transform_to_local(vec:Vector, mat:Matrix, junk_bme:bmesh=None):
-    """ transfrom vector to local space of 'mat' matrix """
-    # decompose matrix
-    loc = mat.to_translation()
-    rot = mat.to_euler()
-    scale = mat.to_scale()[0]
-    # apply scale
-    vec = vec / scale
-    # apply rotation
-    if rot != Euler((0, 0, 0), "XYZ"):
-        junk_bme = bmesh.new() if junk_bme is None else junk_bme
-        v1 = junk_bme.verts.new(vec)
-        bmesh.ops.rotate(junk_bme, verts=[v1], cent=loc, matrix=Matrix.Rotation(-rot.z, 3, "Z"))
-        bmesh.ops.rotate(junk_bme, verts=[v1], cent=loc, matrix=Matrix.Rotation(-rot.y, 3, "Y"))
-        bmesh.ops.rotate(junk_bme, verts=[v1], cent=loc, matrix=Matrix.Rotation(-rot.x, 3, "X"))
-        vec = v1.co
-    return vec
+    """ transfrom vector to local space of 'mat' matrix ('junk_bme' is no longer needed) """
+    return Vector(transform_points(vec, mat, inverse=True)[0])
@@ -0,0 +1,89 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+import hashlib
+from collections import OrderedDict
+
+# Blender imports
+import bpy
+from bpy.types import Object, Scene
+
+# Addon imports
+from .common import *
+from .general import add_rigid_bodies
+
+# global vars
+environment_name = "Interactive Physics Environment"
+# name of merged environment mesh, keyed by hash of the environment objects (least recently used first)
+environment_cache = OrderedDict()
+environment_cache_size = 2
+
+
+def environment_hash(objs:list):
+    """ hash of environment object names, transforms and mesh geometry (see 'cached_mesh_hash') """
+    hasher = hashlib.md5()
+    for obj in sorted(objs, key=lambda obj: obj.name):
+        hasher.update(obj.name.encode())
+        hasher.update(str([tuple(row) for row in obj.matrix_world]).encode())
+        hasher.update(cached_mesh_hash(obj.data).encode())
+    return hasher.hexdigest()
+
+
+def get_environment_mesh(objs:list):
+    """ get single mesh of all environment objects in world space (cached until the environment changes)
+
+    merged meshes of older environments are removed once they drop out of the cache
+    """
+    key = environment_hash(objs)
+    m = bpy.data.meshes.get(environment_cache.get(key, ""))
+    if m is None:
+        coords, loop_totals, loop_verts = join_mesh_arrays(objs)
+        m = new_mesh_from_arrays(environment_name, coords, loop_totals, loop_verts)
+        environment_cache[key] = m.name
+        while len(environment_cache) > environment_cache_size:
+            _, old_name = environment_cache.popitem(last=False)
+            old_mesh = bpy.data.meshes.get(old_name)
+            if old_mesh is not None and old_mesh.users == 0:
+                bpy.data.meshes.remove(old_mesh)
+    environment_cache.move_to_end(key)
+    return m
+
+
+def add_environment_body(objs:list, scene:Scene=None):
+    """ merge environment objects into one passive rigid body linked to scene """
+    scene = scene or bpy.context.scene
+    env_obj = bpy.data.objects.new(environment_name, get_environment_mesh(objs))
+    env_obj["ipe_environment_body"] = True
+    link_object(env_obj, scene=scene)
+    add_rigid_bodies([env_obj])
+    rb = env_obj.rigid_body
+    rb.type = "PASSIVE"
+    rb.collision_shape = "MESH"
+    rb.friction = 0.1
+    rb.use_margin = True
+    rb.collision_margin = 0
+    env_obj.hide_select = True
+    env_obj.display_type = "BOUNDS"
+    return env_obj
+
+
+def remove_environment_body(env_obj:Object):
+    """ remove merged environment object (the mesh is kept for reuse in later sessions) """
+    if env_obj is None or safe_execute(None, ReferenceError, getattr, env_obj, "name") is None:
+        return
+    bpy.data.objects.remove(env_obj, do_unlink=True)
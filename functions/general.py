@@ -15,10 +15,19 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+# System imports
+import numpy as np
+
+# Blender imports
+from mathutils import Matrix
+
+# Addon imports
 from .common import *
 
 @blender_version_wrapper("<=", "2.79")
 def get_quadview_index(context, x, y):
+    if context.screen is None:
+        return (None, None)
     for area in context.screen.areas:
         if area.type != 'VIEW_3D':
             continue
@@ -43,6 +52,8 @@ def get_quadview_index(context, x, y):
     return (None, None)
 @blender_version_wrapper(">=", "2.80")
 def get_quadview_index(context, x, y):
+    if context.screen is None:
+        return (None, None)
     for area in context.screen.areas:
         if area.type != 'VIEW_3D':
             continue
@@ -63,6 +74,16 @@ def interactive_physics_handle_exception():
     handle_exception(log_name="Interactive Physics Editor log", report_button_loc="Physics > Interactive Physics Editor > Report Error")
 
 
+def add_rigid_bodies(objs):
+    """ add rigid bodies to objs without disturbing the current selection """
+    selected_objs = list(bpy.context.selected_objects)
+    active_obj = bpy.context.active_object
+    select(objs, active=True, only=True)
+    bpy.ops.rigidbody.objects_add()
+    select(selected_objs, only=True)
+    set_active_obj(active_obj)
+
+
 def add_constraints(objs, loc=True, rot=True):
     for obj in objs:
         if obj.type != "MESH": continue
@@ -120,3 +141,51 @@ def update_rot_constraint(obj, constraint, limit):
     constraint.min_x, constraint.max_x = limit[0] - tolerance[0], limit[0] + tolerance[0]
     constraint.min_y, constraint.max_y = limit[1] - tolerance[1], limit[1] + tolerance[1]
     constraint.min_z, constraint.max_z = limit[2] - tolerance[2], limit[2] + tolerance[2]
+
+
+def read_world_matrices(objs):
+    """ world matrices of objs as an (N, 4, 4) array """
+    return np.array([obj.matrix_world for obj in objs], dtype=np.float64).reshape(-1, 4, 4)
+
+
+def changed_matrices(matrices, orig_matrices, epsilon:float=1e-6):
+    """ boolean mask of matrices that differ from their originals by more than epsilon """
+    if len(matrices) == 0:
+        return np.zeros(0, dtype=bool)
+    return (np.abs(matrices - orig_matrices) > epsilon).reshape(len(matrices), -1).any(axis=1)
+
+
+def write_world_matrices(objs, indices, matrices):
+    """ write (K, 4, 4) matrices to objs[indices] (also resets the matrix restored at the start of each sim loop) """
+    for i, mx in zip(indices, matrices):
+        obj = objs[i]
+        obj.matrix_world = Matrix(mx.tolist())
+        obj["d3tool_last_matrix"] = obj.matrix_world.copy()
+
+
+def read_locks(objs):
+    """ transform locks of objs (to be restored with 'remove_session_constraints') """
+    return [(tuple(obj.lock_location), tuple(obj.lock_rotation), obj.lock_rotation_w, obj.lock_rotations_4d) for obj in objs]
+
+
+def remove_session_constraints(objs, locks=None):
+    """ remove limit constraints added for the session and restore transform locks """
+    for i, obj in enumerate(objs):
+        lock_loc, lock_rot, lock_rot_w, lock_rots_4d = locks[i] if locks else ((False,) * 3, (False,) * 3, False, False)
+        obj.lock_location = lock_loc
+        obj.lock_rotation = lock_rot
+        obj.lock_rotation_w = lock_rot_w
+        obj.lock_rotations_4d = lock_rots_4d
+        for constraint_name in ("Limit Location", "Limit Rotation"):
+            constraint = obj.constraints.get(constraint_name)
+            if constraint is not None:
+                obj.constraints.remove(constraint)
+
+
+def remove_rigid_bodies(objs):
+    """ remove rigid body settings from objs only (not from every selected object) """
+    objs = [obj for obj in objs if obj.rigid_body is not None]
+    if not objs:
+        return
+    override = {"selected_objects": objs, "object": objs[0], "active_object": objs[0]}
+    bpy.ops.rigidbody.objects_remove(override)
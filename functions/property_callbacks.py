@@ -19,6 +19,7 @@ import statistics
 
 from .common import *
 from .general import *
+from .collision_proxies import *
 
 
 def update_lock_loc(self, context):
@@ -38,7 +39,7 @@ def update_collision_margin(self, context):
 def update_collision_shape(self, context):
     scn = bpy.context.scene
     for obj in scn.objects:
-        obj.rigid_body.collision_shape = self.collision_shape
+        set_collision_shape(obj, self.collision_shape)
 
 
 def update_enable_gravity(self, context):
@@ -0,0 +1,184 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Binary log of an interactive physics session
+
+layout (little endian):
+    header:  b"IPEREC01", uint32 num_objs, num_objs * (uint16 len, utf-8 object name)
+    event:   b"E", float64 time, int16 type, int16 value, int16 mouse_x, int16 mouse_y, uint8 modifier bits
+    frame:   b"F", float64 time, int32 frame, int32 frame_end, uint32 K,
+             K * int32 kinematic object index, K * 12 float32 (top 3 rows of matrix_world)
+"""
+
+# System imports
+import struct
+import time
+import numpy as np
+
+# Blender imports
+import bpy
+from bpy.app.handlers import persistent
+from bpy.types import Event, Scene
+
+# Addon imports
+from .common import *
+
+# global vars
+session_log_magic = b"IPEREC01"
+event_struct = struct.Struct("<dhhhhB")
+frame_struct = struct.Struct("<diiI")
+event_types = {item.identifier: item.value for item in Event.bl_rna.properties["type"].enum_items}
+event_values = {item.identifier: item.value for item in Event.bl_rna.properties["value"].enum_items}
+modifier_keys = ("shift", "ctrl", "alt", "oskey")
+# recorder receiving frame change updates (only one session can run at a time)
+active_recorder = None
+
+
+class SessionEvent:
+    """ stand-in for bpy.types.Event rebuilt from a session log """
+    __slots__ = ("time", "type", "value", "mouse_x", "mouse_y") + modifier_keys
+
+    def __init__(self, time, type, value, mouse_x, mouse_y, modifiers):
+        self.time = time
+        self.type = type
+        self.value = value
+        self.mouse_x = mouse_x
+        self.mouse_y = mouse_y
+        for i, key in enumerate(modifier_keys):
+            setattr(self, key, bool(modifiers & (1 << i)))
+
+
+class SessionFrame:
+    """ kinematic object matrices for one frame of a session log """
+    __slots__ = ("time", "frame", "frame_end", "indices", "matrices")
+
+    def __init__(self, time, frame, frame_end, indices, matrices):
+        self.time = time
+        self.frame = frame
+        self.frame_end = frame_end
+        self.indices = indices
+        self.matrices = matrices
+
+
+class SessionRecorder:
+    """ streams modal events and kinematic object matrices of a session to a binary log """
+    def __init__(self, filepath:str, objs:list):
+        self.objs = objs
+        self.kinematic = np.zeros(0, dtype=np.int32)
+        self.start_time = time.perf_counter()
+        self.file = open(bpy.path.abspath(filepath), "wb")
+        self.file.write(session_log_magic)
+        self.file.write(struct.pack("<I", len(objs)))
+        for obj in objs:
+            name = obj.name.encode("utf-8")
+            self.file.write(struct.pack("<H", len(name)))
+            self.file.write(name)
+
+    def set_kinematic(self, objs:list):
+        """ set objects whose matrices are logged each frame """
+        self.kinematic = np.array([i for i, obj in enumerate(self.objs) if obj in objs], dtype=np.int32)
+
+    def record_event(self, event:Event):
+        modifiers = sum(1 << i for i, key in enumerate(modifier_keys) if getattr(event, key))
+        self.file.write(b"E")
+        self.file.write(event_struct.pack(
+            time.perf_counter() - self.start_time,
+            event_types.get(event.type, -1),
+            event_values.get(event.value, -1),
+            max(-32768, min(32767, event.mouse_x)),
+            max(-32768, min(32767, event.mouse_y)),
+            modifiers,
+        ))
+
+    def record_frame(self, scene:Scene):
+        matrices = np.array([self.objs[i].matrix_world for i in self.kinematic], dtype=np.float32).reshape(-1, 4, 4)
+        self.file.write(b"F")
+        self.file.write(frame_struct.pack(time.perf_counter() - self.start_time, scene.frame_current, scene.frame_end, len(self.kinematic)))
+        self.file.write(self.kinematic.tobytes())
+        self.file.write(matrices[:, :3, :].tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+@persistent
+def handle_session_recording(scene):
+    if active_recorder is None or type(scene) != Scene or scene.name != "Interactive Physics Session":
+        return
+    active_recorder.record_frame(scene)
+
+
+def start_session_recording(filepath:str, objs:list):
+    """ start logging the interactive session to filepath """
+    global active_recorder
+    stop_session_recording()
+    active_recorder = SessionRecorder(filepath, objs)
+    bpy.app.handlers.frame_change_post.append(handle_session_recording)
+    return active_recorder
+
+
+def stop_session_recording():
+    global active_recorder
+    if active_recorder is None:
+        return
+    active_recorder.close()
+    active_recorder = None
+    try:
+        bpy.app.handlers.frame_change_post.remove(handle_session_recording)
+    except ValueError:
+        pass
+
+
+def read_session_log(filepath:str):
+    """ read session log into (object names, list of SessionEvent/SessionFrame records in recorded order) """
+    with open(bpy.path.abspath(filepath), "rb") as f:
+        data = f.read()
+    if not data.startswith(session_log_magic):
+        raise ValueError("'{}' is not an interactive physics session log".format(filepath))
+    type_names = {v: k for k, v in event_types.items()}
+    value_names = {v: k for k, v in event_values.items()}
+    offset = len(session_log_magic)
+    num_objs, = struct.unpack_from("<I", data, offset)
+    offset += 4
+    obj_names = []
+    for _ in range(num_objs):
+        length, = struct.unpack_from("<H", data, offset)
+        obj_names.append(data[offset + 2:offset + 2 + length].decode("utf-8"))
+        offset += 2 + length
+    records = []
+    while offset < len(data):
+        tag = data[offset:offset + 1]
+        offset += 1
+        if tag == b"E":
+            t, event_type, value, mouse_x, mouse_y, modifiers = event_struct.unpack_from(data, offset)
+            offset += event_struct.size
+            records.append(SessionEvent(t, type_names.get(event_type, "NONE"), value_names.get(value, "NOTHING"), mouse_x, mouse_y, modifiers))
+        elif tag == b"F":
+            t, frame, frame_end, k = frame_struct.unpack_from(data, offset)
+            offset += frame_struct.size
+            indices = np.frombuffer(data, dtype=np.int32, count=k, offset=offset)
+            offset += indices.nbytes
+            rows = np.frombuffer(data, dtype=np.float32, count=k * 12, offset=offset).reshape(k, 3, 4)
+            offset += rows.nbytes
+            matrices = np.zeros((k, 4, 4), dtype=np.float32)
+            matrices[:, :3, :] = rows
+            matrices[:, 3, 3] = 1
+            records.append(SessionFrame(t, frame, frame_end, indices, matrices))
+        else:
+            raise ValueError("Corrupt session log '{}' at byte {}".format(filepath, offset - 1))
+    return obj_names, records
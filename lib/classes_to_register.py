@@ -28,7 +28,9 @@ classes = (
     # operators
     PHYSICS_OT_apply_settings_to_selected,
     PHYSICS_OT_close_ipe,
+    PHYSICS_OT_decompose_collision_shape,
     PHYSICS_OT_recenter_tolerance_at_origin,
+    PHYSICS_OT_replay_ipe_session,
     PHYSICS_OT_setup_and_run_ipe,
     # ui
     PHYSICS_PT_interactive_editor,
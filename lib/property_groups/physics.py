@@ -39,6 +39,20 @@ class PhysicsProperties(bpy.types.PropertyGroup):
         update=update_lock_rot,
         default=(True, True, True),
         )
+    solver: EnumProperty(
+        name="Solver",
+        items=[
+            ("RIGID_BODY", "Rigid Body", "Objects collide using the rigid body world"),
+            ("REPEL", "Repel", "Objects push each other apart by their bounding spheres (skips the rigid body world; best for scattering many small objects)"),
+        ],
+        default="RIGID_BODY",
+    )
+    repel_strength: FloatProperty(
+        name="Repel Strength",
+        description="Fraction of the overlap between two objects resolved per frame",
+        min=0.01, max=1,
+        default=0.5,
+    )
     collision_margin: FloatProperty(
         name="Collision Margin",
         min=-1, max=1,
@@ -51,6 +65,7 @@ class PhysicsProperties(bpy.types.PropertyGroup):
         items=[
             ("CONVEX_HULL", "Convex (fast)", "Objects collide with other objects using a convex collision shape"),
             ("MESH", "Concave", "Objects collide with other objects using a concave collision shape (best for hollow objects)"),
+            ("COMPOUND", "Convex Decomposition", "Objects collide with other objects using a compound of convex pieces (near-concave accuracy at near-convex cost)"),
         ],
         update=update_collision_shape,
         default="MESH",
@@ -60,6 +75,22 @@ class PhysicsProperties(bpy.types.PropertyGroup):
         update=update_enable_gravity,
         default=False,
     )
+    use_continuous_collision: BoolProperty(
+        name="Continuous Collision",
+        description="Spread fast motion of the dragged (kinematic) objects over several frames so they cannot pass through thin neighbors between frames",
+        default=False,
+    )
+    record_session: BoolProperty(
+        name="Record Session",
+        description="Log mouse/keyboard events and kinematic object transforms of the next session for replaying it as a benchmark",
+        default=False,
+    )
+    record_filepath: StringProperty(
+        name="Session Log",
+        description="File the session log is written to",
+        subtype="FILE_PATH",
+        default="//ipe_session.iperec",
+    )
     status: EnumProperty(
         name="Interactive Physics Editor state",
         items=[
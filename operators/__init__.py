@@ -17,5 +17,7 @@
 
 from .apply_settings_to_selected import *
 from .close_ipe import *
+from .decompose_collision_shape import *
 from .recenter_tolerance_at_origin import *
+from .replay_ipe_session import *
 from .setup_and_run_ipe import *
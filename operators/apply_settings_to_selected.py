@@ -41,11 +41,14 @@ class PHYSICS_OT_apply_settings_to_selected(Operator, interactive_sim_drawing):
         try:
             active_obj = context.active_object
             for obj in context.selected_objects:
+                if is_collision_proxy(obj):
+                    continue
                 obj.lock_location = active_obj.lock_location
                 obj.lock_rotation = active_obj.lock_rotation
                 if obj.rigid_body is not None and active_obj.rigid_body is not None:
                     obj.rigid_body.type = active_obj.rigid_body.type
-                    obj.rigid_body.collision_shape = active_obj.rigid_body.collision_shape
+                    if obj != active_obj:
+                        set_collision_shape(obj, active_obj.rigid_body.collision_shape)
                     obj.rigid_body.collision_margin = active_obj.rigid_body.collision_margin
             return {"FINISHED"}
         except:
@@ -0,0 +1,66 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Blender imports
+import bpy
+from bpy.types import Operator
+from bpy.props import *
+
+# Addon imports
+from ..functions import *
+
+class PHYSICS_OT_decompose_collision_shape(Operator):
+    """ Split selected objects into convex pieces and use them as a compound collision shape (near-concave accuracy at near-convex cost) """
+    bl_idname = "physics.decompose_collision_shape"
+    bl_label = "Convex Decomposition"
+    bl_options = {"REGISTER","UNDO"}
+
+    ################################################
+    # Blender Operator methods
+
+    @classmethod
+    def poll(self, context):
+        return len(context.selected_objects) > 0 and context.scene.name == "Interactive Physics Session"
+
+    def execute(self, context):
+        try:
+            for obj in context.selected_objects:
+                if obj.type != "MESH" or obj.rigid_body is None or is_collision_proxy(obj):
+                    continue
+                set_collision_shape(obj, "COMPOUND", max_pieces=self.max_pieces, concavity_tolerance=self.concavity_tolerance)
+            return {"FINISHED"}
+        except:
+            interactive_physics_handle_exception()
+            return {"CANCELLED"}
+
+    ###################################################
+    # class variables
+
+    max_pieces: IntProperty(
+        name="Max Pieces",
+        description="Maximum number of convex pieces per object",
+        min=2, max=64,
+        default=8,
+    )
+    concavity_tolerance: FloatProperty(
+        name="Concavity Tolerance",
+        description="Concavity (relative to object size) below which a piece is not split any further",
+        min=0.001, max=1,
+        default=0.02,
+    )
+
+    #############################################
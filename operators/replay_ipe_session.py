@@ -0,0 +1,139 @@
+# Copyright (C) 2021 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+import struct
+import time
+import numpy as np
+
+# Blender imports
+import bpy
+from bpy.props import *
+from mathutils import Matrix
+
+# Addon imports
+from .setup_and_run_ipe import *
+from ..functions import *
+
+class PHYSICS_OT_replay_ipe_session(PHYSICS_OT_setup_and_run_ipe):
+    """Replay a recorded interactive physics session without user input and time each simulated frame (runs headless with 'blender -b')"""
+    bl_idname = "physics.replay_ipe_session"
+    bl_label = "Replay Interactive Physics Session"
+    bl_options = {"REGISTER"}
+
+    ################################################
+    # Blender Operator methods
+
+    @classmethod
+    def poll(self, context):
+        return context.scene.name != "Interactive Physics Session"
+
+    def execute(self, context):
+        try:
+            obj_names, records = read_session_log(self.filepath)
+        except (OSError, ValueError, struct.error) as e:
+            self.report({"WARNING"}, "Could not read session log: " + str(e))
+            return {"CANCELLED"}
+        missing = [n for n in obj_names if n not in bpy.data.objects]
+        if missing:
+            self.report({"WARNING"}, "Objects in session log not found: " + ", ".join(missing))
+            return {"CANCELLED"}
+        # start the session from the recorded objects
+        deselect_all()
+        select([bpy.data.objects[n] for n in obj_names])
+        self.init_session()
+        self.record_filepath = ""
+        try:
+            if not self.start_session():
+                self.close_interactive_sim()
+                return {"CANCELLED"}
+            # feed recorded events and frames back into the session
+            self.kinematic = None
+            frame_times = []
+            for record in records:
+                if isinstance(record, SessionFrame):
+                    frame_times.append(self.replay_frame(record))
+                elif self.modal(context, record) in ({"FINISHED"}, {"CANCELLED"}):
+                    break
+            else:
+                self.close_interactive_sim()
+            self.report_frame_times(np.array(frame_times))
+            return {"FINISHED"}
+        except:
+            interactive_physics_handle_exception()
+            self.close_interactive_sim()
+            return {"CANCELLED"}
+
+    ################################################
+    # initialization method
+
+    def __init__(self):
+        # the session is initialized in 'execute', from the objects in the session log
+        pass
+
+    ###################################################
+    # class variables
+
+    filepath: StringProperty(
+        name="Session Log",
+        description="Session log recorded with 'Record Session' enabled",
+        subtype="FILE_PATH",
+        default="//ipe_session.iperec",
+    )
+    timings_filepath: StringProperty(
+        name="Timings File",
+        description="Optional CSV file the per-frame simulation times are written to",
+        subtype="FILE_PATH",
+        default="",
+    )
+
+    #############################################
+    # class methods
+
+    def replay_frame(self, record:SessionFrame):
+        # kinematic state follows the recorded selection
+        kinematic = set(record.indices.tolist())
+        if kinematic != self.kinematic:
+            self.kinematic = kinematic
+            for i, obj in enumerate(self.objs):
+                if i in kinematic:
+                    select(obj)
+                else:
+                    deselect(obj)
+                if obj.rigid_body is not None:
+                    obj.rigid_body.kinematic = i in kinematic
+        for i, mx in zip(record.indices, record.matrices):
+            self.objs[i].matrix_world = Matrix(mx.tolist())
+        self.sim_scene.frame_end = record.frame_end
+        start_time = time.perf_counter()
+        self.sim_scene.frame_set(record.frame)
+        return time.perf_counter() - start_time
+
+    def report_frame_times(self, frame_times:np.ndarray):
+        if len(frame_times) == 0:
+            self.report({"WARNING"}, "No frames found in session log")
+            return
+        if self.timings_filepath:
+            np.savetxt(bpy.path.abspath(self.timings_filepath), frame_times, fmt="%.6f", header="seconds", comments="")
+        self.report({"INFO"}, "Replayed {n} frames in {total:.3f}s (mean {mean:.2f}ms, max {max:.2f}ms per frame)".format(
+            n=len(frame_times),
+            total=frame_times.sum(),
+            mean=frame_times.mean() * 1000,
+            max=frame_times.max() * 1000,
+        ))
+
+    ###################################################
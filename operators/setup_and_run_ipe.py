@@ -15,6 +15,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+# System imports
+import time
+import numpy as np
+
 # Blender imports
 import bpy
 from bpy.types import Operator
@@ -40,11 +44,19 @@ class PHYSICS_OT_setup_and_run_ipe(Operator, interactive_sim_drawing):
     def modal(self, context, event):
         try:
             scn = bpy.context.scene
+            # log event stream for replaying the session
+            if self.record_filepath and self.recorder is None:
+                self.recorder = start_session_recording(self.record_filepath, self.objs)
+                self.recorder.set_kinematic(bpy.context.selected_objects)
+            if self.recorder is not None:
+                self.recorder.record_event(event)
             if self.selected_objs != bpy.context.selected_objects:
                 self.selected_objs = bpy.context.selected_objects
+                if self.recorder is not None:
+                    self.recorder.set_kinematic(self.selected_objs)
                 objs = scn.collection.all_objects if b280() else scn.objects
                 for obj in objs:
-                    if obj.rigid_body is None:
+                    if obj.rigid_body is None or is_collision_proxy(obj):
                         continue
                     if b280():
                         obj.rigid_body.kinematic = obj.select_get()
@@ -68,9 +80,10 @@ class PHYSICS_OT_setup_and_run_ipe(Operator, interactive_sim_drawing):
             if self.sim_scene is None or safe_execute(None, ReferenceError, dir, self.sim_scene) is None:
                 self.sim_scene = bpy.data.scenes.get("Interactive Physics Session")
                 self.objs = [bpy.data.objects[n] for n in self.obj_names]
-            # handle undo
+            # handle undo/redo
             elif event.type == "Z" and (event.oskey or event.ctrl):
-                self.report({"WARNING"}, "Undo not available for interactive simulation. Cancel all changes with the 'ESC' key")
+                if event.value == "PRESS":
+                    self.step_history(redo=event.shift)
                 return {"RUNNING_MODAL"}
             elif self.sim_scene.frame_current == 1:
                 self.sim_scene.frame_end = 500
@@ -87,6 +100,7 @@ class PHYSICS_OT_setup_and_run_ipe(Operator, interactive_sim_drawing):
                 elif event.value == "RELEASE":
                     if event.type == "LEFTMOUSE":
                         self.sim_scene.frame_end = self.sim_scene.frame_current + 1
+                        self.history.commit(read_world_matrices(self.objs))
                     elif event.type == "RIGHTMOUSE":
                         bpy.ops.screen.animation_cancel()
                         self.sim_scene.frame_set(0)
@@ -99,13 +113,9 @@ class PHYSICS_OT_setup_and_run_ipe(Operator, interactive_sim_drawing):
 
     def execute(self, context):
         try:
-            if not self.is_valid():
+            if not self.start_session():
                 self.close_interactive_sim()
                 return {"CANCELLED"}
-            self.add_to_new_scene()
-            self.set_up_physics()
-            add_constraints(self.objs)
-            depsgraph_update()
             bpy.ops.screen.animation_play()
             context.window_manager.modal_handler_add(self)
             return {"RUNNING_MODAL"}
@@ -118,21 +128,31 @@ class PHYSICS_OT_setup_and_run_ipe(Operator, interactive_sim_drawing):
     # initialization method
 
     def __init__(self):
+        self.init_session()
+
+    def init_session(self):
         scn = bpy.context.scene
         self.active_object = bpy.context.active_object
-        self.objs = list(bpy.context.selected_objects)
+        selected_objs = list(bpy.context.selected_objects)
+        self.objs = [obj for obj in selected_objs if not obj.ipe_environment]
+        self.env_objs = [obj for obj in selected_objs if obj.ipe_environment]
+        self.env_obj = None
         self.obj_names = [obj.name for obj in self.objs]
-        self.selected_objs = self.objs.copy()
+        self.selected_objs = selected_objs
         self.orig_scene_name = scn.name
         self.orig_frame = scn.frame_current
         self.active_screen = bpy.context.screen
 
         self.replace_end_frame = False
-        self.matrices = {}
         self.selected_objects = []
         self.sim_scene = None
-        for obj in self.objs:
-            self.matrices[obj.name] = obj.matrix_world.copy()
+        self.history = None
+        self.recorder = None
+        self.record_filepath = scn.physics.record_filepath if scn.physics.record_session else ""
+        self.solver = scn.physics.solver
+        self.orig_matrices = read_world_matrices(self.objs)
+        self.orig_locks = read_locks(self.objs)
+        self.orig_env_hide_select = [obj.hide_select for obj in self.env_objs]
         if not b280():
             self.ui_start()
 
@@ -144,6 +164,17 @@ class PHYSICS_OT_setup_and_run_ipe(Operator, interactive_sim_drawing):
     #############################################
     # class methods
 
+    def start_session(self):
+        """ set up the session scene, physics and history for the objects from 'init_session' (False if invalid) """
+        if not self.is_valid():
+            return False
+        self.add_to_new_scene()
+        self.set_up_physics()
+        add_constraints(self.objs)
+        depsgraph_update()
+        self.history = MatrixHistory(read_world_matrices(self.objs))
+        return True
+
     def add_to_new_scene(self):
         # add new physics session scene
         old_sim_scene = bpy.data.scenes.get("Interactive Physics Session")
@@ -156,6 +187,7 @@ class PHYSICS_OT_setup_and_run_ipe(Operator, interactive_sim_drawing):
         self.sim_scene.physics.use_gravity = False
         self.sim_scene.use_gravity = False
         self.sim_scene.sync_mode = "NONE"
+        self.sim_scene.physics.solver = self.solver
         bpy.context.scene.physics.status = "RUNNING"
 
         # TODO Clear existing objects and any physics cache
@@ -165,11 +197,18 @@ class PHYSICS_OT_setup_and_run_ipe(Operator, interactive_sim_drawing):
         for obj in self.objs:
             link_object(obj, scene=self.sim_scene)
             select(obj, active=True)
+        # environment objects are only displayed (they collide through the merged environment body)
+        for obj in self.env_objs:
+            link_object(obj, scene=self.sim_scene)
+            obj.hide_select = True
 
         # bpy.ops.object.make_single_user(type="SELECTED_OBJECTS", object=True, obdata=False)
         bpy.ops.object.visual_transform_apply()
 
     def set_up_physics(self):
+        if self.solver == "REPEL":
+            self.set_up_repel()
+            return
         scn = bpy.context.scene
         # add rigid body world to new scene
         bpy.ops.rigidbody.world_add()
@@ -205,64 +244,105 @@ class PHYSICS_OT_setup_and_run_ipe(Operator, interactive_sim_drawing):
             rb.friction = 0.1
             rb.use_margin = True
             rb.collision_margin = 0
-            rb.collision_shape = scn.physics.collision_shape
+            set_collision_shape(obj, scn.physics.collision_shape)
             rb.restitution = 0
             rb.linear_damping = 1
             rb.angular_damping = 0.9
             rb.mass = 3
             deselect(obj)
             obj.data.update()
+        # merge passive scenery into a single collision body
+        if self.env_objs:
+            self.env_obj = add_environment_body(self.env_objs, scene=self.sim_scene)
         depsgraph_update()
 
         bpy.app.handlers.frame_change_pre.append(handle_edit_session_pre)
+        bpy.app.handlers.frame_change_pre.append(handle_continuous_collision)
         bpy.app.handlers.frame_change_post.append(handle_edit_session_post)
 
-    def close_interactive_sim(self):
-        bpy.ops.screen.animation_cancel()
+    def set_up_repel(self):
+        self.sim_scene.frame_start = 1
+        self.sim_scene.frame_end = 500
+        self.sim_scene.frame_set(0)
+        # collect objects pushed by (and pushing) each other; no rigid body world is created
+        obj_coll = bpy_collections().get(collection_name)
+        if obj_coll is None:
+            obj_coll = bpy_collections().new(collection_name)
+        for obj in self.objs + self.env_objs:
+            obj_coll.objects.link(obj)
+            deselect(obj)
+        bpy.app.handlers.frame_change_pre.append(handle_repel_step)
+
+    def step_history(self, redo:bool=False):
+        # record placements made since the last mouse release so they can be redone
+        self.history.commit(read_world_matrices(self.objs))
+        step = self.history.redo() if redo else self.history.undo()
+        if step is None:
+            self.report({"INFO"}, "Nothing to {}".format("redo" if redo else "undo"))
+            return
+        # restart the sim loop from the restored transforms
+        if not bpy.app.background:
+            bpy.ops.screen.animation_cancel()
+        for obj in self.objs:
+            obj["d3tool_last_matrix"] = obj.matrix_world.copy()
+        write_world_matrices(self.objs, *step)
+        self.sim_scene.frame_set(self.sim_scene.frame_start)
+        if not bpy.app.background:
+            bpy.ops.screen.animation_play()
+
+    def close_interactive_sim(self, restore:bool=False):
+        start_time = time.time()
+        if not bpy.app.background:
+            bpy.ops.screen.animation_cancel()
+        stop_session_recording()
         # clean up UI
         self.ui_end()
+        # remove convex pieces of compound collision shapes
+        remove_decomposition_proxies(self.objs)
+        remove_environment_body(self.env_obj)
+        for obj, hide_select in zip(self.env_objs, self.orig_env_hide_select):
+            obj.hide_select = hide_select
+        # diff final (simulated) transforms against the originals
+        final_matrices = read_world_matrices(self.objs)
+        moved = changed_matrices(final_matrices, self.orig_matrices)
+        target_matrices = self.orig_matrices if restore else final_matrices
         # do the rest of the cleanup
-        for obj in self.objs:
-            self.matrices[obj.name] = obj.matrix_world.copy()
         orig_scene = bpy.data.scenes[self.orig_scene_name]
         set_active_scene(orig_scene)
-        bpy.data.scenes.remove(self.sim_scene)
+        if self.sim_scene is not None:
+            bpy.data.scenes.remove(self.sim_scene)
         orig_scene.frame_set(self.orig_frame)
         coll = bpy_collections().get(collection_name)
         if coll:
             bpy_collections().remove(coll)
-        for obj_n in self.objs:
-            obj.matrix_world = self.matrices[obj.name]
-        depsgraph_update()
-        for obj_n in self.objs:
-            obj.lock_rotations_4d = False
-            obj.lock_rotation = [False]*3
-            obj.lock_location = [False]*3
-            obj.lock_rotation_w = False
-            limit1 = obj.constraints.get("Limit Location")
-            if limit1 is not None:
-                obj.constraints.remove(limit1)
-            limit2 = obj.constraints.get("Limit Rotation")
-            if limit2 is not None:
-                obj.constraints.remove(limit2)
-        try:
-            bpy.app.handlers.frame_change_pre.remove(handle_edit_session_pre)
-            bpy.app.handlers.frame_change_post.remove(handle_edit_session_post)
-        except ValueError:
-            pass
-        bpy.ops.rigidbody.objects_remove()
+        for handlers, handler in ((bpy.app.handlers.frame_change_pre, handle_edit_session_pre),
+                                  (bpy.app.handlers.frame_change_pre, handle_continuous_collision),
+                                  (bpy.app.handlers.frame_change_pre, handle_repel_step),
+                                  (bpy.app.handlers.frame_change_post, handle_edit_session_post)):
+            if handler in handlers:
+                handlers.remove(handler)
+        clear_continuous_collision()
+        # write back only the transforms that changed
+        for i in np.flatnonzero(moved):
+            self.objs[i].matrix_world = Matrix(target_matrices[i].tolist())
+        remove_session_constraints(self.objs, self.orig_locks)
+        remove_rigid_bodies(self.objs)
+        self.report({"INFO"}, "Closed Interactive Physics Session in {t:.3f}s ({n} of {total} objects moved)".format(t=time.time() - start_time, n=int(moved.sum()), total=len(self.objs)))
 
     def cancel_interactive_sim(self):
-        for obj_n in self.obj_names:
-            obj = bpy.data.objects[obj_n]
-            obj.matrix_world = self.matrices[obj_n]
-        self.close_interactive_sim()
+        self.close_interactive_sim(restore=True)
 
     def is_valid(self):
         for obj in self.selected_objs:
             if obj.type != "MESH":
                 self.report({"WARNING"}, "Interactive Physics Editor only supports objects of type 'MESH'")
                 return False
+        # concave collision shapes are unreliable for open or non-manifold meshes
+        physics = bpy.context.scene.physics
+        if physics.solver == "RIGID_BODY" and physics.collision_shape == "MESH":
+            open_objs = [obj.name for obj in self.selected_objs if not mesh_health(obj.data)["is_closed_manifold"]]
+            if open_objs:
+                self.report({"WARNING"}, "Concave collisions work best with closed, manifold meshes: {}".format(", ".join(open_objs[:5]) + (", ..." if len(open_objs) > 5 else "")))
         return True
 
     ###################################################
@@ -51,6 +51,24 @@ class PHYSICS_PT_interactive_editor(Panel):
         col = layout.column(align=True)
         if context.scene.name != "Interactive Physics Session":
             col.operator("physics.setup_and_run_ipe", text="New Interactive Physics Session", icon="PHYSICS")
+            col.prop(scn.physics, "solver", text="")
+            obj = context.active_object
+            if obj is not None and obj.type == "MESH":
+                col = layout.column(align=True)
+                col.prop(obj, "ipe_environment", text="Treat as Environment")
+            col = layout.column(align=True)
+            col.prop(scn.physics, "record_session")
+            row = col.row(align=True)
+            row.active = scn.physics.record_session
+            row.prop(scn.physics, "record_filepath", text="")
+        elif scn.physics.solver == "REPEL":
+            col.prop(scn.physics, "repel_strength")
+
+            layout.split()
+            col = layout.column(align=True)
+            col.scale_y = 0.7
+            col.label(text="Press 'SHIFT' + 'RETURN' to commit")
+            col.label(text="Press 'ESC' to cancel")
         else:
             obj = bpy.context.active_object
             if obj is None or obj.rigid_body is None:
@@ -68,6 +86,7 @@ class PHYSICS_PT_interactive_editor(Panel):
             col.label(text="Collision Shape:")
             col.prop(obj.rigid_body, "collision_shape", text="")
             col.prop(obj.rigid_body, "collision_margin", text="Margin")
+            col.operator("physics.decompose_collision_shape", icon="MOD_EXPLODE")
 
 
             # layout.separator()
@@ -115,7 +134,7 @@ class PHYSICS_PT_interactive_editor_rbw(Panel):
     @classmethod
     def poll(self, context):
         """ ensures operator can execute (if not, returns false) """
-        return context.scene.name == "Interactive Physics Session"
+        return context.scene.name == "Interactive Physics Session" and context.scene.rigidbody_world is not None
 
     def draw(self, context):
         layout = self.layout
@@ -124,6 +143,7 @@ class PHYSICS_PT_interactive_editor_rbw(Panel):
         col = layout.column(align=False)
         col.prop(scn.rigidbody_world, "substeps_per_frame")
         col.prop(scn.rigidbody_world, "solver_iterations")
+        col.prop(scn.physics, "use_continuous_collision")
 
 
 class PHYSICS_PT_interactive_editor_rbw_gravity(Panel):